@@ -0,0 +1,37 @@
+"""
+Shared HTTP session for talking to the MindZap Flask backend.
+Reusing one requests.Session keeps the TCP connection alive between calls, and the session
+advertises every content coding urllib3 can decode (gzip/deflate, plus br and zstd when the
+'brotli' / 'zstandard' packages are installed), so compressed responses are decoded transparently.
+"""
+import requests
+from urllib3.util.request import ACCEPT_ENCODING
+
+BACKEND_URL = "http://127.0.0.1:5000"
+
+session = requests.Session()
+session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+
+
+def set_session_token(token):
+    """Sends token as a Bearer credential with every later request; None logs the session out locally."""
+    if token:
+        session.headers["Authorization"] = f"Bearer {token}"
+    else:
+        session.headers.pop("Authorization", None)
+
+
+def has_session_token():
+    return "Authorization" in session.headers
+
+
+def batch(sub_requests, transaction=False, timeout=10):
+    """
+    Sends several API calls in one POST /batch round trip.
+    :param sub_requests: dicts with 'path' and optionally 'method', 'body' and 'headers'.
+    :return: one {'status', 'headers', 'body'} dict per sub-request, in order. Raises for a failed batch.
+    """
+    response = session.post(f"{BACKEND_URL}/batch", json={"requests": sub_requests, "transaction": transaction},
+                            timeout=timeout)
+    response.raise_for_status()
+    return response.json()["responses"]
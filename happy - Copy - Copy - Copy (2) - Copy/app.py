@@ -1,24 +1,151 @@
 import os
 import sys
-from flask import Flask, request, jsonify
+import logging
+from flask import Flask, request, jsonify, Response, g
 from flask_sqlalchemy import SQLAlchemy
+import flask_migrate
 from flask_migrate import Migrate
 from datetime import datetime, timezone  # Import timezone for UTC datetimes
 import json  # Import json for parsing/serializing if complex data needs to be stored
+import base64
+import bisect
+import itertools
+import random
+from collections import Counter
+import hashlib
+import csv
+from sqlalchemy.exc import IntegrityError
+import sm2  # SM-2 spaced-repetition scheduling
+import flashcard_import  # Streaming CSV/JSONL/JSON parsers for bulk import
+import compression  # gzip / br / zstd response compression
+import metrics  # Prometheus request / SQL instrumentation served at /metrics
+import profiling  # Opt-in sampled request profiler (collapsed-stack output)
+import session_tokens  # HMAC-signed session tokens
+import passwords  # scrypt password hashing in a bounded process pool
+import learning_stats  # NumPy retention / forecast / histogram statistics with a per-user cache
+import search  # SQLite FTS5 indexes over flashcards and quiz questions
+import batch  # POST /batch: several API calls in one round trip
+import jobs  # Persistent background job queue with in-process workers
+import backups  # Online SQLite snapshots (backup API), verified and rotated
+from session_tokens import require_session
+from structured_logging import configure_logging
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 
 # --- Initialize Flask App ---
 app = Flask(__name__)
 
+# Records are handed to a background queue listener, so logging never blocks a request on stdout/stderr
+configure_logging()
+logger = logging.getLogger('mindzap.backend')
+
 # --- Database Configuration ---
 # Get the directory of the current script (backend folder)
 basedir = os.path.abspath(os.path.dirname(__file__))
 # Construct the path to the database file in the backend folder
 # This will use 'mindzap.db' inside the backend folder
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'mindzap.db')
+# MINDZAP_DATABASE_URI overrides it (e.g. to point benchmarks or a second instance at another file)
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+    'MINDZAP_DATABASE_URI', 'sqlite:///' + os.path.join(basedir, 'mindzap.db'))
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False  # Disable tracking modifications for performance
 
+# --- SQLite Engine Profiles ---
+# PRAGMAs applied to every new SQLite connection. 'tuned' uses WAL so readers never block the writer,
+# waits on locks instead of failing with "database is locked", and trades fsync-per-commit durability
+# (synchronous=NORMAL is still crash-safe in WAL mode) for write throughput.
+SQLITE_PROFILES = {
+    'default': {},  # SQLite's own defaults: rollback journal, synchronous=FULL, no mmap
+    'tuned': {
+        'journal_mode': 'WAL',
+        'busy_timeout': 5000,  # Milliseconds
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,  # Bytes
+        'cache_size': -64 * 1024,  # Negative means KiB, so 64 MiB of page cache per connection
+        'temp_store': 'MEMORY',
+    },
+}
+app.config['SQLITE_PROFILE'] = os.environ.get('MINDZAP_SQLITE_PROFILE', 'tuned')
+
+# --- Session Tokens ---
+# MINDZAP_SESSION_SECRETS is "key_id:secret,key_id:secret": the first key signs new tokens, the rest are
+# still accepted, so secrets can be rotated without logging everyone out
+app.config['SESSION_SECRETS'] = session_tokens.parse_secrets(os.environ.get('MINDZAP_SESSION_SECRETS'))
+app.config['SESSION_TOKEN_TTL'] = int(os.environ.get('MINDZAP_SESSION_TOKEN_TTL', session_tokens.DEFAULT_TTL))
+
+# --- Password Hashing ---
+# The scrypt cost is calibrated at startup to take about MINDZAP_PASSWORD_HASH_TARGET_MS per hash;
+# MINDZAP_PASSWORD_SCRYPT_N pins it instead (e.g. so every server of a deploy uses the same cost)
+app.config['PASSWORD_HASH_TARGET_MS'] = int(os.environ.get('MINDZAP_PASSWORD_HASH_TARGET_MS', passwords.DEFAULT_TARGET_MS))
+if os.environ.get('MINDZAP_PASSWORD_SCRYPT_N'):
+    app.config['PASSWORD_SCRYPT_N'] = int(os.environ['MINDZAP_PASSWORD_SCRYPT_N'])
+if os.environ.get('MINDZAP_PASSWORD_HASH_WORKERS'):
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.environ['MINDZAP_PASSWORD_HASH_WORKERS'])
+
+# --- Request Profiling (off unless MINDZAP_PROFILE=1) ---
+app.config['PROFILE_ENABLED'] = os.environ.get('MINDZAP_PROFILE') == '1'
+app.config['PROFILE_DIR'] = os.environ.get('MINDZAP_PROFILE_DIR', os.path.join(basedir, 'profiles'))
+app.config['PROFILE_SAMPLE_EVERY'] = int(os.environ.get('MINDZAP_PROFILE_SAMPLE_EVERY', 100))
+# Required by /admin/profiles and the profile header; without it both are disabled
+app.config['PROFILE_ADMIN_TOKEN'] = os.environ.get('MINDZAP_PROFILE_ADMIN_TOKEN')
+
+# --- Learning Statistics Cache ---
+app.config['STATS_CACHE_SIZE'] = int(os.environ.get('MINDZAP_STATS_CACHE_SIZE', 1024))  # Users per worker
+app.config['STATS_CACHE_TTL'] = int(os.environ.get('MINDZAP_STATS_CACHE_TTL', 300))  # Seconds
+app.config['BATCH_MAX_REQUESTS'] = int(os.environ.get('MINDZAP_BATCH_MAX_REQUESTS', 20))  # Sub-requests per /batch call
+
+# --- Background Jobs ---
+# Worker threads per server process; 0 makes this process only queue jobs for others to run
+app.config['JOBS_WORKERS'] = int(os.environ.get('MINDZAP_JOBS_WORKERS', 2))
+app.config['JOBS_SPOOL_DIR'] = os.environ.get('MINDZAP_JOBS_SPOOL_DIR', os.path.join(basedir, 'job_spool'))
+
+# --- Backups ---
+# Online snapshots of the backend database and the desktop quiz bank, taken every MINDZAP_BACKUP_INTERVAL
+# seconds (0 disables the schedule; 'flask backup run' still works) and kept MINDZAP_BACKUP_KEEP deep
+database_path = make_url(app.config['SQLALCHEMY_DATABASE_URI']).database
+app.config['BACKUP_DATABASES'] = {'mindzap': database_path, 'quiz': os.path.join(basedir, 'quiz.db')}
+app.config['BACKUP_DIR'] = os.environ.get('MINDZAP_BACKUP_DIR',
+                                          os.path.join(os.path.dirname(os.path.abspath(database_path)), 'backups'))
+app.config['BACKUP_INTERVAL'] = int(os.environ.get('MINDZAP_BACKUP_INTERVAL', 24 * 3600))
+app.config['BACKUP_KEEP'] = int(os.environ.get('MINDZAP_BACKUP_KEEP', 7))
+app.config['BACKUP_COMPACT'] = os.environ.get('MINDZAP_BACKUP_COMPACT') == '1'
+
+
+def apply_sqlite_profile(engine, profile_name):
+    """Registers a 'connect' listener that applies the named PRAGMA profile to each new connection."""
+    pragmas = SQLITE_PROFILES[profile_name]
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+
 db = SQLAlchemy(app)
-migrate = Migrate(app, db)
+migrate = Migrate(app, db, directory=os.path.join(basedir, 'migrations'), include_object=search.include_object)
+metrics.init_metrics(app)  # Registered before compression so response sizes are measured as sent
+compression.init_compression(app)  # Negotiated per request
+profiling.init_profiling(app)
+session_tokens.init_session_tokens(app)
+passwords.init_passwords(app)
+learning_stats.init_learning_stats(app)
+batch.init_batch(app, db)
+
+
+
+@event.listens_for(db.metadata, 'after_create')
+def create_search_schema(target, connection, **kw):
+    # FTS5 tables and their sync triggers are not ORM models; migrations create them for existing databases
+    if connection.dialect.name == 'sqlite':
+        search.create_schema(connection)
+
+
+with app.app_context():
+    apply_sqlite_profile(db.engine, app.config['SQLITE_PROFILE'])
+    metrics.instrument_engine(db.engine)
 
 
 # --- Database Models ---
@@ -31,6 +158,11 @@ class User(db.Model):
     phone_number = db.Column(db.String(20))
     country = db.Column(db.String(50))
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))  # Use timezone.utc
+    # Version counters backing the ETags of the profile and of the user's flashcard listings
+    version = db.Column(db.Integer, nullable=False, default=1)
+    flashcards_version = db.Column(db.Integer, nullable=False, default=0)
+    # Last sequence number handed out to a change of this user's flashcards or quizzes (see /sync)
+    change_seq = db.Column(db.Integer, nullable=False, default=0)
 
     # One-to-many relationship with Flashcard
     flashcards = db.relationship('Flashcard', backref='user', lazy=True)
@@ -52,23 +184,252 @@ class Flashcard(db.Model):
     interval = db.Column(db.Integer, default=1)
     repetitions = db.Column(db.Integer, default=0)
     ease_factor = db.Column(db.Float, default=2.5)
+    change_seq = db.Column(db.Integer, nullable=False, default=0)  # The user's change sequence at the last write
+
+    # Serves per-user listings ordered by due date (the primary key rides along in the index)
+    __table_args__ = (
+        db.Index('ix_flashcards_user_id_due_date', 'user_id', 'due_date'),
+        db.Index('ix_flashcards_user_id_change_seq', 'user_id', 'change_seq'),
+        db.Index('ix_flashcards_user_id', 'user_id'),  # i.e. (user_id, id): /export reads in id order without a sort
+    )
 
     def __repr__(self):
         return f'<Flashcard {self.question}>'
 
 
+class FlashcardReview(db.Model):
+    __tablename__ = 'flashcard_reviews'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    flashcard_id = db.Column(db.Integer, db.ForeignKey('flashcards.id'), nullable=False)
+    # Client-assigned sequence number, makes batch retries idempotent; NULL for single reviews
+    client_seq = db.Column(db.Integer, nullable=True)
+    grade = db.Column(db.Integer, nullable=False)
+    reviewed_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'client_seq', name='uq_flashcard_reviews_user_id_client_seq'),
+        # Lets /stats read a user's whole review log already grouped by card and in time order
+        db.Index('ix_flashcard_reviews_user_id_flashcard_id_reviewed_at', 'user_id', 'flashcard_id', 'reviewed_at'),
+        db.Index('ix_flashcard_reviews_user_id', 'user_id'),  # Serves /export's id-ordered read of the log
+    )
+
+    def __repr__(self):
+        return f'<FlashcardReview {self.flashcard_id} grade={self.grade}>'
+
+
 class Quiz(db.Model):
     __tablename__ = 'quizzes'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=True)
-    questions_data = db.Column(db.Text, nullable=False)  # Stores JSON string of questions
+    question_count = db.Column(db.Integer, nullable=False, default=0)  # Lets listings skip the questions table
+    # JSON object {tag: number of questions}; with QuizQuestion.tag_position it addresses every question,
+    # so random samples are drawn from index ranges instead of scanning the quiz
+    tag_counts = db.Column(db.Text, nullable=True)
+    version = db.Column(db.Integer, nullable=False, default=1)  # Backs the quiz ETag; bump on every change
+    change_seq = db.Column(db.Integer, nullable=False, default=0)  # The user's change sequence at the last write
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc),
+                           onupdate=lambda: datetime.now(timezone.utc))
+
+    # Questions are stored relationally (quiz_questions / quiz_answers), ordered by position
+    questions = db.relationship('QuizQuestion', backref='quiz', lazy=True, order_by='QuizQuestion.position',
+                                cascade='all, delete-orphan')
+
+    __table_args__ = (
+        db.Index('ix_quizzes_user_id', 'user_id'),
+        db.Index('ix_quizzes_user_id_change_seq', 'user_id', 'change_seq'),
+    )
 
     def __repr__(self):
         return f'<Quiz {self.title}>'
 
 
+class QuizQuestion(db.Model):
+    __tablename__ = 'quiz_questions'
+    id = db.Column(db.Integer, primary_key=True)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)  # 0-based order within the quiz
+    question_text = db.Column(db.Text, nullable=False)
+    extra_data = db.Column(db.Text, nullable=True)  # JSON object of any other client-supplied keys
+    tag = db.Column(db.String(100), nullable=False, default='')  # The question's 'tag' (or 'category'), '' if none
+    tag_position = db.Column(db.Integer, nullable=False, default=0)  # 0-based order among the quiz's questions with this tag
+
+    answers = db.relationship('QuizAnswer', backref='question', lazy=True, order_by='QuizAnswer.position',
+                              cascade='all, delete-orphan')
+
+    __table_args__ = (
+        db.Index('ix_quiz_questions_quiz_id_position', 'quiz_id', 'position', unique=True),
+        db.Index('ix_quiz_questions_quiz_id_tag_tag_position', 'quiz_id', 'tag', 'tag_position', unique=True),
+    )
+
+    def __repr__(self):
+        return f'<QuizQuestion {self.question_text}>'
+
+
+class QuizAnswer(db.Model):
+    __tablename__ = 'quiz_answers'
+    id = db.Column(db.Integer, primary_key=True)
+    question_id = db.Column(db.Integer, db.ForeignKey('quiz_questions.id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    answer_text = db.Column(db.Text, nullable=False)
+    is_correct = db.Column(db.Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        db.Index('ix_quiz_answers_question_id_position', 'question_id', 'position'),
+    )
+
+    def __repr__(self):
+        return f'<QuizAnswer {self.answer_text}>'
+
+
+class QuizAttempt(db.Model):
+    """One finished run through a quiz; the per-answer rows live in quiz_attempt_answers."""
+    __tablename__ = 'quiz_attempts'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    client_attempt_id = db.Column(db.String(64), nullable=False)  # Client-assigned, makes retried submissions idempotent
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), nullable=True)  # Set for backend quizzes
+    category = db.Column(db.String(100), nullable=True)  # Category name for the desktop quiz bank
+    question_count = db.Column(db.Integer, nullable=False)
+    correct_count = db.Column(db.Integer, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=False)
+
+    # History is read from this table only (one row per attempt, not per answer). Each index also holds the
+    # rowid, so "newest first" pages are backward range scans with no sort, however many answers exist.
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'client_attempt_id', name='uq_quiz_attempts_user_id_client_attempt_id'),
+        db.Index('ix_quiz_attempts_user_id', 'user_id'),
+        db.Index('ix_quiz_attempts_user_id_quiz_id', 'user_id', 'quiz_id'),
+        db.Index('ix_quiz_attempts_user_id_category', 'user_id', 'category'),
+        db.Index('ix_quiz_attempts_quiz_id', 'quiz_id'),
+        db.Index('ix_quiz_attempts_category', 'category'),
+    )
+
+    def __repr__(self):
+        return f'<QuizAttempt {self.id} {self.correct_count}/{self.question_count}>'
+
+
+class QuizAttemptAnswer(db.Model):
+    __tablename__ = 'quiz_attempt_answers'
+    id = db.Column(db.Integer, primary_key=True)
+    attempt_id = db.Column(db.Integer, db.ForeignKey('quiz_attempts.id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)  # 0-based question number within the attempt
+    question_id = db.Column(db.Integer, nullable=True)  # Id in whichever question bank the quiz came from
+    question_text = db.Column(db.Text, nullable=False)  # Snapshot, so results stay readable if the bank changes
+    answer_text = db.Column(db.Text, nullable=False)
+    is_correct = db.Column(db.Boolean, nullable=False)
+    answered_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_quiz_attempt_answers_attempt_id_position', 'attempt_id', 'position'),
+    )
+
+    def __repr__(self):
+        return f'<QuizAttemptAnswer {self.attempt_id}:{self.position}>'
+
+
+class SyncTombstone(db.Model):
+    """Records a deleted flashcard or quiz, so /sync can tell clients to drop their copy."""
+    __tablename__ = 'sync_tombstones'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # 'flashcard' or 'quiz'
+    record_id = db.Column(db.Integer, nullable=False)
+    change_seq = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.Index('ix_sync_tombstones_user_id_change_seq', 'user_id', 'change_seq'),
+    )
+
+    def __repr__(self):
+        return f'<SyncTombstone {self.kind} {self.record_id}>'
+
+
+class Job(db.Model):
+    """A queued or finished background job (see jobs.py)."""
+    __tablename__ = 'jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False)  # queued, running, succeeded or failed
+    payload = db.Column(db.Text, nullable=False)  # JSON object, the handler's input
+    result = db.Column(db.Text, nullable=True)  # JSON, the handler's return value once succeeded
+    error = db.Column(db.Text, nullable=True)  # Message of the last failed attempt
+    progress_done = db.Column(db.Integer, nullable=False, default=0)
+    progress_total = db.Column(db.Integer, nullable=True)
+    progress_message = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False)
+    run_after = db.Column(db.DateTime, nullable=False)  # Not claimed before this (retry backoff)
+    locked_until = db.Column(db.DateTime, nullable=True)  # Lease of the running attempt
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    # Workers look for the oldest claimable job by status; the rest of the table is finished history
+    __table_args__ = (
+        db.Index('ix_jobs_status_run_after', 'status', 'run_after'),
+        db.Index('ix_jobs_user_id', 'user_id'),
+    )
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
+
+
+job_runner = jobs.init_jobs(app, db, Job)
+backups.init_backups(app, job_runner)
+
+
+# --- Conditional GET Helpers ---
+def _not_modified(etag):
+    """
+    Returns a 304 response if the request's If-None-Match already holds this ETag, otherwise None.
+    Validators of compressed representations ("<etag>-gzip" etc.) match their uncompressed ETag.
+    """
+    for candidate in request.if_none_match.as_set():
+        if compression.strip_encoding_suffix(candidate) == etag:
+            response = Response(status=304)
+            response.set_etag(candidate)
+            return response
+    return None
+
+
+def _with_etag(response, etag):
+    response.set_etag(etag)
+    return response
+
+
+def _bump_flashcards_version(user_id):
+    """Invalidates the ETags of a user's flashcard listings. Call inside the transaction that changes them."""
+    db.session.execute(
+        db.update(User).where(User.id == user_id).values(flashcards_version=User.flashcards_version + 1)
+    )
+
+
+class UserNotFound(LookupError):
+    """Raised by _allocate_change_seqs when the user does not exist."""
+
+
+def _allocate_change_seqs(user_id, count=1):
+    """
+    Reserves 'count' consecutive change sequence numbers for a user and returns the first one.
+    Call inside the transaction that writes the rows, before writing them: the UPDATE takes SQLite's write
+    lock until commit, so sequence numbers become visible to /sync in the order they were handed out,
+    without gaps. Raises UserNotFound if there is no such user.
+    """
+    last = db.session.execute(
+        db.update(User).where(User.id == user_id).values(change_seq=User.change_seq + count)
+        .returning(User.change_seq)
+    ).scalar()
+    if last is None:
+        raise UserNotFound(user_id)
+    return last - count + 1
+
+
 # --- API Endpoints ---
 
 @app.route('/')
@@ -79,7 +440,7 @@ def home():
 @app.route('/register', methods=['POST'])
 def register():
     data = request.get_json()
-    print(f"Backend Debug (Register): Received data: {data}")
+    logger.debug("Register: received data", extra={'fields': {'data': data}})
 
     username = data.get('username')  # Frontend sends email as 'username'
     password = data.get('password')
@@ -88,16 +449,18 @@ def register():
     country = data.get('country')
 
     if not all([username, password, full_name, phone_number, country]):
-        print("Backend Debug (Register): Missing fields.")
+        logger.info("Register: missing fields")
         return jsonify(message="All fields are required for registration."), 400
+    if not isinstance(password, str):
+        return jsonify(message="Password must be a string."), 400
 
     if User.query.filter_by(username=username).first():  # Check uniqueness for username (email)
-        print(f"Backend Debug (Register): Username (email) {username} already taken.")
+        logger.info("Register: username (email) already taken", extra={'fields': {'username': username}})
         return jsonify(message="Username (email) already taken."), 409
 
     new_user = User(
         username=username,  # Assign to username (email) field
-        password=password,  # Assign to password field
+        password=passwords.hasher().hash(password),  # scrypt hash, computed in the hashing pool
         full_name=full_name,
         phone_number=phone_number,
         country=country
@@ -105,82 +468,116 @@ def register():
     try:
         db.session.add(new_user)
         db.session.commit()
-        print(f"Backend Debug (Register): User {username} registered successfully!")
+        logger.info("Register: user registered", extra={'fields': {'username': username}})
         return jsonify(message="User registered successfully!"), 201
     except Exception as e:
         db.session.rollback()
-        print(f"Backend Debug (Register): Registration failed: {str(e)}")
+        logger.exception("Register: registration failed", extra={'fields': {'username': username}})
         return jsonify(message=f"Registration failed: {str(e)}"), 500
 
 
 @app.route('/login', methods=['POST'])
 def login():
     data = request.get_json()
-    print(f"Backend Debug (Login): Received data: {data}")
+    logger.debug("Login: received data", extra={'fields': {'data': data}})
 
     username = data.get('username')  # Frontend sends username (email) here
     password = data.get('password')
 
     if not username or not password:
-        print("Backend Debug (Login): Missing username or password.")
+        logger.info("Login: missing username or password")
         return jsonify(message="Username and password are required."), 400
+    if not isinstance(password, str):
+        return jsonify(message="Password must be a string."), 400
 
     user = User.query.filter_by(username=username).first()
+    hasher = passwords.hasher()
 
     if user:
-        print(f"Backend Debug (Login): User found: {user.username}.")
-        # In a real app, you would hash and verify passwords securely (e.g., using bcrypt)
-        if user.password == password:
-            print(f"Backend Debug (Login): Login successful for {username}.")
-            # Return user_id along with username for frontend to use with quiz/flashcard creation
+        logger.debug("Login: user found", extra={'fields': {'username': user.username}})
+        if hasher.verify(password, user.password):
+            logger.info("Login: successful", extra={'fields': {'username': username}})
+            if hasher.needs_rehash(user.password):
+                # Legacy plaintext row or an outdated cost: store a current hash now that we know the password
+                user.password = hasher.hash(password)
+                db.session.commit()
+                logger.info("Login: password hash upgraded", extra={'fields': {'user_id': user.id}})
+            # Return user_id along with username for frontend to use with quiz/flashcard creation.
+            # The session token carries both, so authenticated endpoints never look the user up again.
             return jsonify(message=f"Login successful! Welcome, {username}", username=user.username,
-                           user_id=user.id), 200
+                           user_id=user.id, token=session_tokens.signer().issue(user.id, user.username),
+                           expires_in=app.config['SESSION_TOKEN_TTL']), 200
         else:
-            print(f"Backend Debug (Login): Invalid password for {username}.")
+            logger.info("Login: invalid password", extra={'fields': {'username': username}})
             return jsonify(message="Invalid username or password."), 401
     else:
-        print(f"Backend Debug (Login): User {username} not found in database.")
+        hasher.verify(password, None)  # Same cost as a wrong password, so timing does not reveal unknown users
+        logger.info("Login: user not found", extra={'fields': {'username': username}})
         return jsonify(message="Invalid username or password."), 401
 
 
+@app.errorhandler(passwords.HashingBusy)
+def password_hashing_busy(e):
+    logger.warning("Password hashing pool saturated")
+    return jsonify(message="Server busy, please try again shortly."), 503, {'Retry-After': '1'}
+
+
+@app.route('/logout', methods=['POST'])
+@require_session
+def logout():
+    """Revokes the session token the request was made with."""
+    session_tokens.signer().revoke(g.auth)
+    logger.info("Logout: token revoked", extra={'fields': {'user_id': g.auth['uid']}})
+    return jsonify(message="Logged out."), 200
+
+
 @app.route('/profile/<username>', methods=['GET'])
+@require_session
 def get_user_profile(username):
     """
-    Retrieves a user's profile data from the database.
+    Retrieves the logged-in user's profile data from the database.
+    Sends a strong ETag built from the user's version counter; a matching If-None-Match gets a 304
+    after reading only the id and version columns by primary key.
     """
-    print(f"Backend Debug (Profile GET): Request for username (email): {username}")
-    user = User.query.filter_by(username=username).first()
-    if user:
-        print(f"Backend Debug (Profile GET): User found: {user.full_name}")
-        return jsonify({
-            'username': user.username,  # Return username (email) for frontend consistency
-            'full_name': user.full_name,
-            'phone_number': user.phone_number,
-            'country': user.country,
-            'created_at': user.created_at.isoformat()
-        }), 200
-    else:
-        print(f"Backend Debug (Profile GET): User not found."), 404
+    logger.debug("Profile GET: request", extra={'fields': {'username': username}})
+    if username != g.auth['sub']:
+        return jsonify(message="You can only view your own profile."), 403
+    current = db.session.query(User.id, User.version).filter_by(id=g.auth['uid']).first()
+    if not current:
+        logger.info("Profile GET: user not found", extra={'fields': {'username': username}})
+        return jsonify(message="User not found."), 404
+
+    etag = f"user-{current.id}-v{current.version}"
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    user = db.session.get(User, current.id)
+    logger.debug("Profile GET: user found", extra={'fields': {'user_id': user.id}})
+    return _with_etag(jsonify({
+        'username': user.username,  # Return username (email) for frontend consistency
+        'full_name': user.full_name,
+        'phone_number': user.phone_number,
+        'country': user.country,
+        'created_at': user.created_at.isoformat()
+    }), etag), 200
 
 
 @app.route('/profile/update', methods=['POST'])
+@require_session
 def update_profile():
     data = request.get_json()
-    print(f"Backend Debug (Profile UPDATE): Received data: {data}")
+    logger.debug("Profile UPDATE: received data", extra={'fields': {'data': data}})
 
     if not data:
-        print("Backend Debug (Profile UPDATE): No data received.")
+        logger.info("Profile UPDATE: no data received")
         return jsonify({"status": "error", "message": "Invalid data"}), 400
 
-    user_username = data.get('username')  # Frontend sends username (email) to identify the user
-    if not user_username:
-        print("Backend Debug (Profile UPDATE): Username (email) missing in update data.")
-        return jsonify({"status": "error", "message": "Username (email) is required to update profile."}), 400
-
-    user = User.query.filter_by(username=user_username).first()
+    user_username = g.auth['sub']  # Identity comes from the session token, not the request body
+    user = db.session.get(User, g.auth['uid'])
 
     if not user:
-        print(f"Backend Debug (Profile UPDATE): User {user_username} not found for update.")
+        logger.info("Profile UPDATE: user not found", extra={'fields': {'username': user_username}})
         return jsonify({"status": "error", "message": "User not found for update"}), 404
 
     try:
@@ -189,34 +586,111 @@ def update_profile():
         user.phone_number = data.get('phone_number', user.phone_number)
         user.country = data.get('country', user.country)
         # Email (username) is generally not updated via profile update, but via separate process.
+        user.version += 1
 
         db.session.commit()
-        print(f"Backend Debug (Profile UPDATE): Profile for {user_username} updated successfully.")
+        logger.info("Profile UPDATE: profile updated", extra={'fields': {'username': user_username}})
         return jsonify({"status": "success", "message": "Profile updated successfully!"}), 200
     except Exception as e:
         db.session.rollback()
-        print(f"Backend Debug (Profile UPDATE): Error updating profile for {user_username}: {e}")
+        logger.exception("Profile UPDATE: update failed", extra={'fields': {'username': user_username}})
         return jsonify({"status": "error", "message": f"Failed to update profile: {str(e)}"}), 500
 
 
+# --- Pagination Helpers ---
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def _parse_limit(raw_limit):
+    """Clamps the 'limit' query parameter to [1, MAX_PAGE_SIZE]. Returns None if it is not an integer."""
+    if raw_limit is None:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(raw_limit)
+    except (TypeError, ValueError):
+        return None
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _encode_cursor(due_date, row_id):
+    """Packs the (due_date, id) position of the last returned row into an opaque URL-safe token."""
+    raw = f"{due_date.isoformat()}|{row_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def _decode_cursor(cursor):
+    """Reverses _encode_cursor. Returns (due_date, id) or None if the token is malformed."""
+    try:
+        due_date_text, row_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(due_date_text), int(row_id)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def _flashcard_to_dict(flashcard):
+    return {
+        'id': flashcard.id,
+        'user_id': flashcard.user_id,
+        'question': flashcard.question,
+        'answer': flashcard.answer,
+        'due_date': flashcard.due_date.isoformat(),
+        'interval': flashcard.interval,
+        'repetitions': flashcard.repetitions,
+        'ease_factor': flashcard.ease_factor
+    }
+
+
 @app.route('/flashcards', methods=['GET'])
 def get_flashcards():
-    # This endpoint should ideally filter by user_id for the logged-in user
-    # For now, it returns all flashcards.
-    flashcards = Flashcard.query.all()
-    output = []
-    for flashcard in flashcards:
-        output.append({
-            'id': flashcard.id,
-            'user_id': flashcard.user_id,
-            'question': flashcard.question,
-            'answer': flashcard.answer,
-            'due_date': flashcard.due_date.isoformat(),
-            'interval': flashcard.interval,
-            'repetitions': flashcard.repetitions,
-            'ease_factor': flashcard.ease_factor
-        })
-    return jsonify(output), 200
+    """
+    Returns one page of a user's flashcards ordered by (due_date, id).
+    Query parameters: user_id (required), limit (default 50, max 500), cursor (from 'next_cursor').
+    Uses keyset pagination on the (user_id, due_date) index, so the cost depends on the page size only.
+    """
+    user_id = request.args.get('user_id', type=int)
+    if not user_id:
+        return jsonify(message="User ID is required."), 400
+
+    limit = _parse_limit(request.args.get('limit'))
+    if limit is None:
+        return jsonify(message="Limit must be an integer."), 400
+
+    # The ETag covers the user's whole flashcard set plus this page's query string
+    flashcards_version = db.session.query(User.flashcards_version).filter(User.id == user_id).scalar()
+    if flashcards_version is None:
+        return jsonify(message="User not found."), 404
+    query_digest = hashlib.sha1(request.query_string).hexdigest()[:12]
+    etag = f"flashcards-{user_id}-v{flashcards_version}-{query_digest}"
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    query = Flashcard.query.filter(Flashcard.user_id == user_id)
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        position = _decode_cursor(cursor)
+        if position is None:
+            return jsonify(message="Invalid cursor."), 400
+        last_due_date, last_id = position
+        # The first condition bounds the index range scan, the second breaks due_date ties by id
+        query = query.filter(
+            Flashcard.due_date >= last_due_date,
+            db.or_(Flashcard.due_date > last_due_date, Flashcard.id > last_id)
+        )
+
+    # Fetch one extra row to find out whether another page exists
+    flashcards = query.order_by(Flashcard.due_date, Flashcard.id).limit(limit + 1).all()
+    has_more = len(flashcards) > limit
+    flashcards = flashcards[:limit]
+
+    next_cursor = None
+    if has_more:
+        next_cursor = _encode_cursor(flashcards[-1].due_date, flashcards[-1].id)
+
+    return _with_etag(jsonify(flashcards=[_flashcard_to_dict(flashcard) for flashcard in flashcards],
+                              next_cursor=next_cursor), etag), 200
 
 
 @app.route('/flashcards', methods=['POST'])
@@ -231,14 +705,520 @@ def add_flashcard():
 
     new_flashcard = Flashcard(user_id=user_id, question=question, answer=answer)
     try:
+        new_flashcard.change_seq = _allocate_change_seqs(user_id)
         db.session.add(new_flashcard)
+        _bump_flashcards_version(user_id)
         db.session.commit()
         return jsonify(message="Flashcard added successfully!", id=new_flashcard.id), 201
+    except UserNotFound:
+        db.session.rollback()
+        return jsonify(message="User not found."), 404
     except Exception as e:
         db.session.rollback()
         return jsonify(message=f"Failed to add flashcard: {str(e)}"), 500
 
 
+@app.route('/flashcards/<int:flashcard_id>', methods=['DELETE'])
+def delete_flashcard(flashcard_id):
+    """Deletes a flashcard and its review log, leaving a tombstone for /sync. Query parameters: user_id."""
+    user_id = request.args.get('user_id', type=int)
+    if not user_id:
+        return jsonify(message="User ID is required."), 400
+
+    flashcard = Flashcard.query.filter_by(id=flashcard_id, user_id=user_id).first()
+    if not flashcard:
+        return jsonify(message="Flashcard not found."), 404
+
+    try:
+        change_seq = _allocate_change_seqs(user_id)
+        db.session.execute(db.delete(FlashcardReview).where(FlashcardReview.flashcard_id == flashcard_id))
+        db.session.delete(flashcard)
+        db.session.add(SyncTombstone(user_id=user_id, kind='flashcard', record_id=flashcard_id,
+                                     change_seq=change_seq))
+        _bump_flashcards_version(user_id)
+        db.session.commit()
+        return jsonify(message="Flashcard deleted."), 200
+    except UserNotFound:
+        db.session.rollback()
+        return jsonify(message="User not found."), 404
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(message=f"Failed to delete flashcard: {str(e)}"), 500
+
+
+IMPORT_CHUNK_SIZE = 1000  # Rows per executemany INSERT / commit
+MAX_REPORTED_IMPORT_ERRORS = 100
+
+
+@app.route('/flashcards/import', methods=['POST'])
+def import_flashcards():
+    """
+    Queues a bulk import of flashcards from the request body and answers 202 with the job id.
+    Query parameters: user_id (required), format (csv, jsonl or json; otherwise taken from Content-Type).
+    The body is streamed to a spool file; the import_flashcards job parses it. Poll GET /jobs/<id>: its
+    result holds message, imported, failed and errors (the first MAX_REPORTED_IMPORT_ERRORS invalid rows).
+    """
+    user_id = request.args.get('user_id', type=int)
+    if not user_id:
+        return jsonify(message="User ID is required."), 400
+
+    import_format = flashcard_import.detect_format(request.args.get('format'), request.content_type)
+    if import_format is None:
+        return jsonify(message="Format must be one of: csv, jsonl, json."), 400
+
+    if not db.session.get(User, user_id):
+        return jsonify(message="User not found."), 404
+
+    try:
+        path = jobs.spool(request.stream, app.config['JOBS_SPOOL_DIR'])
+    except OSError as e:
+        return jsonify(message=f"Failed to receive the import: {str(e)}"), 500
+    job_id = job_runner.submit('import_flashcards', user_id, {'path': path, 'format': import_format})
+    return _accepted(job_id, "Import queued.")
+
+
+@job_runner.handler('import_flashcards')
+def run_flashcard_import(job):
+    """
+    Parses a spooled deck incrementally and inserts it in chunked executemany transactions, so memory stays
+    bounded by the chunk size. Invalid rows are reported and skipped without aborting the import.
+    Each chunk commits together with the job's progress (the last row number inserted), so a retried
+    attempt re-parses the file but skips the rows an earlier attempt already inserted.
+    """
+    user_id = job.user_id
+    imported = 0
+    failed = 0
+    errors = []
+    pending = []
+    last_row = job.checkpoint
+    stopped = None
+    finished = False
+
+    def flush():
+        nonlocal imported, pending
+        if pending:
+            try:
+                first_seq = _allocate_change_seqs(user_id, len(pending))
+            except UserNotFound:
+                raise jobs.JobFailed("User not found.")
+            for offset, record in enumerate(pending):
+                record['change_seq'] = first_seq + offset
+            db.session.execute(db.insert(Flashcard), pending)
+            _bump_flashcards_version(user_id)
+            imported += len(pending)
+            pending = []
+            job.progress(last_row, message=f"{imported} flashcards imported")
+
+    if not os.path.exists(job.payload['path']):
+        raise jobs.JobFailed("The uploaded deck is no longer available; upload it again.")
+    try:
+        with open(job.payload['path'], 'rb') as deck_file:
+            try:
+                for row_number, record, error in flashcard_import.PARSERS[job.payload['format']](deck_file):
+                    if error:
+                        failed += 1
+                        if len(errors) < MAX_REPORTED_IMPORT_ERRORS:
+                            errors.append({'row': row_number, 'message': error})
+                        continue
+                    if row_number <= job.checkpoint:
+                        imported += 1  # Inserted by an earlier attempt
+                        continue
+                    record['user_id'] = user_id
+                    record['due_date'] = _utcnow()
+                    pending.append(record)
+                    last_row = row_number
+                    if len(pending) >= IMPORT_CHUNK_SIZE:
+                        flush()
+            except (flashcard_import.ImportFormatError, UnicodeDecodeError, csv.Error) as e:
+                # Rows parsed before the syntax error are kept; report how far the import got
+                stopped = f"Import stopped: {str(e)}"
+            flush()
+        finished = True
+    except jobs.JobFailed:
+        finished = True  # Terminal: JobFailed is never retried
+        raise
+    finally:
+        # Keep the spool file only while another attempt will read it
+        if finished or job.is_last_attempt:
+            os.remove(job.payload['path'])
+
+    if stopped and imported == 0:
+        raise jobs.JobFailed(stopped)
+    return {'message': stopped or "Import finished.", 'imported': imported, 'failed': failed, 'errors': errors}
+
+
+def _utcnow():
+    """Current UTC time as a naive datetime, matching how SQLite hands DateTime columns back."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _parse_timestamp(value):
+    """Parses an ISO 8601 string into a naive UTC datetime. Returns None if it is not valid."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+@app.route('/flashcards/due', methods=['GET'])
+def get_due_flashcards():
+    """
+    Returns the next 'limit' flashcards that are due for a user, most overdue first.
+    Query parameters: user_id (required), limit (default 50, max 500).
+    This is a range scan of the (user_id, due_date) index that stops after 'limit' rows.
+    """
+    user_id = request.args.get('user_id', type=int)
+    if not user_id:
+        return jsonify(message="User ID is required."), 400
+
+    limit = _parse_limit(request.args.get('limit'))
+    if limit is None:
+        return jsonify(message="Limit must be an integer."), 400
+
+    now = _utcnow()
+    flashcards = Flashcard.query.filter(
+        Flashcard.user_id == user_id,
+        Flashcard.due_date <= now
+    ).order_by(Flashcard.due_date, Flashcard.id).limit(limit).all()
+
+    output = []
+    for flashcard in flashcards:
+        card = _flashcard_to_dict(flashcard)
+        card['overdue_seconds'] = int((now - flashcard.due_date).total_seconds())
+        output.append(card)
+    return jsonify(flashcards=output, as_of=now.isoformat()), 200
+
+
+@app.route('/flashcards/<int:flashcard_id>/review', methods=['POST'])
+def review_flashcard(flashcard_id):
+    """
+    Grades one review of a flashcard and applies the SM-2 update on the server.
+    Body: {"user_id": int, "grade": 0-5, "reviewed_at": optional ISO 8601 timestamp}.
+    Returns the card's new schedule.
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify(message="Invalid data"), 400
+
+    user_id = data.get('user_id')
+    grade = data.get('grade')
+    if not user_id or grade is None:
+        return jsonify(message="User ID and grade are required."), 400
+    if not sm2.is_valid_grade(grade):
+        return jsonify(message="Grade must be an integer from 0 to 5."), 400
+
+    reviewed_at = _utcnow()
+    if data.get('reviewed_at'):
+        reviewed_at = _parse_timestamp(data.get('reviewed_at'))
+        if reviewed_at is None:
+            return jsonify(message="reviewed_at must be an ISO 8601 timestamp."), 400
+
+    flashcard = Flashcard.query.filter_by(id=flashcard_id, user_id=user_id).first()
+    if not flashcard:
+        return jsonify(message="Flashcard not found."), 404
+
+    interval, repetitions, ease_factor = sm2.review(flashcard.interval, flashcard.repetitions,
+                                                    flashcard.ease_factor, grade)
+    try:
+        flashcard.interval = interval
+        flashcard.repetitions = repetitions
+        flashcard.ease_factor = ease_factor
+        flashcard.due_date = sm2.next_due_date(reviewed_at, interval)
+        flashcard.change_seq = _allocate_change_seqs(user_id)
+        db.session.add(FlashcardReview(user_id=user_id, flashcard_id=flashcard_id, grade=grade,
+                                       reviewed_at=reviewed_at))  # Logged for retention statistics
+        _bump_flashcards_version(user_id)
+        db.session.commit()
+        return jsonify(_flashcard_to_dict(flashcard)), 200
+    except UserNotFound:
+        db.session.rollback()
+        return jsonify(message="User not found."), 404
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(message=f"Failed to review flashcard: {str(e)}"), 500
+
+
+MAX_REVIEW_BATCH = 1000
+SQL_IN_CHUNK = 500  # Keeps IN (...) lists well under SQLite's bound-parameter limit
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+@app.route('/flashcards/reviews', methods=['POST'])
+def submit_flashcard_reviews():
+    """
+    Applies a batch of graded reviews in one transaction (one commit, one fsync).
+    Body: {"user_id": int, "reviews": [{"card_id", "grade", "reviewed_at", "client_seq"}, ...]}.
+    Reviews whose client_seq was already recorded for this user are skipped, so retrying a batch is safe.
+    Returns the resulting schedule of every card named in the batch.
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify(message="Invalid data"), 400
+
+    user_id = data.get('user_id')
+    reviews = data.get('reviews')
+    if not user_id or not isinstance(reviews, list):
+        return jsonify(message="User ID and a list of reviews are required."), 400
+    if len(reviews) > MAX_REVIEW_BATCH:
+        return jsonify(message=f"At most {MAX_REVIEW_BATCH} reviews can be submitted at once."), 400
+
+    # Validate the whole batch up front so it is applied all-or-nothing
+    errors = []
+    parsed_reviews = []
+    seen_seqs = set()
+    for index, review in enumerate(reviews):
+        if not isinstance(review, dict):
+            errors.append({'index': index, 'message': "Review must be an object."})
+            continue
+        card_id = review.get('card_id')
+        grade = review.get('grade')
+        client_seq = review.get('client_seq')
+        reviewed_at = _parse_timestamp(review.get('reviewed_at'))
+        if not isinstance(card_id, int) or not isinstance(client_seq, int):
+            errors.append({'index': index, 'message': "card_id and client_seq must be integers."})
+        elif not sm2.is_valid_grade(grade):
+            errors.append({'index': index, 'message': "Grade must be an integer from 0 to 5."})
+        elif reviewed_at is None:
+            errors.append({'index': index, 'message': "reviewed_at must be an ISO 8601 timestamp."})
+        elif client_seq in seen_seqs:
+            errors.append({'index': index, 'message': "Duplicate client_seq in batch."})
+        else:
+            seen_seqs.add(client_seq)
+            parsed_reviews.append((client_seq, card_id, grade, reviewed_at))
+    if errors:
+        return jsonify(message="Invalid reviews in batch.", errors=errors), 400
+
+    # Drop reviews that an earlier (possibly retried) submission already applied
+    already_applied = set()
+    for seq_chunk in _chunks(sorted(seen_seqs), SQL_IN_CHUNK):
+        already_applied.update(row.client_seq for row in db.session.query(FlashcardReview.client_seq).filter(
+            FlashcardReview.user_id == user_id,
+            FlashcardReview.client_seq.in_(seq_chunk)
+        ))
+
+    # Load only the scheduling columns of the cards involved
+    card_ids = sorted({card_id for _, card_id, _, _ in parsed_reviews})
+    schedules = {}
+    for id_chunk in _chunks(card_ids, SQL_IN_CHUNK):
+        for row in db.session.query(Flashcard.id, Flashcard.due_date, Flashcard.interval,
+                                    Flashcard.repetitions, Flashcard.ease_factor).filter(
+                Flashcard.user_id == user_id, Flashcard.id.in_(id_chunk)):
+            schedules[row.id] = {'id': row.id, 'due_date': row.due_date, 'interval': row.interval,
+                                 'repetitions': row.repetitions, 'ease_factor': row.ease_factor}
+
+    not_found = [card_id for card_id in card_ids if card_id not in schedules]
+    if not_found:
+        return jsonify(message="Some flashcards were not found.", card_ids=not_found), 404
+
+    # Replay new reviews in client order; a card graded twice in one batch is updated twice in memory
+    new_reviews = sorted(review for review in parsed_reviews if review[0] not in already_applied)
+    log_rows = []
+    for client_seq, card_id, grade, reviewed_at in new_reviews:
+        schedule = schedules[card_id]
+        interval, repetitions, ease_factor = sm2.review(schedule['interval'], schedule['repetitions'],
+                                                        schedule['ease_factor'], grade)
+        schedule.update(interval=interval, repetitions=repetitions, ease_factor=ease_factor,
+                        due_date=sm2.next_due_date(reviewed_at, interval))
+        log_rows.append({'user_id': user_id, 'flashcard_id': card_id, 'client_seq': client_seq,
+                         'grade': grade, 'reviewed_at': reviewed_at})
+
+    if new_reviews:
+        touched_ids = sorted({card_id for _, card_id, _, _ in new_reviews})
+        try:
+            first_seq = _allocate_change_seqs(user_id, len(touched_ids))
+            for offset, card_id in enumerate(touched_ids):
+                schedules[card_id]['change_seq'] = first_seq + offset
+            # executemany-style bulk UPDATE by primary key plus bulk INSERT, committed together
+            db.session.execute(db.update(Flashcard), [schedules[card_id] for card_id in touched_ids])
+            db.session.execute(db.insert(FlashcardReview), log_rows)
+            _bump_flashcards_version(user_id)
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent retry recorded some of these client_seq values first
+            db.session.rollback()
+            return jsonify(message="Reviews were submitted concurrently; please retry."), 409
+        except UserNotFound:
+            db.session.rollback()
+            return jsonify(message="User not found."), 404
+        except Exception as e:
+            db.session.rollback()
+            return jsonify(message=f"Failed to apply reviews: {str(e)}"), 500
+
+    output = []
+    for card_id in card_ids:
+        schedule = dict(schedules[card_id])
+        schedule.pop('change_seq', None)
+        schedule['due_date'] = schedule['due_date'].isoformat()
+        output.append(schedule)
+    return jsonify(applied=len(new_reviews), skipped=len(parsed_reviews) - len(new_reviews),
+                   schedules=output), 200
+
+
+def _build_quiz_questions(questions_data):
+    """
+    Converts the client's questions_data list into QuizQuestion/QuizAnswer rows.
+    Questions use the same shape as the desktop quiz: {"question_text", "answers": [{"answer_text", "is_correct"}]}.
+    Any other question keys are kept in extra_data so they round-trip; 'tag' (or else 'category') also
+    fills the tag / tag_position columns used for sampling.
+    """
+    questions = []
+    tag_sizes = Counter()
+    for position, item in enumerate(questions_data):
+        if not isinstance(item, dict):
+            raise ValueError(f"Question {position + 1} must be an object.")
+        question_text = item.get('question_text')
+        answers = item.get('answers', [])
+        if not isinstance(question_text, str) or not question_text.strip():
+            raise ValueError(f"Question {position + 1} needs a 'question_text'.")
+        if not isinstance(answers, list) or not all(isinstance(answer, dict) for answer in answers):
+            raise ValueError(f"Question {position + 1} 'answers' must be a list of objects.")
+        extra = {key: value for key, value in item.items()
+                 if key not in ('question_id', 'question_text', 'answers')}
+        tag = item.get('tag', item.get('category'))
+        tag = str(tag) if tag is not None else ''
+        questions.append(QuizQuestion(
+            position=position,
+            question_text=question_text,
+            extra_data=json.dumps(extra) if extra else None,
+            tag=tag,
+            tag_position=tag_sizes[tag],
+            answers=[QuizAnswer(position=answer_position,
+                                answer_text=str(answer.get('answer_text', '')),
+                                is_correct=bool(answer.get('is_correct', False)))
+                     for answer_position, answer in enumerate(answers)]
+        ))
+        tag_sizes[tag] += 1
+    return questions
+
+
+@app.route('/stats', methods=['GET'])
+def get_learning_stats():
+    """
+    Returns a user's learning statistics: true retention (last 30 days and all time), the number of cards
+    due on each of the next 90 days with 30/90-day totals, and ease factor and interval histograms.
+    Query parameters: user_id (required). Cached per user until their flashcards or reviews change.
+    """
+    user_id = request.args.get('user_id', type=int)
+    if not user_id:
+        return jsonify(message="User ID is required."), 400
+
+    flashcards_version = db.session.query(User.flashcards_version).filter(User.id == user_id).scalar()
+    if flashcards_version is None:
+        return jsonify(message="User not found."), 404
+
+    stats = learning_stats.user_stats(db.session, user_id, flashcards_version)
+    return jsonify(user_id=user_id, **stats), 200
+
+
+@app.route('/stats/refresh', methods=['POST'])
+def refresh_learning_stats():
+    """
+    Recomputes a user's learning statistics in a background job and answers 202 with its id.
+    Query parameters: user_id (required). The job's result is the same object GET /stats returns.
+    """
+    user_id = request.args.get('user_id', type=int)
+    if not user_id:
+        return jsonify(message="User ID is required."), 400
+    if not db.session.get(User, user_id):
+        return jsonify(message="User not found."), 404
+    return _accepted(job_runner.submit('learning_stats', user_id), "Statistics queued.")
+
+
+@job_runner.handler('learning_stats')
+def run_learning_stats(job):
+    flashcards_version = db.session.query(User.flashcards_version).filter(User.id == job.user_id).scalar()
+    if flashcards_version is None:
+        raise jobs.JobFailed("User not found.")
+    return dict(user_id=job.user_id, **learning_stats.user_stats(db.session, job.user_id, flashcards_version))
+
+
+@app.route('/sync', methods=['GET'])
+def sync_changes():
+    """
+    Returns the user's flashcards, quizzes and deletions that changed after a cursor, oldest change first.
+    Query parameters: user_id (required), since (the 'cursor' of the previous response; 0 or omitted
+    for a full sync), limit (default 50, max 500 changes).
+    Keep calling with the returned cursor while has_more is true. Each source is read as a range scan
+    of its (user_id, change_seq) index, so the cost depends on the number of changes, not the account size.
+    """
+    user_id = request.args.get('user_id', type=int)
+    if not user_id:
+        return jsonify(message="User ID is required."), 400
+    since = request.args.get('since', 0, type=int)
+    limit = _parse_limit(request.args.get('limit'))
+    if limit is None or since < 0:
+        return jsonify(message="since and limit must be non-negative integers."), 400
+
+    latest = db.session.query(User.change_seq).filter(User.id == user_id).scalar()
+    if latest is None:
+        return jsonify(message="User not found."), 404
+    if since >= latest:
+        return jsonify(flashcards=[], quizzes=[], deleted=[], cursor=latest, has_more=False), 200
+
+    # Read up to 'limit' changes from each source, then keep the 'limit' lowest sequence numbers overall
+    flashcards = Flashcard.query.filter(Flashcard.user_id == user_id, Flashcard.change_seq > since).order_by(
+        Flashcard.change_seq).limit(limit).all()
+    quizzes = Quiz.query.filter(Quiz.user_id == user_id, Quiz.change_seq > since).order_by(
+        Quiz.change_seq).limit(limit).all()
+    deleted = SyncTombstone.query.filter(SyncTombstone.user_id == user_id,
+                                         SyncTombstone.change_seq > since).order_by(
+        SyncTombstone.change_seq).limit(limit).all()
+    seqs = sorted(row.change_seq for row in itertools.chain(flashcards, quizzes, deleted))[:limit]
+    cursor = seqs[-1] if seqs else latest
+    flashcards = [flashcard for flashcard in flashcards if flashcard.change_seq <= cursor]
+    quizzes = [quiz for quiz in quizzes if quiz.change_seq <= cursor]
+    deleted = [tombstone for tombstone in deleted if tombstone.change_seq <= cursor]
+
+    # Quizzes are spliced in as JSON text built by SQLite, like the other quiz endpoints
+    questions_json = _questions_json_by_quiz([quiz.id for quiz in quizzes])
+    envelope = json.dumps({
+        'flashcards': [dict(_flashcard_to_dict(flashcard), change_seq=flashcard.change_seq)
+                       for flashcard in flashcards],
+        'deleted': [{'kind': tombstone.kind, 'id': tombstone.record_id, 'change_seq': tombstone.change_seq}
+                    for tombstone in deleted],
+        'cursor': cursor,
+        'has_more': cursor < latest
+    })
+    quizzes_json = ','.join(
+        f'{_quiz_to_json(quiz, questions_json[quiz.id])[:-1]}, "change_seq": {quiz.change_seq}}}' for quiz in quizzes)
+    return Response(f'{envelope[:-1]}, "quizzes": [{quizzes_json}]}}', status=200, mimetype='application/json')
+
+
+@app.route('/search', methods=['GET'])
+def search_content():
+    """
+    Full-text search over a user's flashcards and quiz questions, best match first.
+    Query parameters: user_id and q (required), type (flashcard, quiz_question, or both comma-separated;
+    default both), limit (default 50, max 500), offset (from 'next_offset', at most 1000).
+    Every word of q must match; the last one also matches as a prefix. Snippets mark matches with [ and ].
+    """
+    user_id = request.args.get('user_id', type=int)
+    query_text = request.args.get('q', '').strip()
+    if not user_id or not query_text:
+        return jsonify(message="User ID and a search query are required."), 400
+    if search.match_expression(user_id, query_text, search.FLASHCARDS) is None:
+        return jsonify(message="The search query has no searchable words."), 400
+
+    kinds = [kind.strip() for kind in request.args.get('type', ','.join(search.TYPES)).split(',') if kind.strip()]
+    if not kinds or any(kind not in search.TYPES for kind in kinds):
+        return jsonify(message=f"type must be one of: {', '.join(search.TYPES)}."), 400
+
+    limit = _parse_limit(request.args.get('limit'))
+    offset = request.args.get('offset', 0, type=int)
+    if limit is None or not 0 <= offset <= search.MAX_OFFSET:
+        return jsonify(message=f"Limit must be an integer and offset between 0 and {search.MAX_OFFSET}."), 400
+
+    results, has_more = search.search(db.session, user_id, query_text, dict.fromkeys(kinds), limit, offset)
+    return jsonify(results=results, next_offset=offset + limit if has_more else None), 200
+
+
 @app.route('/quizzes', methods=['POST'])
 def create_quiz():
     data = request.get_json()
@@ -250,74 +1230,639 @@ def create_quiz():
     if not all([user_id, title, questions_data]):
         return jsonify(message="User ID, title, and questions data are required to create a quiz."), 400
 
+    if not isinstance(questions_data, list):
+        return jsonify(message="Questions data must be a JSON array of questions."), 400
     try:
-        # Ensure questions_data is a valid JSON string
-        json.dumps(questions_data)
-    except TypeError:
-        return jsonify(message="Questions data must be a valid JSON array/object."), 400
+        questions = _build_quiz_questions(questions_data)
+    except ValueError as e:
+        return jsonify(message=str(e)), 400
 
     new_quiz = Quiz(
         user_id=user_id,
         title=title,
         description=description,
-        questions_data=json.dumps(questions_data) # Store as JSON string
+        questions=questions,
+        question_count=len(questions),
+        tag_counts=json.dumps(Counter(question.tag for question in questions))
     )
     try:
+        new_quiz.change_seq = _allocate_change_seqs(user_id)
         db.session.add(new_quiz)
         db.session.commit()
         return jsonify(message="Quiz created successfully!", id=new_quiz.id), 201
+    except UserNotFound:
+        db.session.rollback()
+        return jsonify(message="User not found."), 404
     except Exception as e:
         db.session.rollback()
         return jsonify(message=f"Failed to create quiz: {str(e)}"), 500
 
 
+@app.route('/quizzes/<int:quiz_id>', methods=['DELETE'])
+def delete_quiz(quiz_id):
+    """
+    Deletes a quiz with its questions and answers, leaving a tombstone for /sync. Query parameters: user_id.
+    Recorded attempts are kept for the score history, detached from the quiz.
+    """
+    user_id = request.args.get('user_id', type=int)
+    if not user_id:
+        return jsonify(message="User ID is required."), 400
+
+    quiz = Quiz.query.filter_by(id=quiz_id, user_id=user_id).first()
+    if not quiz:
+        return jsonify(message="Quiz not found."), 404
+
+    try:
+        change_seq = _allocate_change_seqs(user_id)
+        db.session.execute(db.update(QuizAttempt).where(QuizAttempt.quiz_id == quiz_id).values(quiz_id=None))
+        db.session.delete(quiz)  # Cascades to quiz_questions / quiz_answers
+        db.session.add(SyncTombstone(user_id=user_id, kind='quiz', record_id=quiz_id, change_seq=change_seq))
+        db.session.commit()
+        return jsonify(message="Quiz deleted."), 200
+    except UserNotFound:
+        db.session.rollback()
+        return jsonify(message="User not found."), 404
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(message=f"Failed to delete quiz: {str(e)}"), 500
+
+
+# Builds each question's JSON text inside SQLite with one JOIN plus GROUP BY, so quiz responses are assembled
+# by splicing strings. The ordered subquery fixes the order in which json_group_array sees each question's answers.
+QUESTION_JSON_SQL = """
+    SELECT q.quiz_id AS quiz_id, q.position AS position, q.tag AS tag, q.tag_position AS tag_position,
+           json_patch(coalesce(q.extra_data, '{{}}'), json_object(
+               'question_id', q.id,
+               'question_text', q.question_text,
+               'answers', json(CASE WHEN count(a.id) = 0 THEN '[]' ELSE json_group_array(json_object(
+                   'answer_id', a.id,
+                   'answer_text', a.answer_text,
+                   'is_correct', json(CASE WHEN a.is_correct THEN 'true' ELSE 'false' END)
+               )) END)
+           )) AS question_json
+    FROM quiz_questions AS q
+    LEFT JOIN (SELECT * FROM quiz_answers ORDER BY question_id, position) AS a ON a.question_id = q.id
+    WHERE {where}
+    GROUP BY q.id
+    ORDER BY q.quiz_id, q.position
+"""
+
+
+def _questions_json_by_quiz(quiz_ids, connection=None):
+    """
+    Returns {quiz_id: JSON array text of its questions} for the given quizzes.
+    Reads through the request's session unless another connection (e.g. an export's snapshot) is given.
+    """
+    questions_by_quiz = {quiz_id: [] for quiz_id in quiz_ids}
+    statement = db.text(QUESTION_JSON_SQL.format(where="q.quiz_id IN :quiz_ids")).bindparams(
+        db.bindparam('quiz_ids', expanding=True))
+    executor = connection if connection is not None else db.session
+    for id_chunk in _chunks(list(quiz_ids), SQL_IN_CHUNK):
+        for row in executor.execute(statement, {'quiz_ids': id_chunk}):
+            questions_by_quiz[row.quiz_id].append(row.question_json)
+    return {quiz_id: '[' + ','.join(questions) + ']' for quiz_id, questions in questions_by_quiz.items()}
+
+
+def _quiz_to_json(quiz, questions_json):
+    """
+    Serializes a quiz to JSON text. The questions arrive as JSON text already built by SQLite
+    (see _questions_json_by_quiz) and are spliced into the envelope instead of being re-encoded.
+    """
+    envelope = json.dumps({
+        'id': quiz.id,
+        'user_id': quiz.user_id,
+        'title': quiz.title,
+        'description': quiz.description
+    })
+    return f'{envelope[:-1]}, "questions_data": {questions_json}}}'
+
+
 @app.route('/quizzes', methods=['GET'])
 def get_quizzes():
     quizzes = Quiz.query.all()
+    questions_json = _questions_json_by_quiz([quiz.id for quiz in quizzes])
+    body = '[' + ','.join(_quiz_to_json(quiz, questions_json[quiz.id]) for quiz in quizzes) + ']'
+    return Response(body, status=200, mimetype='application/json')
+
+
+@app.route('/quizzes/<int:quiz_id>', methods=['GET'])
+def get_quiz_by_id(quiz_id):
+    version = db.session.query(Quiz.version).filter(Quiz.id == quiz_id).scalar()
+    if version is None:
+        return jsonify(message="Quiz not found."), 404
+
+    etag = f"quiz-{quiz_id}-v{version}"
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    quiz = db.session.get(Quiz, quiz_id)
+    questions_json = _questions_json_by_quiz([quiz.id])[quiz.id]
+    return _with_etag(Response(_quiz_to_json(quiz, questions_json), status=200, mimetype='application/json'), etag)
+
+
+@app.route('/quizzes/summary', methods=['GET'])
+def get_quiz_summaries():
+    """
+    Lists a user's quizzes without their questions, ordered by id.
+    Query parameters: user_id (required), limit (default 50, max 500), after_id (last id of the previous page).
+    Only the summary columns are selected, so the questions tables are never touched.
+    """
+    user_id = request.args.get('user_id', type=int)
+    if not user_id:
+        return jsonify(message="User ID is required."), 400
+
+    limit = _parse_limit(request.args.get('limit'))
+    if limit is None:
+        return jsonify(message="Limit must be an integer."), 400
+
+    query = db.session.query(Quiz.id, Quiz.title, Quiz.description, Quiz.question_count,
+                             Quiz.updated_at).filter(Quiz.user_id == user_id)
+    after_id = request.args.get('after_id', type=int)
+    if after_id:
+        query = query.filter(Quiz.id > after_id)
+
+    rows = query.order_by(Quiz.id).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
     output = []
-    for quiz in quizzes:
+    for row in rows:
         output.append({
-            'id': quiz.id,
-            'user_id': quiz.user_id,
-            'title': quiz.title,
-            'description': quiz.description,
-            'questions_data': json.loads(quiz.questions_data) # Load from JSON string
+            'id': row.id,
+            'title': row.title,
+            'description': row.description,
+            'question_count': row.question_count,
+            'updated_at': row.updated_at.isoformat() if row.updated_at else None
         })
-    return jsonify(output), 200
+    return jsonify(quizzes=output, next_after_id=rows[-1].id if has_more else None), 200
 
 
-@app.route('/quizzes/<int:quiz_id>', methods=['GET'])
-def get_quiz_by_id(quiz_id):
-    quiz = Quiz.query.get(quiz_id)
-    if quiz:
-        return jsonify({
-            'id': quiz.id,
-            'user_id': quiz.user_id,
-            'title': quiz.title,
-            'description': quiz.description,
-            'questions_data': json.loads(quiz.questions_data)
-        }), 200
-    else:
+@app.route('/quizzes/<int:quiz_id>/questions', methods=['GET'])
+def get_quiz_questions(quiz_id):
+    """
+    Returns one page of a quiz's questions so a client can fetch them while the quiz is taken.
+    Query parameters: offset (default 0), limit (default 50, max 500).
+    The page is a range scan of the (quiz_id, position) index.
+    """
+    offset = request.args.get('offset', 0, type=int)
+    limit = _parse_limit(request.args.get('limit'))
+    if limit is None or offset < 0:
+        return jsonify(message="Offset and limit must be non-negative integers."), 400
+
+    quiz = db.session.query(Quiz.question_count, Quiz.version).filter(Quiz.id == quiz_id).first()
+    if not quiz:
         return jsonify(message="Quiz not found."), 404
 
+    etag = f"quiz-{quiz_id}-v{quiz.version}-questions-{offset}-{limit}"
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+
+    rows = db.session.execute(
+        db.text(QUESTION_JSON_SQL.format(where="q.quiz_id = :quiz_id AND q.position >= :offset") + " LIMIT :limit"),
+        {'quiz_id': quiz_id, 'offset': offset, 'limit': limit}
+    ).all()
+
+    envelope = json.dumps({'quiz_id': quiz_id, 'offset': offset, 'limit': limit, 'total': quiz.question_count})
+    body = f'{envelope[:-1]}, "questions": [' + ','.join(row.question_json for row in rows) + ']}'
+    return _with_etag(Response(body, status=200, mimetype='application/json'), etag)
+
+
+def _allocate_strata(n, sizes):
+    """Splits n across strata in proportion to their sizes (largest remainder), never above a stratum's size."""
+    total = sum(sizes.values())
+    quotas = {tag: n * size / total for tag, size in sizes.items()}
+    allocation = {tag: int(quota) for tag, quota in quotas.items()}
+    leftover = n - sum(allocation.values())
+    for tag in sorted(quotas, key=lambda t: (allocation[t] - quotas[t], t))[:leftover]:
+        allocation[tag] = min(allocation[tag] + 1, sizes[tag])
+    return allocation
+
+
+@app.route('/quizzes/<int:quiz_id>/sample', methods=['GET'])
+def sample_quiz_questions(quiz_id):
+    """
+    Returns n randomly chosen questions of a quiz, in random order.
+    Query parameters: n (required, max 500), seed (optional: the same seed gives the same sample while the quiz
+    is unchanged), stratify=1 (split n across tags in proportion to their sizes), tag (repeatable: sample only
+    from these tags; '' selects untagged questions).
+    Every question is addressed by (tag, tag_position) and the quiz stores its per-tag counts, so the sample is
+    drawn from integer ranges and fetched through the (quiz_id, tag, tag_position) index: the cost grows with
+    n, not with the size of the quiz.
+    """
+    n = request.args.get('n', type=int)
+    if not n or n < 1:
+        return jsonify(message="n must be a positive integer."), 400
+
+    quiz = db.session.query(Quiz.tag_counts, Quiz.version).filter(Quiz.id == quiz_id).first()
+    if not quiz:
+        return jsonify(message="Quiz not found."), 404
+
+    sizes = json.loads(quiz.tag_counts) if quiz.tag_counts else {}
+    wanted_tags = request.args.getlist('tag')
+    if wanted_tags:
+        sizes = {tag: sizes[tag] for tag in wanted_tags if tag in sizes}
+    tags = sorted(sizes)  # A fixed order, so a seed always maps to the same questions
+    total = sum(sizes.values())
+    n = min(n, total, MAX_PAGE_SIZE)
+
+    seed = request.args.get('seed')
+    # The quiz version is part of the seed: a changed quiz gets a fresh sample rather than a shifted one
+    rng = random.Random(f"{quiz_id}:{quiz.version}:{seed}") if seed is not None else random.Random()
+    stratified = request.args.get('stratify') in ('1', 'true')
+
+    if stratified:
+        allocation = _allocate_strata(n, sizes)
+        picks = [(tag, tag_position) for tag in tags
+                 for tag_position in rng.sample(range(sizes[tag]), allocation[tag])]
+        rng.shuffle(picks)
+    else:
+        # Uniform over all selected questions: draw global indexes, then map each onto its tag's range
+        ends = list(itertools.accumulate(sizes[tag] for tag in tags))
+        picks = []
+        for index in rng.sample(range(total), n):
+            stratum = bisect.bisect_right(ends, index)
+            picks.append((tags[stratum], index - (ends[stratum] - sizes[tags[stratum]])))
+
+    positions_by_tag = {}
+    for tag, tag_position in picks:
+        positions_by_tag.setdefault(tag, []).append(tag_position)
+    statement = db.text(QUESTION_JSON_SQL.format(
+        where="q.quiz_id = :quiz_id AND q.tag = :tag AND q.tag_position IN :positions")).bindparams(
+        db.bindparam('positions', expanding=True))
+    question_json = {}
+    for tag, positions in positions_by_tag.items():
+        for row in db.session.execute(statement, {'quiz_id': quiz_id, 'tag': tag, 'positions': positions}):
+            question_json[(row.tag, row.tag_position)] = row.question_json
+
+    envelope = json.dumps({'quiz_id': quiz_id, 'n': len(picks), 'available': total, 'seed': seed,
+                           'stratified': stratified})
+    body = f'{envelope[:-1]}, "questions": [' + ','.join(question_json[pick] for pick in picks) + ']}'
+    response = Response(body, status=200, mimetype='application/json')
+    if seed is None:
+        response.headers['Cache-Control'] = 'no-store'  # Every unseeded request is a new draw
+    return response
+
+
+MAX_ATTEMPT_ANSWERS = 1000
+
+
+def _attempt_to_dict(attempt):
+    return {
+        'id': attempt.id,
+        'user_id': attempt.user_id,
+        'client_attempt_id': attempt.client_attempt_id,
+        'quiz_id': attempt.quiz_id,
+        'category': attempt.category,
+        'question_count': attempt.question_count,
+        'correct_count': attempt.correct_count,
+        'started_at': attempt.started_at.isoformat() if attempt.started_at else None,
+        'finished_at': attempt.finished_at.isoformat()
+    }
+
+
+def _attempt_answer_to_dict(answer):
+    return {
+        'position': answer.position,
+        'question_id': answer.question_id,
+        'question_text': answer.question_text,
+        'answer_text': answer.answer_text,
+        'is_correct': answer.is_correct,
+        'answered_at': answer.answered_at.isoformat() if answer.answered_at else None
+    }
+
+
+@app.route('/attempts', methods=['POST'])
+def record_quiz_attempt():
+    """
+    Records a finished quiz attempt: its summary row and one row per answer, in one transaction.
+    Body: {"user_id", "client_attempt_id", "quiz_id" or "category", "started_at", "finished_at",
+           "answers": [{"position", "question_id", "question_text", "answer_text", "is_correct", "answered_at"}]}.
+    Resubmitting the same client_attempt_id returns the stored attempt instead of recording it twice.
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify(message="Invalid data"), 400
+
+    user_id = data.get('user_id')
+    client_attempt_id = data.get('client_attempt_id')
+    answers = data.get('answers')
+    if not user_id or not isinstance(client_attempt_id, str) or not client_attempt_id or not isinstance(answers, list):
+        return jsonify(message="User ID, client_attempt_id and a list of answers are required."), 400
+    if not answers or len(answers) > MAX_ATTEMPT_ANSWERS:
+        return jsonify(message=f"An attempt needs between 1 and {MAX_ATTEMPT_ANSWERS} answers."), 400
+
+    finished_at = _parse_timestamp(data.get('finished_at')) if data.get('finished_at') else _utcnow()
+    started_at = _parse_timestamp(data.get('started_at')) if data.get('started_at') else None
+    if finished_at is None or (data.get('started_at') and started_at is None):
+        return jsonify(message="started_at and finished_at must be ISO 8601 timestamps."), 400
+
+    # Validate every answer before writing anything, so the attempt is stored all-or-nothing
+    errors = []
+    answer_rows = []
+    for index, answer in enumerate(answers):
+        if not isinstance(answer, dict):
+            errors.append({'index': index, 'message': "Answer must be an object."})
+            continue
+        position = answer.get('position', index)
+        answered_at = _parse_timestamp(answer.get('answered_at')) if answer.get('answered_at') else None
+        if not isinstance(position, int) or position < 0:
+            errors.append({'index': index, 'message': "position must be a non-negative integer."})
+        elif not isinstance(answer.get('question_text'), str) or not isinstance(answer.get('is_correct'), bool):
+            errors.append({'index': index, 'message': "question_text and is_correct are required."})
+        elif answer.get('answered_at') and answered_at is None:
+            errors.append({'index': index, 'message': "answered_at must be an ISO 8601 timestamp."})
+        else:
+            question_id = answer.get('question_id')
+            answer_rows.append({
+                'position': position,
+                'question_id': question_id if isinstance(question_id, int) else None,
+                'question_text': answer['question_text'],
+                'answer_text': str(answer.get('answer_text', '')),
+                'is_correct': answer['is_correct'],
+                'answered_at': answered_at
+            })
+    if errors:
+        return jsonify(message="Invalid answers in attempt.", errors=errors), 400
+
+    existing = QuizAttempt.query.filter_by(user_id=user_id, client_attempt_id=client_attempt_id).first()
+    if existing:
+        return jsonify(message="Attempt already recorded.", attempt=_attempt_to_dict(existing)), 200
+
+    attempt = QuizAttempt(
+        user_id=user_id,
+        client_attempt_id=client_attempt_id,
+        quiz_id=data.get('quiz_id') if isinstance(data.get('quiz_id'), int) else None,
+        category=data.get('category'),
+        question_count=len({row['position'] for row in answer_rows}),
+        correct_count=sum(1 for row in answer_rows if row['is_correct']),
+        started_at=started_at,
+        finished_at=finished_at
+    )
+    try:
+        db.session.add(attempt)
+        db.session.flush()  # Assigns attempt.id for the answer rows
+        for row in answer_rows:
+            row['attempt_id'] = attempt.id
+        db.session.execute(db.insert(QuizAttemptAnswer), answer_rows)  # One executemany for all answers
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent retry of the same attempt won the race
+        db.session.rollback()
+        existing = QuizAttempt.query.filter_by(user_id=user_id, client_attempt_id=client_attempt_id).first()
+        if existing is None:
+            return jsonify(message="User or quiz not found."), 404
+        return jsonify(message="Attempt already recorded.", attempt=_attempt_to_dict(existing)), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Attempts: failed to record attempt", extra={'fields': {'user_id': user_id}})
+        return jsonify(message=f"Failed to record attempt: {str(e)}"), 500
+
+    logger.info("Attempts: attempt recorded", extra={'fields': {
+        'user_id': user_id, 'attempt_id': attempt.id, 'answers': len(answer_rows)}})
+    return jsonify(message="Attempt recorded.", attempt=_attempt_to_dict(attempt)), 201
+
+
+@app.route('/attempts', methods=['GET'])
+def get_quiz_attempts():
+    """
+    Lists recorded attempts, newest first, without their answers.
+    Query parameters: user_id, quiz_id, category (at least one; they combine), limit (default 50, max 500),
+    before_id (last id of the previous page). Every filter combination is served by an index.
+    """
+    user_id = request.args.get('user_id', type=int)
+    quiz_id = request.args.get('quiz_id', type=int)
+    category = request.args.get('category')
+    if not (user_id or quiz_id or category):
+        return jsonify(message="Filter by user_id, quiz_id or category."), 400
+
+    limit = _parse_limit(request.args.get('limit'))
+    if limit is None:
+        return jsonify(message="Limit must be an integer."), 400
+
+    query = QuizAttempt.query
+    if user_id:
+        query = query.filter(QuizAttempt.user_id == user_id)
+    if quiz_id:
+        query = query.filter(QuizAttempt.quiz_id == quiz_id)
+    if category:
+        query = query.filter(QuizAttempt.category == category)
+    before_id = request.args.get('before_id', type=int)
+    if before_id:
+        query = query.filter(QuizAttempt.id < before_id)
+
+    attempts = query.order_by(QuizAttempt.id.desc()).limit(limit + 1).all()
+    has_more = len(attempts) > limit
+    attempts = attempts[:limit]
+    return jsonify(attempts=[_attempt_to_dict(attempt) for attempt in attempts],
+                   next_before_id=attempts[-1].id if has_more else None), 200
+
+
+@app.route('/attempts/<int:attempt_id>/answers', methods=['GET'])
+def get_quiz_attempt_answers(attempt_id):
+    """Returns one attempt with all of its answers, in question order."""
+    attempt = db.session.get(QuizAttempt, attempt_id)
+    if not attempt:
+        return jsonify(message="Attempt not found."), 404
+
+    answers = QuizAttemptAnswer.query.filter_by(attempt_id=attempt_id).order_by(
+        QuizAttemptAnswer.position, QuizAttemptAnswer.id).all()
+    return jsonify(attempt=_attempt_to_dict(attempt), answers=[_attempt_answer_to_dict(answer) for answer in answers]), 200
+
+
+# --- Account Export ---
+EXPORT_BATCH_SIZE = 1000  # Rows fetched per round trip to SQLite; each batch is written out as one chunk
+EXPORT_SECTIONS = ('account', 'flashcard', 'review', 'quiz', 'attempt')  # In output order
+
+
+def _parse_resume_token(token):
+    """Parses '<type>:<id>' into (section index, id). No token means from the start; returns None if malformed."""
+    if not token:
+        return 0, 0
+    section, _, last_id = token.partition(':')
+    if section not in EXPORT_SECTIONS or not last_id.isdigit():
+        return None
+    return EXPORT_SECTIONS.index(section), int(last_id)
+
+
+def _export_line(kind, record):
+    return json.dumps({'type': kind, **record}) + '\n'
+
+
+def _export_chunks(engine, user_id, start_section, after_id):
+    """
+    Yields the NDJSON text of a user's account one batch of rows at a time, starting after row 'after_id'
+    of section 'start_section'.
+    Each section is a single query in id order through a (user_id) index, read EXPORT_BATCH_SIZE rows at a
+    time with yield_per, so memory stays flat whatever the account size. Nested rows (quiz questions,
+    attempt answers) are loaded per batch. All queries run in one read transaction, so the export is a
+    consistent snapshot; under WAL (the 'tuned' profile) that never blocks writers.
+    """
+    def rows(statement, model, section):
+        if section < start_section:
+            return
+        if section == start_section:
+            statement = statement.where(model.id > after_id)
+        result = connection.execute(statement.order_by(model.id).execution_options(yield_per=EXPORT_BATCH_SIZE))
+        yield from result.partitions()
+
+    counts = dict.fromkeys(EXPORT_SECTIONS[1:], 0)
+    connection = engine.connect()
+    try:
+        # pysqlite would run each SELECT in its own implicit read; BEGIN pins one snapshot for the whole export
+        connection.exec_driver_sql('BEGIN')
+        if start_section == 0:
+            user = connection.execute(db.select(User.id, User.username, User.full_name, User.phone_number,
+                                                User.country, User.created_at).where(User.id == user_id)).first()
+            if user is None:
+                return
+            yield _export_line('account', {
+                'id': user.id,
+                'username': user.username,
+                'full_name': user.full_name,
+                'phone_number': user.phone_number,
+                'country': user.country,
+                'created_at': user.created_at.isoformat() if user.created_at else None,
+                'exported_at': _utcnow().isoformat()
+            })
+
+        flashcards = db.select(Flashcard.id, Flashcard.user_id, Flashcard.question, Flashcard.answer,
+                               Flashcard.due_date, Flashcard.interval, Flashcard.repetitions,
+                               Flashcard.ease_factor).where(Flashcard.user_id == user_id)
+        for batch in rows(flashcards, Flashcard, 1):
+            counts['flashcard'] += len(batch)
+            yield ''.join(_export_line('flashcard', _flashcard_to_dict(row)) for row in batch)
+
+        reviews = db.select(FlashcardReview.id, FlashcardReview.flashcard_id, FlashcardReview.grade,
+                            FlashcardReview.reviewed_at, FlashcardReview.client_seq).where(
+            FlashcardReview.user_id == user_id)
+        for batch in rows(reviews, FlashcardReview, 2):
+            counts['review'] += len(batch)
+            yield ''.join(_export_line('review', {
+                'id': row.id,
+                'flashcard_id': row.flashcard_id,
+                'grade': row.grade,
+                'reviewed_at': row.reviewed_at.isoformat(),
+                'client_seq': row.client_seq
+            }) for row in batch)
+
+        quizzes = db.select(Quiz.id, Quiz.user_id, Quiz.title, Quiz.description).where(Quiz.user_id == user_id)
+        for batch in rows(quizzes, Quiz, 3):
+            counts['quiz'] += len(batch)
+            questions_json = _questions_json_by_quiz([row.id for row in batch], connection)
+            # Quizzes are spliced in as JSON text built by SQLite, like the other quiz endpoints
+            yield ''.join(f'{{"type": "quiz", {_quiz_to_json(row, questions_json[row.id])[1:]}\n' for row in batch)
+
+        attempts = db.select(QuizAttempt).where(QuizAttempt.user_id == user_id)
+        for batch in rows(attempts, QuizAttempt, 4):
+            counts['attempt'] += len(batch)
+            answers_by_attempt = {row.id: [] for row in batch}
+            for answer in connection.execute(db.select(QuizAttemptAnswer).where(
+                    QuizAttemptAnswer.attempt_id.in_(list(answers_by_attempt))).order_by(
+                    QuizAttemptAnswer.attempt_id, QuizAttemptAnswer.position, QuizAttemptAnswer.id)):
+                answers_by_attempt[answer.attempt_id].append(_attempt_answer_to_dict(answer))
+            yield ''.join(_export_line('attempt', dict(_attempt_to_dict(row), answers=answers_by_attempt[row.id]))
+                          for row in batch)
+
+        yield _export_line('end', {'counts': counts})
+    finally:
+        # Also runs when the client disconnects mid-download (the WSGI server closes the generator)
+        connection.rollback()
+        connection.close()
+
+
+@app.route('/export', methods=['GET'])
+@require_session
+def export_account():
+    """
+    Streams the logged-in user's whole account as NDJSON (application/x-ndjson): an 'account' line, their
+    flashcards, review log, quizzes with questions and quiz attempts with answers, each in id order, then an
+    'end' line with the row counts. Every line has a 'type' and an 'id'; a download without the 'end' line is
+    incomplete. Query parameter: resume ('<type>:<id>' of the last complete line received) continues an
+    interrupted download right after that line. Compressed with gzip / br / zstd when the client accepts it.
+    """
+    position = _parse_resume_token(request.args.get('resume'))
+    if position is None:
+        return jsonify(message="resume must be '<type>:<id>' of the last line received."), 400
+    user_id = g.auth['uid']
+    if db.session.get(User, user_id) is None:
+        return jsonify(message="User not found."), 404
+
+    response = Response(_export_chunks(db.engine, user_id, *position), mimetype='application/x-ndjson')
+    response.headers['Content-Disposition'] = f'attachment; filename="mindzap-export-{user_id}.ndjson"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+# --- Background Jobs ---
+def _accepted(job_id, message):
+    """The 202 response of an endpoint that queued a job; the client polls the Location."""
+    response = jsonify(message=message, job_id=job_id)
+    response.headers['Location'] = f"/jobs/{job_id}"
+    response.headers['Retry-After'] = '1'
+    return response, 202
+
+
+@app.route('/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Returns a job's status (queued, running, succeeded, failed), progress, attempts and, once it succeeded,
+    its result. Query parameters: user_id (required, the job's owner). Sends Retry-After until it finishes.
+    System jobs such as scheduled backups have no owner and are never served here; use 'flask backup list'.
+    """
+    user_id = request.args.get('user_id', type=int)
+    if not user_id:
+        return jsonify(message="User ID is required."), 400
+
+    job = db.session.get(Job, job_id)
+    if not job or job.user_id is None or job.user_id != user_id:
+        return jsonify(message="Job not found."), 404
+
+    envelope = json.dumps({
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': {'done': job.progress_done, 'total': job.progress_total, 'message': job.progress_message},
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    })
+    # The result is stored as JSON text; splice it in rather than decoding and re-encoding it
+    response = Response(f'{envelope[:-1]}, "result": {job.result or "null"}}}', status=200,
+                        mimetype='application/json')
+    if job.status not in jobs.FINISHED:
+        response.headers['Retry-After'] = '1'
+    return response
+
 
 @app.route('/update_credentials', methods=['POST'])
+@require_session
 def update_credentials():
+    """
+    Changes the logged-in user's email and/or password. The session token in use is revoked and a
+    replacement carrying the current username is returned as 'token'.
+    """
     data = request.get_json()
-    print(f"Backend Debug (Update Credentials): Received data: {data}")
+    logger.debug("Update Credentials: received data", extra={'fields': {'data': data}})
 
-    current_username = data.get('current_username')  # The current email of the logged-in user
+    current_username = g.auth['sub']  # The current email of the logged-in user, from the session token
     new_username = data.get('new_username')  # The new email (if changed)
     new_password = data.get('new_password')  # The new password (if changed)
+    if new_password is not None and not isinstance(new_password, str):
+        return jsonify(message="New password must be a string."), 400
 
-    if not current_username:
-        return jsonify(message="Current username (email) is required for update."), 400
-
-    user = User.query.filter_by(username=current_username).first()
+    user = db.session.get(User, g.auth['uid'])
     if not user:
-        print(f"Backend Debug (Update Credentials): User {current_username} not found.")
+        logger.info("Update Credentials: user not found", extra={'fields': {'username': current_username}})
         return jsonify(message="User not found."), 404
 
+    # Hashed before touching the row, so a saturated hashing pool (503) leaves nothing half-applied
+    new_password_hash = passwords.hasher().hash(new_password) if new_password else None
+
     try:
         # Update email if a new one is provided and it's different
         if new_username and new_username != current_username:
@@ -325,63 +1870,61 @@ def update_credentials():
             if User.query.filter_by(username=new_username).first():
                 return jsonify(message="New email already taken by another user."), 409
             user.username = new_username
-            print(f"Backend Debug (Update Credentials): Email updated from {current_username} to {new_username}")
+            logger.info("Update Credentials: email updated", extra={'fields': {'old_username': current_username, 'new_username': new_username}})
 
         # Update password if a new one is provided
-        if new_password:
-            user.password = new_password  # In a real app, hash this password!
-            print(f"Backend Debug (Update Credentials): Password updated for {user.username}")
+        if new_password_hash:
+            user.password = new_password_hash
+            logger.info("Update Credentials: password updated", extra={'fields': {'username': user.username}})
 
+        user.version += 1
         db.session.commit()
-        print(f"Backend Debug (Update Credentials): Credentials updated successfully for {user.username}")
-        return jsonify(message="Credentials updated successfully!"), 200
+        logger.info("Update Credentials: credentials updated", extra={'fields': {'username': user.username}})
+        session_tokens.signer().revoke(g.auth)
+        return jsonify(message="Credentials updated successfully!",
+                       token=session_tokens.signer().issue(user.id, user.username)), 200
     except Exception as e:
         db.session.rollback()
-        print(f"Backend Debug (Update Credentials): Error updating profile for {user.username}: {e}")
+        logger.exception("Update Credentials: update failed", extra={'fields': {'username': user.username}})
         return jsonify({"status": "error", "message": f"Failed to update profile: {str(e)}"}), 500
 
 
+# --- Schema Initialization ---
+def init_database():
+    """
+    Prepares the schema once per deploy rather than probing it on every boot.
+    A brand-new database file gets db.create_all() and is stamped at the latest migration;
+    an existing one is brought up to date by applying any pending Flask-Migrate migrations.
+    Production workers (wsgi.py) never call this; run 'flask db upgrade' as a deploy step instead.
+    """
+    db_path = db.engine.url.database
+    if not db_path or not os.path.exists(db_path):
+        logger.info("Database file not found. Creating a new one and tables...",
+                    extra={'fields': {'db_path': db_path}})
+        db.create_all()
+        flask_migrate.stamp()
+        logger.info("Tables created successfully in new database.")
+    else:
+        logger.info("Database file already exists. Applying pending migrations...",
+                    extra={'fields': {'db_path': db_path}})
+        flask_migrate.upgrade()
+        logger.info("Database schema is up to date.")
+
+
 # --- Main Run Block with Error Handling ---
+# Development server only. For production use the pre-forking server: gunicorn -c gunicorn.conf.py wsgi:app
 if __name__ == '__main__':
     try:
-        db_path = os.path.join(basedir, 'mindzap.db')
         with app.app_context():
-            # Create database tables if they don't exist
-            if not os.path.exists(db_path):
-                print(
-                    f"[{datetime.now(timezone.utc).strftime('%H:%M:%S')}] Database file '{db_path}' not found. Creating a new one and tables...")
-                try:
-                    db.create_all()
-                    print(
-                        f"[{datetime.now(timezone.utc).strftime('%H:%M:%S')}] Tables created successfully in new database.")
-                except Exception as e:
-                    print(
-                        f"[{datetime.now(timezone.utc).strftime('%H:%M:%S')}] Error creating tables in new database: {e}",
-                        file=sys.stderr)
-                    sys.exit(1)
-            else:
-                print(
-                    f"[{datetime.now(timezone.utc).strftime('%H:%M:%S')}] Database file '{db_path}' already exists. Attempting to ensure tables are present...")
-                try:
-                    db.create_all() # This will create tables if they are missing in an existing DB
-                    print(
-                        f"[{datetime.now(timezone.utc).strftime('%H:%M:%S')}] Tables checked/created successfully in existing database (or created if missing).")
-                except Exception as e:
-                    # This might catch "table already exists" errors, which are fine if tables are already there.
-                    print(
-                        f"[{datetime.now(timezone.utc).strftime('%H:%M:%S')}] Error ensuring tables in existing database. This might be because tables already exist, which is okay: {e}",
-                        file=sys.stderr)
-                    pass  # Allow the app to continue if tables already exist.
-
-        print(
-            f"[{datetime.now(timezone.utc).strftime('%H:%M:%S')}] Attempting to run Flask app...")
-        app.run(debug=True, port=5000)
-    except Exception as e:
-        print(f"[{datetime.now(timezone.utc).strftime('%H:%M:%S')}] !!! ERROR STARTING FLASK APP !!!",
-              file=sys.stderr)
-        print(f"[{datetime.now(timezone.utc).strftime('%H:%M:%S')}] Error details: {e}",
-              file=sys.stderr)
-        import traceback
-
-        traceback.print_exc(file=sys.stderr)
+            try:
+                init_database()
+            except Exception:
+                logger.exception("Error preparing database schema")
+                sys.exit(1)
+
+        logger.info("Attempting to run Flask app...")
+        # The interactive debugger is opt-in (FLASK_DEBUG=1); it must never be reachable in production
+        app.run(debug=os.environ.get('FLASK_DEBUG') == '1', port=5000)
+    except Exception:
+        logger.exception("!!! ERROR STARTING FLASK APP !!!")
         sys.exit(1)
@@ -0,0 +1,199 @@
+"""
+Online backups of the SQLite databases (mindzap.db and the desktop quiz bank, quiz.db) while the
+server keeps running.
+
+A snapshot is taken with SQLite's online backup API, BACKUP_PAGES_PER_STEP pages at a time with a
+short pause between steps, so live requests keep their share of the disk and the database locks.
+Under WAL the source connection holds one read transaction for the whole copy. The snapshot is then
+a consistent point in time, and writers are never blocked. Without WAL a write between two steps
+makes SQLite restart the copy, so a backup that keeps restarting gives up (BackupError) and the job
+retries later. With compact=True the copy is rewritten with VACUUM INTO, which drops free pages and
+defragments it; the live database is still only read by the stepped copy. Every snapshot must pass
+PRAGMA integrity_check before it replaces its '.partial' file, so a listed snapshot is always complete
+and verified.
+
+Snapshots are named '<database>-<UTC timestamp>.db' in BACKUP_DIR; the newest BACKUP_KEEP of each
+database are kept. Scheduled backups are 'backup' jobs, queued every BACKUP_INTERVAL seconds through
+the job runner (see jobs.py). Manual ones: 'flask backup run [--compact]', 'flask backup list',
+'flask backup verify <file>'.
+"""
+import glob
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+SNAPSHOT_SUFFIX = '.db'
+PARTIAL_SUFFIX = '.partial'
+MAX_RESTARTS = 5  # Copies restarted by concurrent writes (non-WAL sources only) before giving up
+
+logger = logging.getLogger('mindzap.backend.backups')
+
+
+class BackupError(Exception):
+    """A snapshot could not be completed or failed verification; nothing was kept."""
+
+
+def backup_database(source_path, target_path, pages_per_step, step_pause):
+    """Copies source_path to target_path with the online backup API. Returns the number of pages copied."""
+    source = sqlite3.connect(source_path, isolation_level=None, timeout=30)
+    target = sqlite3.connect(target_path, isolation_level=None)
+    progress = {'remaining': None, 'restarts': 0, 'pages': 0}
+
+    def step_done(status, remaining, total):
+        if progress['remaining'] is not None and remaining > progress['remaining']:
+            progress['restarts'] += 1
+            if progress['restarts'] > MAX_RESTARTS:
+                raise BackupError(f"{source_path} kept changing during the backup; try again later.")
+        progress['remaining'] = remaining
+        progress['pages'] = total
+        time.sleep(step_pause)  # Between steps no lock is held; let live queries run
+
+    try:
+        if source.execute("PRAGMA journal_mode").fetchone()[0] == 'wal':
+            # Pins one snapshot for every step; WAL readers never block the writer
+            source.execute("BEGIN")
+            source.execute("SELECT count(*) FROM sqlite_master").fetchone()
+        source.backup(target, pages=pages_per_step, progress=step_done)
+    finally:
+        if source.in_transaction:
+            source.rollback()
+        source.close()
+        target.close()
+    return progress['pages']
+
+
+def verify_snapshot(path):
+    """Runs PRAGMA integrity_check on a snapshot file. Returns a list of problems, empty if it is sound."""
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = [row[0] for row in connection.execute("PRAGMA integrity_check")]
+    except sqlite3.DatabaseError as e:
+        return [str(e)]
+    finally:
+        connection.close()
+    return [] if rows == ['ok'] else rows
+
+
+def create_snapshot(name, source_path, directory, compact=False, pages_per_step=256, step_pause=0.01):
+    """Backs up one database into directory, verifies it and returns a description of the snapshot."""
+    os.makedirs(directory, exist_ok=True)
+    started = time.perf_counter()
+    timestamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+    path = os.path.join(directory, f"{name}-{timestamp}{SNAPSHOT_SUFFIX}")
+    partial = path + PARTIAL_SUFFIX
+    compacted = path + '.compact' + PARTIAL_SUFFIX
+    try:
+        pages = backup_database(source_path, partial, pages_per_step, step_pause)
+        if compact:
+            connection = sqlite3.connect(partial, isolation_level=None)
+            try:
+                connection.execute("VACUUM INTO ?", (compacted,))
+            finally:
+                connection.close()
+            os.replace(compacted, partial)
+        problems = verify_snapshot(partial)
+        if problems:
+            raise BackupError(f"Snapshot of {name} failed its integrity check: {'; '.join(problems[:5])}")
+        os.replace(partial, path)
+    finally:
+        for leftover in (partial, compacted):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    snapshot = {
+        'database': name,
+        'path': path,
+        'bytes': os.path.getsize(path),
+        'source_pages': pages,
+        'compacted': compact,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+    logger.info("Snapshot created", extra={'fields': snapshot})
+    return snapshot
+
+
+def list_snapshots(name, directory):
+    """Paths of a database's snapshots, oldest first (the timestamp in the name sorts chronologically)."""
+    return sorted(glob.glob(os.path.join(glob.escape(directory), f"{glob.escape(name)}-*{SNAPSHOT_SUFFIX}")))
+
+
+def prune_snapshots(name, directory, keep):
+    """Deletes all but the newest 'keep' snapshots of a database. Returns the deleted paths."""
+    snapshots = list_snapshots(name, directory)
+    expired = snapshots[:-keep] if keep > 0 else []
+    for path in expired:
+        os.remove(path)
+    return expired
+
+
+def snapshot_all(app, compact, job=None):
+    """Snapshots every configured database that exists, then applies retention. Returns the snapshots."""
+    databases = {name: path for name, path in app.config['BACKUP_DATABASES'].items() if os.path.exists(path)}
+    snapshots = []
+    for done, (name, path) in enumerate(databases.items()):
+        snapshot = create_snapshot(name, path, app.config['BACKUP_DIR'], compact,
+                                   app.config['BACKUP_PAGES_PER_STEP'], app.config['BACKUP_STEP_PAUSE'])
+        snapshot['pruned'] = prune_snapshots(name, app.config['BACKUP_DIR'], app.config['BACKUP_KEEP'])
+        snapshots.append(snapshot)
+        if job is not None:
+            job.progress(done + 1, total=len(databases), message=f"Backed up {name}")
+    return snapshots
+
+
+backup_cli = AppGroup('backup', help="Online backups of the SQLite databases.")
+
+
+@backup_cli.command('run')
+@click.option('--compact', is_flag=True, help="Rewrite each snapshot with VACUUM INTO.")
+def run_backup_command(compact):
+    """Takes a verified snapshot of every database now."""
+    for snapshot in snapshot_all(current_app, compact):
+        click.echo(f"{snapshot['path']}  {snapshot['bytes']} bytes  {snapshot['seconds']}s")
+
+
+@backup_cli.command('list')
+def list_backups_command():
+    """Lists the kept snapshots."""
+    for name in current_app.config['BACKUP_DATABASES']:
+        for path in list_snapshots(name, current_app.config['BACKUP_DIR']):
+            click.echo(f"{path}  {os.path.getsize(path)} bytes")
+
+
+@backup_cli.command('verify')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def verify_backup_command(path):
+    """Runs an integrity check on a snapshot file."""
+    problems = verify_snapshot(path)
+    if problems:
+        raise click.ClickException('; '.join(problems[:20]))
+    click.echo("ok")
+
+
+def init_backups(app, runner):
+    """
+    Registers the 'backup' job, its schedule and the 'flask backup' commands.
+    Config: BACKUP_DATABASES ({name: path}), BACKUP_DIR, BACKUP_INTERVAL (seconds; 0 disables scheduled
+    backups), BACKUP_KEEP (snapshots per database), BACKUP_COMPACT, BACKUP_PAGES_PER_STEP, BACKUP_STEP_PAUSE
+    (seconds).
+    """
+    app.config.setdefault('BACKUP_DATABASES', {})
+    app.config.setdefault('BACKUP_DIR', os.path.join(app.root_path, 'backups'))
+    app.config.setdefault('BACKUP_INTERVAL', 24 * 3600)
+    app.config.setdefault('BACKUP_KEEP', 7)
+    app.config.setdefault('BACKUP_COMPACT', False)
+    app.config.setdefault('BACKUP_PAGES_PER_STEP', 256)  # 1 MiB per step at the default 4 KiB page size
+    app.config.setdefault('BACKUP_STEP_PAUSE', 0.01)
+
+    @runner.handler('backup', max_attempts=2)
+    def run_backup_job(job):
+        return {'snapshots': snapshot_all(app, job.payload.get('compact', app.config['BACKUP_COMPACT']), job)}
+
+    if app.config['BACKUP_INTERVAL']:
+        runner.schedule('backup', app.config['BACKUP_INTERVAL'])
+    app.cli.add_command(backup_cli)
@@ -0,0 +1,149 @@
+"""
+Multiplexed requests: POST /batch runs an ordered list of sub-requests inside the current request
+and returns all of their results in one response.
+
+Body: {"requests": [{"method": "GET", "path": "/profile/alice", "body": {...}, "headers": {...}}, ...],
+       "transaction": false}.
+Each sub-request goes through normal routing, view functions and error handlers, and inherits the
+batch's Authorization header unless it sets its own. Request hooks (metrics, profiling) see only the
+batch itself: they skip sub-requests (see is_subrequest), and response compression applies to the
+combined response.
+
+With "transaction": true, every sub-request runs in one SQLite transaction and the ORM session is
+bound to it in savepoint mode, so a view's own commit() only releases its savepoint. The batch stops at
+the first sub-request that answers with an error status; everything is then rolled back and the rest
+are reported as skipped. Otherwise each sub-request commits on its own, as it would standalone.
+"""
+import json
+from contextlib import contextmanager
+
+from flask import jsonify, request
+from sqlalchemy.orm import Session
+from werkzeug.test import EnvironBuilder
+
+SUBREQUEST_ENVIRON_KEY = 'mindzap.subrequest'
+METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+FORWARDED_RESPONSE_HEADERS = ('ETag', 'Cache-Control', 'Retry-After')
+DEFAULT_MAX_REQUESTS = 20
+
+
+def is_subrequest():
+    """True while a /batch sub-request is being handled; request hooks use it to skip them."""
+    return request.environ.get(SUBREQUEST_ENVIRON_KEY, False)
+
+
+def _validate(specs, max_requests, endpoint):
+    if not isinstance(specs, list) or not specs:
+        return "requests must be a non-empty list."
+    if len(specs) > max_requests:
+        return f"A batch holds at most {max_requests} requests."
+    for index, spec in enumerate(specs):
+        if not isinstance(spec, dict):
+            return f"Request {index} must be an object."
+        path = spec.get('path')
+        if not isinstance(path, str) or not path.startswith('/'):
+            return f"Request {index} needs a 'path' starting with '/'."
+        if path.split('?', 1)[0] == endpoint:
+            return f"Request {index}: batches cannot be nested."
+        if str(spec.get('method', 'GET')).upper() not in METHODS:
+            return f"Request {index}: method must be one of {', '.join(METHODS)}."
+        if not isinstance(spec.get('headers', {}), dict):
+            return f"Request {index}: 'headers' must be an object."
+    return None
+
+
+def _run_subrequest(app, db, spec):
+    """Dispatches one sub-request and returns (status, forwarded headers, body as JSON text)."""
+    headers = {'Authorization': request.headers.get('Authorization', '')}
+    headers.update({str(name): str(value) for name, value in spec.get('headers', {}).items()})
+    builder = EnvironBuilder(path=spec['path'], method=str(spec.get('method', 'GET')).upper(), headers=headers,
+                             json=spec['body'] if 'body' in spec else None,
+                             environ_overrides={SUBREQUEST_ENVIRON_KEY: True})
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+
+    # Reuses the batch's app context, so the sub-request shares its database session
+    with app.request_context(environ):
+        try:
+            response = app.full_dispatch_request()
+        except Exception as e:  # What wsgi_app would turn into a 500 for a standalone request
+            app.log_exception(e)
+            # A standalone request would get a fresh session; later sub-requests share this one, so undo
+            # whatever the failed view left half-flushed (in a transactional batch, only its savepoint)
+            db.session.rollback()
+            response = app.make_response((jsonify(message="Internal server error."), 500))
+        body = response.get_data(as_text=True)
+        if not body:
+            body = 'null'
+        elif not response.is_json:
+            body = json.dumps(body)
+        forwarded = {name: response.headers[name] for name in FORWARDED_RESPONSE_HEADERS if name in response.headers}
+        return response.status_code, forwarded, body
+
+
+@contextmanager
+def _shared_transaction(db):
+    """
+    Binds the current scoped session to one connection-level transaction for the duration of the block.
+    Yields the connection; the caller commits or rolls it back.
+    """
+    connection = db.engine.connect()
+    # pysqlite only opens its transaction at the first write, which would make the first SAVEPOINT the
+    # outermost one (and its RELEASE a commit); an explicit BEGIN puts every savepoint inside it.
+    # IMMEDIATE takes the write lock up front instead of failing to upgrade a read lock mid-batch.
+    connection.exec_driver_sql('BEGIN IMMEDIATE')
+    registry = db.session.registry
+    previous = registry() if registry.has() else None
+    registry.set(Session(bind=connection, join_transaction_mode='create_savepoint', query_cls=db.Query))
+    try:
+        yield connection
+    finally:
+        registry().close()
+        if previous is not None:
+            registry.set(previous)
+        else:
+            registry.clear()
+        connection.close()
+
+
+def init_batch(app, db, endpoint='/batch'):
+    """Registers the batch endpoint. Config: BATCH_MAX_REQUESTS."""
+    app.config.setdefault('BATCH_MAX_REQUESTS', DEFAULT_MAX_REQUESTS)
+
+    def run_batch():
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify(message="Invalid data"), 400
+        specs = data.get('requests')
+        error = _validate(specs, app.config['BATCH_MAX_REQUESTS'], endpoint)
+        if error:
+            return jsonify(message=error), 400
+
+        results = []
+        if data.get('transaction'):
+            with _shared_transaction(db) as connection:
+                for spec in specs:
+                    results.append(_run_subrequest(app, db, spec))
+                    if results[-1][0] >= 400:
+                        break
+                committed = results[-1][0] < 400
+                if committed:
+                    connection.commit()
+                else:
+                    connection.rollback()
+        else:
+            committed = None
+            for spec in specs:
+                results.append(_run_subrequest(app, db, spec))
+
+        # Sub-responses are JSON text already; splice them in rather than decoding and re-encoding
+        items = [f'{{"status": {status}, "headers": {json.dumps(headers)}, "body": {body}}}'
+                 for status, headers, body in results]
+        items += ['{"status": null, "skipped": true}'] * (len(specs) - len(results))
+        envelope = json.dumps({'committed': committed})
+        return app.response_class(f'{envelope[:-1]}, "responses": [{",".join(items)}]}}',
+                                  status=200, mimetype='application/json')
+
+    app.add_url_rule(endpoint, 'batch', run_batch, methods=['POST'])
@@ -0,0 +1,99 @@
+"""
+Benchmark: POST /login throughput with scrypt verification in the hashing process pool.
+
+Seeds a temporary database with hashed users, then for pool sizes 1, 2, 4, ... up to the CPU count
+drives /login from twice as many client threads (Flask test client, no network) for a fixed duration.
+Reports logins/s, logins/s per pool process (i.e. per core) and the median login latency.
+
+Usage (from the project directory):
+    python benchmarks/bench_login.py [--seconds 5] [--target-ms 100] [--users 50]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+PASSWORD = "correct horse battery staple"
+
+
+def pool_sizes():
+    sizes, size = [], 1
+    while size < (os.cpu_count() or 1):
+        sizes.append(size)
+        size *= 2
+    return sizes + [os.cpu_count() or 1]
+
+
+def run(app_module, hasher, users, seconds):
+    app_module.app.extensions['passwords'] = hasher
+    latencies = []
+    latencies_lock = threading.Lock()
+    stop = threading.Event()
+
+    def client(worker_id):
+        client = app_module.app.test_client()
+        mine = []
+        n = worker_id
+        while not stop.is_set():
+            start = time.perf_counter()
+            response = client.post('/login', json={'username': f"user{n % users}@example.com", 'password': PASSWORD})
+            assert response.status_code == 200, response.get_data(as_text=True)
+            mine.append(time.perf_counter() - start)
+            n += 1
+        with latencies_lock:
+            latencies.extend(mine)
+
+    hasher.hash(PASSWORD)  # Starts the pool processes outside the measurement
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(2 * hasher.workers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return len(latencies) / seconds, statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--target-ms', type=int, default=100, help="scrypt calibration target per hash.")
+    parser.add_argument('--users', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Configured before the app is imported; pool processes never import it (see passwords.py)
+        os.environ['MINDZAP_DATABASE_URI'] = 'sqlite:///' + os.path.join(directory, 'bench.db')
+        os.environ['MINDZAP_PASSWORD_HASH_TARGET_MS'] = str(args.target_ms)
+        os.environ.setdefault('MINDZAP_LOG_LEVEL', 'WARNING')
+        import app as app_module
+        import passwords
+
+        n = app_module.app.extensions['passwords'].n
+        with app_module.app.app_context():
+            app_module.db.create_all()
+            stored = app_module.app.extensions['passwords'].hash(PASSWORD)
+            app_module.db.session.execute(app_module.db.insert(app_module.User), [
+                {'username': f"user{i}@example.com", 'password': stored, 'full_name': f"User {i}"}
+                for i in range(args.users)
+            ])
+            app_module.db.session.commit()
+
+        print(f"scrypt n={n} r={passwords.DEFAULT_R} p={passwords.DEFAULT_P}, {args.seconds:g}s per pool size")
+        print(f"{'processes':>9} {'logins/s':>9} {'per core':>9} {'median ms':>10}")
+        for size in pool_sizes():
+            hasher = passwords.PasswordHasher(n, workers=size, queue_timeout=60)
+            rate, median = run(app_module, hasher, args.users, args.seconds)
+            print(f"{size:>9} {rate:>9.1f} {rate / size:>9.1f} {median * 1000:>10.1f}")
+            hasher._executor().shutdown()
+        with app_module.app.app_context():
+            app_module.db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
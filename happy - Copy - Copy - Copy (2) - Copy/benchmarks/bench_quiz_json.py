@@ -0,0 +1,76 @@
+"""
+Benchmark: serving stored quiz JSON by splicing vs. decoding and re-encoding it.
+
+Compares decoding the questions JSON and re-encoding it with jsonify against the current
+_quiz_to_json splice (questions JSON text as built by SQLite) for quizzes of increasing size.
+Runs entirely in memory, the database is not touched.
+
+Usage (from the project directory):
+    python benchmarks/bench_quiz_json.py [--repeat 200]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flask import jsonify  # noqa: E402
+from app import app, Quiz, _quiz_to_json  # noqa: E402
+
+QUIZ_SIZES = (50, 500, 2000)
+
+
+def make_quiz(num_questions):
+    questions = [{
+        'question_text': f"Question {i}: which of the following best describes item {i}?",
+        'answers': [{'answer_text': f"Option {j} for question {i}", 'is_correct': j == 0} for j in range(4)],
+        'category': 'COMP202 - Data Structures & Algorithms',
+    } for i in range(num_questions)]
+    quiz = Quiz(id=1, user_id=1, title=f"Quiz with {num_questions} questions", description="Benchmark quiz")
+    return quiz, json.dumps(questions)
+
+
+def decode_reencode(quiz, questions_json):
+    """The response path used before the questions JSON was spliced in."""
+    return jsonify({
+        'id': quiz.id,
+        'user_id': quiz.user_id,
+        'title': quiz.title,
+        'description': quiz.description,
+        'questions_data': json.loads(questions_json)
+    }).get_data()
+
+
+def splice(quiz, questions_json):
+    return app.response_class(_quiz_to_json(quiz, questions_json), mimetype='application/json').get_data()
+
+
+def time_per_call(func, quiz, questions_json, repeat):
+    func(quiz, questions_json)  # Warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(quiz, questions_json)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=200, help="Responses rendered per measurement.")
+    args = parser.parse_args()
+
+    print(f"{'questions':>10} {'body KiB':>9} {'decode+encode req/s':>20} {'splice req/s':>13} {'speedup':>8}")
+    with app.test_request_context():
+        for size in QUIZ_SIZES:
+            quiz, questions_json = make_quiz(size)
+            # Both paths must produce the same document
+            assert json.loads(decode_reencode(quiz, questions_json)) == json.loads(splice(quiz, questions_json))
+            old = time_per_call(decode_reencode, quiz, questions_json, args.repeat)
+            new = time_per_call(splice, quiz, questions_json, args.repeat)
+            body_kib = len(splice(quiz, questions_json)) / 1024
+            print(f"{size:>10} {body_kib:>9.1f} {1 / old:>20.0f} {1 / new:>13.0f} {old / new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
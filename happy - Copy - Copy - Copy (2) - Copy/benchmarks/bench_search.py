@@ -0,0 +1,103 @@
+"""
+Benchmark: /search latency over a large flashcard corpus (SQLite FTS5).
+
+Seeds a temporary database with --cards flashcards spread over --users users (inserted through the
+sync triggers, like real writes), then times search.search() for single words, prefixes and
+two-word queries from one user's point of view. Reports the median and p95 per query shape.
+
+Usage (from the project directory):
+    python benchmarks/bench_search.py [--cards 1000000] [--users 100] [--repeat 50]
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+SYLLABLES = ("ba", "ce", "di", "fo", "gu", "ha", "ki", "lo", "me", "ni", "po", "ra", "si", "tu", "ve", "zo")
+VOCABULARY_SIZE = 50000
+# (label, rank of the word in the Zipf-distributed vocabulary, query shape)
+QUERIES = (
+    ('common word', 10, '{w}'),
+    ('mid word', 1000, '{w}'),
+    ('rare word', 20000, '{w}'),
+    ('2-char prefix', 10, '{p2}'),
+    ('4-char prefix', 1000, '{p4}'),
+    ('two words', 100, '{w} {w2}'),
+)
+INSERT_BATCH = 10000
+
+
+def make_vocabulary(rng):
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5))))
+    words = sorted(words)
+    rng.shuffle(words)
+    # Word frequencies follow Zipf's law, like natural-language text
+    cumulative_weights = list(itertools.accumulate(1 / rank for rank in range(1, VOCABULARY_SIZE + 1)))
+    return words, cumulative_weights
+
+
+def sentence(rng, vocabulary, words):
+    return ' '.join(rng.choices(vocabulary[0], cum_weights=vocabulary[1], k=words))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cards', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['MINDZAP_DATABASE_URI'] = 'sqlite:///' + os.path.join(directory, 'bench.db')
+        os.environ.setdefault('MINDZAP_LOG_LEVEL', 'WARNING')
+        os.environ.setdefault('MINDZAP_PASSWORD_SCRYPT_N', str(2 ** 14))  # Skips calibration
+        import app as app_module
+        import search
+
+        rng = random.Random(42)
+        vocabulary = make_vocabulary(rng)
+        with app_module.app.app_context():
+            db = app_module.db
+            db.create_all()
+            db.session.execute(db.insert(app_module.User), [
+                {'username': f"user{i}@example.com", 'password': 'x', 'full_name': f"User {i}"}
+                for i in range(args.users)
+            ])
+            start = time.perf_counter()
+            for offset in range(0, args.cards, INSERT_BATCH):
+                db.session.execute(db.insert(app_module.Flashcard), [
+                    {'user_id': rng.randrange(args.users) + 1, 'question': sentence(rng, vocabulary, 8),
+                     'answer': sentence(rng, vocabulary, 12)}
+                    for _ in range(min(INSERT_BATCH, args.cards - offset))
+                ])
+                db.session.commit()
+            db.session.execute(db.text("INSERT INTO flashcards_fts(flashcards_fts) VALUES ('optimize')"))
+            db.session.commit()
+            print(f"Seeded {args.cards} cards for {args.users} users in {time.perf_counter() - start:.1f}s")
+
+            print(f"{'query':>14} {'text':>22} {'matches':>8} {'median ms':>10} {'p95 ms':>8}")
+            for label, rank, shape in QUERIES:
+                word, second_word = vocabulary[0][rank - 1], vocabulary[0][rank]
+                query_text = shape.format(w=word, w2=second_word, p2=word[:2], p4=word[:4])
+                timings = []
+                for _ in range(args.repeat):
+                    begin = time.perf_counter()
+                    results, _ = search.search(db.session, 1, query_text, [search.FLASHCARDS], 50, 0)
+                    timings.append(time.perf_counter() - begin)
+                matches = db.session.execute(db.text("SELECT count(*) FROM flashcards_fts WHERE flashcards_fts MATCH :q"),
+                                             {'q': search.match_expression(1, query_text, search.FLASHCARDS)}).scalar()
+                p95 = sorted(timings)[int(len(timings) * 0.95) - 1]
+                print(f"{label:>14} {query_text:>22} {matches:>8} {statistics.median(timings) * 1000:>10.2f} {p95 * 1000:>8.2f}")
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
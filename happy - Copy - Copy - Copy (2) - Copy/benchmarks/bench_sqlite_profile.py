@@ -0,0 +1,118 @@
+"""
+Benchmark: concurrent read/write throughput of each SQLite engine profile.
+
+For every profile in app.SQLITE_PROFILES, a fresh database in a temporary directory is hammered by
+reader threads (keyset-paginated flashcard pages, like GET /flashcards) and writer threads
+(single-row inserts, one commit each, like POST /flashcards) for a fixed duration.
+Reports reads/s, writes/s and how many operations failed with "database is locked".
+
+Usage (from the project directory):
+    python benchmarks/bench_sqlite_profile.py [--readers 4] [--writers 2] [--seconds 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sqlalchemy import create_engine, insert, select  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from app import db, Flashcard, User, SQLITE_PROFILES, apply_sqlite_profile  # noqa: E402
+
+SEED_USERS = 20
+SEED_CARDS_PER_USER = 500
+PAGE_SIZE = 50
+
+
+def seed(engine):
+    db.metadata.create_all(engine)
+    base = datetime(2026, 1, 1)
+    with engine.begin() as connection:
+        connection.execute(insert(User), [
+            {'id': i, 'username': f"user{i}@example.com", 'password': 'x', 'full_name': f"User {i}"}
+            for i in range(1, SEED_USERS + 1)
+        ])
+        connection.execute(insert(Flashcard), [
+            {'user_id': user_id, 'question': f"Question {n}", 'answer': f"Answer {n}",
+             'due_date': base + timedelta(minutes=n)}
+            for user_id in range(1, SEED_USERS + 1) for n in range(SEED_CARDS_PER_USER)
+        ])
+
+
+def run_profile(profile_name, readers, writers, seconds):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine('sqlite:///' + os.path.join(directory, 'bench.db'),
+                               pool_size=readers + writers, max_overflow=0)
+        apply_sqlite_profile(engine, profile_name)
+        seed(engine)
+
+        counts = {'reads': 0, 'writes': 0, 'locked': 0}
+        counts_lock = threading.Lock()
+        stop = threading.Event()
+
+        def reader(worker_id):
+            done = locked = 0
+            user_id = worker_id % SEED_USERS + 1
+            page = (select(Flashcard.id, Flashcard.question, Flashcard.due_date)
+                    .where(Flashcard.user_id == user_id)
+                    .order_by(Flashcard.due_date, Flashcard.id).limit(PAGE_SIZE))
+            while not stop.is_set():
+                try:
+                    with engine.connect() as connection:
+                        connection.execute(page).all()
+                    done += 1
+                except OperationalError:
+                    locked += 1
+            with counts_lock:
+                counts['reads'] += done
+                counts['locked'] += locked
+
+        def writer(worker_id):
+            done = locked = 0
+            user_id = worker_id % SEED_USERS + 1
+            while not stop.is_set():
+                try:
+                    with engine.begin() as connection:
+                        connection.execute(insert(Flashcard).values(
+                            user_id=user_id, question="Benchmark question", answer="Benchmark answer",
+                            due_date=datetime(2026, 6, 1)))
+                    done += 1
+                except OperationalError:
+                    locked += 1
+            with counts_lock:
+                counts['writes'] += done
+                counts['locked'] += locked
+
+        threads = ([threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+                   + [threading.Thread(target=writer, args=(i,)) for i in range(writers)])
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+        return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s per profile")
+    print(f"{'profile':>10} {'reads/s':>10} {'writes/s':>10} {'locked errors':>14}")
+    for profile_name in SQLITE_PROFILES:
+        counts = run_profile(profile_name, args.readers, args.writers, args.seconds)
+        print(f"{profile_name:>10} {counts['reads'] / args.seconds:>10.0f} "
+              f"{counts['writes'] / args.seconds:>10.0f} {counts['locked']:>14}")
+
+
+if __name__ == '__main__':
+    main()
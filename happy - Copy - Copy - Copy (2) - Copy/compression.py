@@ -0,0 +1,136 @@
+"""
+Response compression negotiation for the Flask backend.
+gzip is always available; brotli (br) and zstd are used when the 'brotli' / 'zstandard'
+packages are installed and the client accepts them. Streamed responses are compressed chunk by chunk.
+"""
+import zlib
+
+from flask import request
+
+from batch import is_subrequest
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_MIN_SIZE = 1024  # Bytes; smaller bodies are not worth the CPU or the header overhead
+DEFAULT_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/csv', 'text/plain')
+
+
+class _GzipStream:
+    def __init__(self, level):
+        # wbits=31 selects the gzip container
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, level):
+        # Brotli's quality scale is 0-11; map gzip-style levels onto it, capped to stay fast
+        self._compressor = brotli.Compressor(quality=min(level, 5))
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+def available_encodings():
+    """Content codings this server can produce, in order of preference."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append('zstd')
+    if brotli is not None:
+        encodings.append('br')
+    encodings.append('gzip')
+    return encodings
+
+
+STREAMS = {
+    'gzip': _GzipStream,
+    'br': _BrotliStream,
+    'zstd': _ZstdStream,
+}
+
+
+def _compress_iter(chunks, stream):
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        compressed = stream.compress(chunk)
+        if compressed:
+            yield compressed
+    yield stream.finish()
+
+
+def init_compression(app):
+    """
+    Registers an after_request hook that compresses eligible responses.
+    Config: COMPRESS_MIN_SIZE (bytes), COMPRESS_LEVEL (1-9), COMPRESS_MIMETYPES.
+    """
+    app.config.setdefault('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE)
+    app.config.setdefault('COMPRESS_LEVEL', 6)
+    app.config.setdefault('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES)
+    encodings = available_encodings()
+
+    @app.after_request
+    def compress_response(response):
+        # /batch inlines sub-responses as JSON text; only the combined response is compressed
+        if (is_subrequest() or response.status_code < 200 or response.status_code in (204, 304)
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in app.config['COMPRESS_MIMETYPES']):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(encodings)
+        if encoding is None:
+            return response
+
+        stream = STREAMS[encoding](app.config['COMPRESS_LEVEL'])
+        if response.is_streamed:
+            response.response = _compress_iter(response.response, stream)
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < app.config['COMPRESS_MIN_SIZE']:
+                return response
+            response.set_data(stream.compress(body) + stream.finish())
+
+        response.headers['Content-Encoding'] = encoding
+        # Each encoding is a different representation, so it needs its own strong validator
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak=weak)
+        return response
+
+
+def strip_encoding_suffix(etag):
+    """Maps an ETag produced for a compressed representation back to the uncompressed one."""
+    for encoding in STREAMS:
+        if etag.endswith(f"-{encoding}"):
+            return etag[:-len(encoding) - 1]
+    return etag
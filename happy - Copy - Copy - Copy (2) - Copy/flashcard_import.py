@@ -0,0 +1,155 @@
+"""
+Streaming parsers for bulk flashcard import.
+Each parser reads a binary stream incrementally and yields (row_number, record, error) tuples,
+where exactly one of record/error is set, so a bad row never stops the rows after it.
+Only a fatal syntax error (e.g. a broken JSON array) ends the stream early.
+"""
+import csv
+import io
+import json
+
+READ_CHUNK_SIZE = 64 * 1024
+
+FORMATS = ('csv', 'jsonl', 'json')
+CONTENT_TYPES = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'jsonl',
+    'application/jsonl': 'jsonl',
+    'application/json': 'json',
+}
+
+
+class ImportFormatError(ValueError):
+    """Raised when the stream cannot be parsed any further."""
+
+
+def detect_format(requested_format, content_type):
+    """Picks the import format from an explicit ?format= value or the request Content-Type."""
+    if requested_format:
+        return requested_format.lower() if requested_format.lower() in FORMATS else None
+    mimetype = (content_type or '').split(';')[0].strip().lower()
+    return CONTENT_TYPES.get(mimetype)
+
+
+def _text_stream(binary_stream):
+    if not isinstance(binary_stream, io.BufferedIOBase):
+        binary_stream = io.BufferedReader(binary_stream)
+    # newline='' lets the csv module handle line endings inside quoted fields
+    return io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+
+
+def _to_record(row):
+    """Validates one parsed row. Returns (record, error)."""
+    if not isinstance(row, dict):
+        return None, "Row must be an object with 'question' and 'answer'."
+    question = row.get('question')
+    answer = row.get('answer')
+    if not isinstance(question, str) or not isinstance(answer, str):
+        return None, "'question' and 'answer' must be strings."
+    question = question.strip()
+    answer = answer.strip()
+    if not question or not answer:
+        return None, "'question' and 'answer' are required."
+    return {'question': question, 'answer': answer}, None
+
+
+def iter_csv(binary_stream):
+    """CSV with a header row naming (at least) 'question' and 'answer' columns."""
+    reader = csv.DictReader(_text_stream(binary_stream))
+    fieldnames = [name.strip().lower() for name in (reader.fieldnames or [])]
+    if 'question' not in fieldnames or 'answer' not in fieldnames:
+        raise ImportFormatError("CSV header must contain 'question' and 'answer' columns.")
+    reader.fieldnames = fieldnames
+    for row_number, row in enumerate(reader, start=1):
+        record, error = _to_record(row)
+        yield row_number, record, error
+
+
+def iter_jsonl(binary_stream):
+    """One JSON object per line; blank lines are ignored."""
+    row_number = 0
+    for line in _text_stream(binary_stream):
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, f"Invalid JSON: {e}"
+            continue
+        record, error = _to_record(row)
+        yield row_number, record, error
+
+
+def iter_json_array(binary_stream):
+    """
+    A single top-level JSON array of objects, decoded one element at a time
+    so only the current element (plus one read chunk) is held in memory.
+    """
+    text_stream = _text_stream(binary_stream)
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, position, eof
+        chunk = text_stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            eof = True
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    def skip_whitespace():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer) or eof:
+                return
+            fill()
+
+    skip_whitespace()
+    if position >= len(buffer) or buffer[position] != '[':
+        raise ImportFormatError("JSON body must be an array of objects.")
+    position += 1
+
+    row_number = 0
+    expect_value = True
+    while True:
+        skip_whitespace()
+        if position >= len(buffer):
+            raise ImportFormatError("Unexpected end of JSON array.")
+        if buffer[position] == ']':
+            if expect_value and row_number:
+                raise ImportFormatError(f"Trailing ',' after row {row_number}.")
+            return
+        if not expect_value:
+            if buffer[position] != ',':
+                raise ImportFormatError(f"Expected ',' after row {row_number}.")
+            position += 1
+            expect_value = True
+            continue
+
+        while True:
+            try:
+                row, end = decoder.raw_decode(buffer, position)
+                # A value ending exactly at the buffer edge may be a truncated number; read on to be sure
+                if end < len(buffer) or eof:
+                    break
+            except ValueError:
+                if eof:
+                    raise ImportFormatError(f"Invalid JSON at row {row_number + 1}.")
+            fill()
+        position = end
+        row_number += 1
+        expect_value = False
+        record, error = _to_record(row)
+        yield row_number, record, error
+
+
+PARSERS = {
+    'csv': iter_csv,
+    'jsonl': iter_jsonl,
+    'json': iter_json_array,
+}
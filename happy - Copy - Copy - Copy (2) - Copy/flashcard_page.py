@@ -1,8 +1,19 @@
+import os
+import requests
+import api_client  # Shared keep-alive session with compression negotiation
 from PyQt5.QtWidgets import (
-    QWidget, QLabel, QVBoxLayout, QPushButton, QHBoxLayout
+    QWidget, QLabel, QVBoxLayout, QPushButton, QHBoxLayout, QFileDialog, QMessageBox
 )
 from PyQt5.QtGui import QFont
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
+
+# Maps deck file extensions to the backend's import formats
+IMPORT_FORMATS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".json": "json",
+}
 
 
 class FlashcardPage(QWidget):
@@ -34,6 +45,7 @@ class FlashcardPage(QWidget):
 
         self.current_index = 0
         self.answer_visible = False
+        self.current_user_id = None
 
         self.init_ui()
 
@@ -75,6 +87,13 @@ class FlashcardPage(QWidget):
         btn_layout.addWidget(self.btn_next)
 
         layout.addLayout(btn_layout)
+
+        # Bulk import of a deck file into the user's backend flashcards
+        self.btn_import = QPushButton("Import Deck...")
+        self.btn_import.setFixedWidth(140)
+        self.btn_import.clicked.connect(self.import_deck)
+        layout.addWidget(self.btn_import, alignment=Qt.AlignCenter)
+
         self.setLayout(layout)
 
         self.load_card()
@@ -113,3 +132,96 @@ class FlashcardPage(QWidget):
         if self.current_index > 0:
             self.current_index -= 1
             self.load_card()
+
+    def set_current_user_id(self, user_id):
+        """Sets the logged-in user's id, called by the main app after login."""
+        self.current_user_id = user_id
+
+    def set_flashcards(self, flashcards):
+        """Shows the given flashcards (e.g. the due queue fetched after login). Keeps the current deck if empty."""
+        if not flashcards:
+            return
+        self.flashcards = [{"question": card["question"], "answer": card["answer"]} for card in flashcards]
+        self.current_index = 0
+        self.load_card()
+
+    def import_deck(self):
+        """
+        Streams a CSV / JSONL / JSON deck file to the backend's bulk import endpoint.
+        The file object is passed straight to requests, so it is uploaded without being read into memory.
+        """
+        if not self.current_user_id:
+            QMessageBox.warning(self, "Import Error", "No user logged in to import flashcards.")
+            return
+
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Import Flashcards", "", "Flashcard decks (*.csv *.jsonl *.ndjson *.json)")
+        if not file_path:
+            return
+
+        import_format = IMPORT_FORMATS.get(os.path.splitext(file_path)[1].lower())
+        if not import_format:
+            QMessageBox.warning(self, "Import Error", "Deck files must be .csv, .jsonl or .json.")
+            return
+
+        backend_url = "http://127.0.0.1:5000/flashcards/import"
+        try:
+            with open(file_path, "rb") as deck_file:
+                response = api_client.session.post(backend_url, data=deck_file,
+                                                   params={"user_id": self.current_user_id, "format": import_format},
+                                                   timeout=(5, 600))
+            response_data = response.json()
+            if response.status_code != 202:
+                QMessageBox.warning(self, "Import Failed", response_data.get("message", "Import failed."))
+                return
+        except requests.exceptions.ConnectionError:
+            QMessageBox.critical(self, "Connection Error", "Could not connect to the backend server. Please ensure Flask app is running.")
+            return
+        except requests.exceptions.Timeout:
+            QMessageBox.critical(self, "Connection Timeout", "Backend server took too long to respond.")
+            return
+        except requests.exceptions.JSONDecodeError:
+            QMessageBox.critical(self, "Response Error", "Failed to parse server response as JSON.")
+            return
+        except OSError as e:
+            QMessageBox.critical(self, "Import Error", f"Could not read deck file: {e}")
+            return
+
+        # The backend imports in a background job; poll it without blocking the UI
+        self.btn_import.setEnabled(False)
+        self.btn_import.setText("Importing...")
+        self._poll_import_job(response_data["job_id"])
+
+    def _poll_import_job(self, job_id):
+        try:
+            response = api_client.session.get(f"{api_client.BACKEND_URL}/jobs/{job_id}",
+                                              params={"user_id": self.current_user_id}, timeout=5)
+            job = response.json() if response.status_code == 200 else None
+        except (requests.exceptions.RequestException, ValueError):
+            job = None
+        # Keep polling only while the job exists and is unfinished; 4xx/5xx bodies carry no status
+        if job is not None and job.get("status") not in ("succeeded", "failed"):
+            if job.get("progress", {}).get("message"):
+                self.btn_import.setText(job["progress"]["message"])
+            QTimer.singleShot(int(response.headers.get("Retry-After", 1)) * 1000,
+                              lambda: self._poll_import_job(job_id))
+            return
+
+        self.btn_import.setEnabled(True)
+        self.btn_import.setText("Import Deck...")
+        if job is None:
+            QMessageBox.critical(self, "Import Error", "Lost track of the import; check your flashcards later.")
+        elif job["status"] == "failed":
+            QMessageBox.warning(self, "Import Failed", job.get("error") or "Import failed.")
+        else:
+            result = job["result"]
+            message = (f"Imported {result.get('imported', 0)} flashcards, "
+                       f"{result.get('failed', 0)} rows skipped.")
+            errors = result.get("errors") or []
+            if errors:
+                message += "\n\nFirst problems:\n" + "\n".join(
+                    f"Row {error['row']}: {error['message']}" for error in errors[:5])
+            if result.get("message") == "Import finished.":
+                QMessageBox.information(self, "Import Complete", message)
+            else:
+                QMessageBox.warning(self, "Import Incomplete", f"{result.get('message')}\n{message}")
@@ -0,0 +1,43 @@
+"""
+Gunicorn settings for serving the MindZap backend with a pre-forked worker pool.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Environment overrides: MINDZAP_BIND, MINDZAP_WORKERS, MINDZAP_THREADS, MINDZAP_TIMEOUT.
+
+Reloading: 'kill -HUP <master pid>' gracefully replaces workers (in-flight requests finish first).
+Because the app is preloaded in the master, new code is only picked up by a full restart or by
+'kill -USR2 <master pid>' (starts a new master) followed by 'kill -QUIT <old master pid>'.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('MINDZAP_BIND', '127.0.0.1:5000')
+workers = int(os.environ.get('MINDZAP_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('MINDZAP_THREADS', 4))  # > 1 selects the gthread worker class
+timeout = int(os.environ.get('MINDZAP_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Import the app once in the master so workers share its memory pages copy-on-write
+preload_app = True
+
+# Recycle workers now and then to cap slow memory growth; jitter avoids restarting them all at once
+max_requests = 10000
+max_requests_jitter = 1000
+
+
+def pre_fork(server, worker):
+    # Move everything allocated so far (the preloaded app, models, imports) into the permanent
+    # generation, so the garbage collector never touches, and therefore never copies, those pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # SQLite connections must not cross a fork; give each worker its own pool
+    from app import app, db
+    with app.app_context():
+        db.engine.dispose(close=False)
+    # Start job workers now rather than on the first request, so scheduled jobs (backups) run on an idle server
+    app.extensions['jobs'].ensure_started()
@@ -0,0 +1,246 @@
+"""
+Background jobs: a persistent queue in the jobs table, drained by a small pool of worker threads in
+every server process.
+
+Endpoints that would otherwise hold a request worker for a long time queue a job with submit() and
+answer 202 with its id; clients poll GET /jobs/<id> for status, progress and the result.
+A worker claims a job with one UPDATE ... RETURNING, which SQLite runs under its write lock, so each
+job goes to exactly one worker across all processes. The claim takes a lease (JOBS_LEASE seconds) that
+progress() renews. A job whose worker died (crash, restart, OOM kill) is claimed again once its lease
+runs out. Failed attempts are retried with exponential backoff up to the job's max_attempts; a handler
+raises JobFailed for errors that retrying cannot fix. Periodic work (see schedule()) is queued the same
+way, as ordinary jobs.
+Workers start on the first request each process serves, so forked and spawned children never inherit
+dead threads, and jobs left queued by a stopped server resume after the next start.
+"""
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, delete, insert, literal, or_, select, update
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = 'queued', 'running', 'succeeded', 'failed'
+FINISHED = (SUCCEEDED, FAILED)
+SWEEP_INTERVAL = 60  # Seconds between clean-ups and schedule checks, per process
+SPOOL_CHUNK = 1024 * 1024  # Bytes copied per read when spooling a request body
+
+logger = logging.getLogger('mindzap.backend.jobs')
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class JobFailed(Exception):
+    """Raised by a handler for an error that retrying cannot fix; the job fails without further attempts."""
+
+
+class JobContext:
+    """A running job as its handler sees it."""
+
+    def __init__(self, runner, row):
+        self._runner = runner
+        self.id = row.id
+        self.user_id = row.user_id
+        self.payload = json.loads(row.payload) if row.payload else {}
+        self.attempt = row.attempts
+        self.is_last_attempt = row.attempts >= row.max_attempts
+        # Progress recorded by earlier attempts; handlers that commit in chunks resume from here
+        self.checkpoint = row.progress_done
+
+    def progress(self, done, total=None, message=None):
+        """
+        Records progress and renews the lease. Commits the current session, so rows the handler wrote
+        since its last call are committed together with the progress they correspond to.
+        """
+        runner = self._runner
+        values = {'progress_done': done, 'locked_until': _utcnow() + timedelta(seconds=runner.lease)}
+        if total is not None:
+            values['progress_total'] = total
+        if message is not None:
+            values['progress_message'] = message
+        runner.db.session.execute(update(runner.model).where(runner.model.id == self.id).values(**values))
+        runner.db.session.commit()
+
+
+class JobRunner:
+    def __init__(self, app, db, model, workers, poll_interval, lease, max_attempts, retry_delay, retention):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.retention = retention
+        self._handlers = {}
+        self._schedules = {}  # kind -> interval in seconds
+        self._wakeup = threading.Event()
+        self._started_pid = None
+        self._start_lock = threading.Lock()
+        self._last_sweep = 0.0
+
+    def handler(self, kind, max_attempts=None):
+        """Decorator registering func(job) as the handler of a job kind; its return value is the job's result."""
+        def register(func):
+            self._handlers[kind] = (func, max_attempts or self.max_attempts)
+            return func
+        return register
+
+    def schedule(self, kind, interval):
+        """Queues a job of this kind every 'interval' seconds (checked every SWEEP_INTERVAL by each process)."""
+        self._schedules[kind] = interval
+
+    def submit(self, kind, user_id=None, payload=None):
+        """Queues a job (committing the current session) and returns its id."""
+        job = self.model(kind=kind, user_id=user_id, status=QUEUED, payload=json.dumps(payload or {}),
+                         max_attempts=self._handlers[kind][1], run_after=_utcnow())
+        self.db.session.add(job)
+        self.db.session.commit()
+        self.ensure_started()
+        self._wakeup.set()
+        return job.id
+
+    def ensure_started(self):
+        """Starts this process's worker threads if they are not running yet."""
+        if self._started_pid == os.getpid() or not self.workers:
+            return
+        with self._start_lock:
+            if self._started_pid == os.getpid():
+                return
+            for number in range(self.workers):
+                threading.Thread(target=self._work, name=f"mindzap-job-worker-{number}", daemon=True).start()
+            self._started_pid = os.getpid()
+
+    def _claim(self):
+        model = self.model
+        now = _utcnow()
+        claimable = or_(
+            and_(model.status == QUEUED, model.run_after <= now),
+            and_(model.status == RUNNING, model.locked_until < now, model.attempts < model.max_attempts)
+        )
+        # Idle workers poll often; a plain read first keeps them from taking SQLite's write lock for nothing
+        if self.db.session.execute(select(model.id).where(claimable).limit(1)).first() is None:
+            return None
+        next_job = select(model.id).where(claimable).order_by(model.id).limit(1).scalar_subquery()
+        row = self.db.session.execute(
+            update(model).where(model.id == next_job).values(
+                status=RUNNING, attempts=model.attempts + 1, started_at=now,
+                locked_until=now + timedelta(seconds=self.lease))
+            .returning(model.id, model.user_id, model.kind, model.payload, model.attempts, model.max_attempts,
+                       model.progress_done)
+        ).first()
+        self.db.session.commit()
+        return row
+
+    def _finish(self, job, **values):
+        # Guarded by the attempt number: if the lease ran out and another worker took over, its outcome wins
+        model = self.model
+        self.db.session.execute(update(model).where(
+            model.id == job.id, model.status == RUNNING, model.attempts == job.attempt).values(**values))
+        self.db.session.commit()
+
+    def _run(self, row):
+        job = JobContext(self, row)
+        func = self._handlers.get(row.kind, (None,))[0]
+        try:
+            if func is None:
+                raise JobFailed(f"No handler for job kind '{row.kind}'.")
+            result = func(job)
+        except Exception as e:
+            self.db.session.rollback()
+            retry = not isinstance(e, JobFailed) and not job.is_last_attempt
+            if isinstance(e, JobFailed):
+                logger.info("Job failed", extra={'fields': {'job_id': job.id, 'kind': row.kind, 'error': str(e)}})
+            else:
+                logger.exception("Job attempt raised", extra={'fields': {
+                    'job_id': job.id, 'kind': row.kind, 'attempt': job.attempt, 'retry': retry}})
+            if retry:
+                delay = self.retry_delay * 2 ** (job.attempt - 1)
+                self._finish(job, status=QUEUED, error=str(e), run_after=_utcnow() + timedelta(seconds=delay))
+            else:
+                self._finish(job, status=FAILED, error=str(e), finished_at=_utcnow())
+            return
+        self._finish(job, status=SUCCEEDED, error=None, result=json.dumps(result), finished_at=_utcnow())
+
+    def _sweep(self):
+        """Fails jobs abandoned on their last attempt and deletes finished jobs past JOBS_RETENTION."""
+        model = self.model
+        now = _utcnow()
+        self.db.session.execute(update(model).where(
+            model.status == RUNNING, model.locked_until < now, model.attempts >= model.max_attempts
+        ).values(status=FAILED, error="Worker stopped before the job finished.", finished_at=now))
+        self.db.session.execute(delete(model).where(
+            model.status.in_(FINISHED), model.finished_at < now - timedelta(seconds=self.retention)))
+        self.db.session.commit()
+
+    def _enqueue_scheduled(self):
+        """
+        Queues each scheduled kind unless one is pending or was queued within its interval.
+        The check and the insert are one INSERT ... SELECT, so concurrent processes queue it only once.
+        """
+        model = self.model
+        now = _utcnow()
+        for kind, interval in self._schedules.items():
+            recent = select(model.id).where(model.kind == kind, or_(
+                model.status.in_((QUEUED, RUNNING)), model.created_at > now - timedelta(seconds=interval)))
+            self.db.session.execute(insert(model).from_select(
+                ['kind', 'status', 'payload', 'progress_done', 'attempts', 'max_attempts', 'run_after', 'created_at'],
+                select(literal(kind), literal(QUEUED), literal('{}'), literal(0), literal(0),
+                       literal(self._handlers[kind][1]), literal(now), literal(now)).where(~recent.exists())))
+        self.db.session.commit()
+
+    def _work(self):
+        while True:
+            row = None
+            # A fresh app context per job, so each one gets its own session
+            with self.app.app_context():
+                try:
+                    row = self._claim()
+                    if row is not None:
+                        self._run(row)
+                    elif time.monotonic() - self._last_sweep > SWEEP_INTERVAL:
+                        self._last_sweep = time.monotonic()
+                        self._sweep()
+                        self._enqueue_scheduled()
+                except Exception:
+                    self.db.session.rollback()
+                    logger.exception("Job worker error")
+            if row is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+
+def spool(stream, directory):
+    """Copies a request body to a new file in directory and returns its path, for a job to read later."""
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile('wb', dir=directory, suffix='.upload', delete=False) as spooled:
+        shutil.copyfileobj(stream, spooled, SPOOL_CHUNK)
+    return spooled.name
+
+
+def init_jobs(app, db, model):
+    """
+    Creates the app's JobRunner over the given job model and starts workers lazily on each process's
+    first request. Config: JOBS_WORKERS (threads per process; 0 only queues), JOBS_POLL_INTERVAL,
+    JOBS_LEASE, JOBS_RETRY_DELAY, JOBS_RETENTION (seconds), JOBS_MAX_ATTEMPTS, JOBS_SPOOL_DIR.
+    """
+    app.config.setdefault('JOBS_WORKERS', 2)
+    app.config.setdefault('JOBS_POLL_INTERVAL', 1.0)
+    app.config.setdefault('JOBS_LEASE', 300)
+    app.config.setdefault('JOBS_RETRY_DELAY', 5)
+    app.config.setdefault('JOBS_RETENTION', 7 * 24 * 3600)
+    app.config.setdefault('JOBS_MAX_ATTEMPTS', 3)
+    app.config.setdefault('JOBS_SPOOL_DIR', os.path.join(app.root_path, 'job_spool'))
+    runner = JobRunner(app, db, model, app.config['JOBS_WORKERS'], app.config['JOBS_POLL_INTERVAL'],
+                       app.config['JOBS_LEASE'], app.config['JOBS_MAX_ATTEMPTS'], app.config['JOBS_RETRY_DELAY'],
+                       app.config['JOBS_RETENTION'])
+    app.extensions['jobs'] = runner
+    app.before_request(runner.ensure_started)
+    return runner
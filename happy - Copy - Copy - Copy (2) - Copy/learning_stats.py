@@ -0,0 +1,138 @@
+"""
+Learning statistics over a user's flashcards and review log, computed with NumPy.
+
+Each statistic is computed from two queries: one loads the scheduling columns of every card and
+one loads the review log. Their rows become column arrays, and everything after that is array
+arithmetic (masks, bincount, searchsorted) with no per-card Python loop.
+Results are cached per user and keyed by the user's flashcards_version. Every review and every card
+change bumps that version, so a write invalidates the entry in every worker without any message
+between workers. Entries also expire after STATS_CACHE_TTL seconds, because the forecast is relative
+to the current time.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import text
+
+import sm2
+
+FORECAST_DAYS = 90
+FORECAST_WINDOWS = (30, 90)
+RETENTION_WINDOW_DAYS = 30
+# Lower bound of each histogram bucket; the last bucket is open-ended
+EASE_BUCKETS = np.round(np.arange(sm2.MIN_EASE_FACTOR, 3.0 + 1e-9, 0.1), 1)
+INTERVAL_BUCKETS = np.array([0, 1, 2, 3, 4, 5, 7, 10, 14, 21, 30, 60, 90, 180, 365])
+
+# Day offsets are computed by SQLite, so they use the same clock and parsing as the stored timestamps
+CARDS_SQL = text("""
+SELECT julianday(due_date) - julianday('now'), coalesce(interval, 1), coalesce(ease_factor, :default_ease)
+FROM flashcards WHERE user_id = :user_id
+""")
+# Served by ix_flashcard_reviews_user_id_flashcard_id_reviewed_at in index order, so no sort step
+REVIEWS_SQL = text("""
+SELECT flashcard_id, grade, julianday(reviewed_at) - julianday('now')
+FROM flashcard_reviews WHERE user_id = :user_id
+ORDER BY flashcard_id, reviewed_at
+""")
+
+
+def _columns(rows, width):
+    """Turns result rows into a (width, n) float array, so each column unpacks as one vector."""
+    return np.array(rows, dtype=np.float64).reshape(-1, width).T
+
+
+def _histogram(values, lower_bounds):
+    bucket = np.searchsorted(lower_bounds, values, side='right') - 1
+    counts = np.bincount(np.clip(bucket, 0, None), minlength=len(lower_bounds))
+    return {'lower_bounds': lower_bounds.tolist(), 'counts': counts.tolist()}
+
+
+def _retention(passed, mask):
+    reviews = int(np.count_nonzero(mask))
+    passed_count = int(np.count_nonzero(passed & mask))
+    return {'reviews': reviews, 'passed': passed_count,
+            'rate': round(passed_count / reviews, 4) if reviews else None}
+
+
+def compute_stats(card_rows, review_rows):
+    """
+    :param card_rows: (days until due, interval, ease factor) per card.
+    :param review_rows: (flashcard id, grade, days since now) per review, ordered by card then time.
+    """
+    due_in, intervals, ease_factors = _columns(card_rows, 3)
+    card_ids, grades, reviewed_in = _columns(review_rows, 3)
+
+    # True retention counts only reviews of cards already learned, i.e. not each card's first review
+    first_review = np.ones(card_ids.shape, dtype=bool)
+    first_review[1:] = card_ids[1:] != card_ids[:-1]
+    passed = grades >= sm2.PASSING_GRADE
+    recalled = ~first_review
+
+    # Day 0 is the next 24 hours; cards that are already due are counted separately as overdue
+    days = np.floor(due_in).astype(np.int64)
+    overdue = days < 0
+    upcoming = days[~overdue & (days < FORECAST_DAYS)]
+    daily = np.bincount(upcoming, minlength=FORECAST_DAYS)
+    cumulative = np.cumsum(daily)
+
+    forecast = {'overdue': int(np.count_nonzero(overdue)), 'daily': daily.tolist()}
+    for window in FORECAST_WINDOWS:
+        forecast[f'next_{window}_days'] = int(cumulative[window - 1])
+
+    return {
+        'card_count': int(due_in.size),
+        'retention': {
+            f'last_{RETENTION_WINDOW_DAYS}_days': _retention(passed, recalled & (reviewed_in >= -RETENTION_WINDOW_DAYS)),
+            'all_time': _retention(passed, recalled)
+        },
+        'forecast': forecast,
+        'ease_factor_histogram': _histogram(ease_factors, EASE_BUCKETS),
+        'interval_histogram': _histogram(intervals, INTERVAL_BUCKETS)
+    }
+
+
+class StatsCache:
+    """Bounded LRU of user id -> (flashcards_version, computed at, stats)."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] != version or time.monotonic() - entry[1] > self.ttl:
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[2]
+
+    def put(self, user_id, version, stats):
+        with self._lock:
+            self._entries[user_id] = (version, time.monotonic(), stats)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def user_stats(session, user_id, version):
+    """Returns the user's statistics, from the cache when their flashcards have not changed since."""
+    cache = current_app.extensions['learning_stats']
+    stats = cache.get(user_id, version)
+    if stats is None:
+        card_rows = session.execute(CARDS_SQL, {'user_id': user_id, 'default_ease': sm2.DEFAULT_EASE_FACTOR}).all()
+        review_rows = session.execute(REVIEWS_SQL, {'user_id': user_id}).all()
+        stats = compute_stats(card_rows, review_rows)
+        cache.put(user_id, version, stats)
+    return stats
+
+
+def init_learning_stats(app):
+    """Creates the app's statistics cache. Config: STATS_CACHE_SIZE (users), STATS_CACHE_TTL (seconds)."""
+    app.config.setdefault('STATS_CACHE_SIZE', 1024)
+    app.config.setdefault('STATS_CACHE_TTL', 300)
+    app.extensions['learning_stats'] = StatsCache(app.config['STATS_CACHE_SIZE'], app.config['STATS_CACHE_TTL'])
@@ -1,8 +1,10 @@
 import sys
+import logging
 import os # Keep os for potential path handling if needed elsewhere in frontend
 from PyQt5 import QtWidgets, QtCore, QtGui
 import requests
-import webbrowser
+import api_client  # Shared keep-alive session with compression negotiation
+from structured_logging import configure_logging
 
 # Import your UI forms from their respective files
 from login_form import LoginUi_Form
@@ -17,6 +19,8 @@ from setting import SettingsWidget
 from flashcard_page import FlashcardPage
 from quiz_form import QuizUiForm
 
+logger = logging.getLogger('mindzap.frontend')
+
 # ----------------------------------------------------------------------
 # MainApplicationWindow (Dashboard Window) - Define this first
 # This class acts as the actual QMainWindow for the dashboard content.
@@ -30,6 +34,8 @@ class MainApplicationWindow(QtWidgets.QMainWindow):
         self.current_username = username
         self.current_user_id = user_id
         self.coordinator = coordinator # Reference to the ApplicationCoordinator for logout/app flow
+        self._profile_cache = {} # username -> (ETag, profile data), revalidated with If-None-Match
+        self.due_flashcards = [] # Filled by load_initial_data after login
 
         # Initialize Dashboard UI (Ui_MainWindow) and set it up on THIS QMainWindow
         self.dashboard_ui = Ui_MainWindow()
@@ -75,35 +81,83 @@ class MainApplicationWindow(QtWidgets.QMainWindow):
         # Profile button: connect to a method that fetches and loads profile data
         self.dashboard_ui.user_btn.clicked.connect(self.show_profile_page) # Assuming ProfileWidget is page_1 or page_7
 
-        # Search functionality: connect from dashboard_ui's widgets
-        self.dashboard_ui.search_btn.clicked.connect(self.perform_google_search)
-        self.dashboard_ui.search_input.returnPressed.connect(self.perform_google_search)
+        # Search functionality: connect from dashboard_ui's widgets. The form's own handler (page-name
+        # navigation) is called from perform_search instead, since it clears the input before we can read it
+        self.dashboard_ui.search_btn.clicked.disconnect()
+        self.dashboard_ui.search_btn.clicked.connect(self.perform_search)
+        self.dashboard_ui.search_input.returnPressed.connect(self.perform_search)
+        self.search_results_list = QtWidgets.QListWidget(self.dashboard_ui.page_6)
+        self.dashboard_ui.gridLayout_7.addWidget(self.search_results_list, 1, 0, 1, 1)
 
         # Logout buttons: connect to the coordinator's show_login_page method
         self.dashboard_ui.logout_btn_1.clicked.connect(self.coordinator.show_login_page)
         self.dashboard_ui.logout_btn_2.clicked.connect(self.coordinator.show_login_page)
 
+        # A changed email is also the new username the session token carries; keep using it for profile calls
+        if isinstance(self.dashboard_ui.page_5, SettingsWidget):
+            self.dashboard_ui.page_5.settings_updated_signal.connect(self._on_credentials_updated)
+
+    def _on_credentials_updated(self, new_username):
+        self.current_username = new_username
+        self.coordinator.current_username = new_username
+        self.dashboard_ui.set_username_display(new_username)
+
+
+    def load_initial_data(self):
+        """
+        Fetches the profile and due flashcards in one /batch round trip after login, instead of one
+        blocking request each. The profile seeds the ETag cache used by the profile page and the due
+        flashcards become the flashcard page's deck.
+        """
+        username, user_id = self.current_username, self.current_user_id
+        try:
+            profile, flashcards = api_client.batch([
+                {"path": f"/profile/{username}"},
+                {"path": f"/flashcards/due?user_id={user_id}"},
+            ])
+        except (requests.exceptions.RequestException, KeyError, ValueError):
+            # Pages still fetch their own data on demand
+            logger.warning("Initial data: batch request failed", exc_info=True)
+            return
+
+        if profile["status"] == 200 and profile["headers"].get("ETag"):
+            self._profile_cache[username] = (profile["headers"]["ETag"], profile["body"])
+        if flashcards["status"] == 200:
+            self.due_flashcards = flashcards["body"].get("flashcards", [])
+            if isinstance(self.dashboard_ui.page_2, FlashcardPage):
+                self.dashboard_ui.page_2.set_flashcards(self.due_flashcards)
+        logger.debug("Initial data: loaded", extra={'fields': {
+            'statuses': [profile["status"], flashcards["status"]]}})
 
     def _fetch_profile_data(self, username):
         """Fetches user profile data from the backend."""
         if not username:
-            print("Error: No username available to fetch profile.")
+            logger.error("Profile fetch: no username available")
             return None
 
         backend_url = f"http://127.0.0.1:5000/profile/{username}"
+        # Send the cached validator so an unchanged profile comes back as an empty 304
+        cached = self._profile_cache.get(username)
+        headers = {"If-None-Match": cached[0]} if cached else {}
         response = None
         try:
-            response = requests.get(backend_url, timeout=5) # Added timeout for robustness
+            response = api_client.session.get(backend_url, headers=headers, timeout=5) # Added timeout for robustness
+            if response.status_code == 304 and cached:
+                logger.debug("Profile fetch: not modified, using cached copy", extra={'fields': {'username': username}})
+                return cached[1]
             response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
             profile_data = response.json()
-            print(f"Frontend Debug (MainApp - Profile Fetch): Fetched profile: {profile_data}")
+            logger.debug("Profile fetch: fetched profile", extra={'fields': {'profile': profile_data}})
+            etag = response.headers.get("ETag")
+            if etag:
+                self._profile_cache[username] = (etag, profile_data)
             return profile_data
         except requests.exceptions.ConnectionError:
             QtWidgets.QMessageBox.critical(self, "Connection Error", "Could not connect to backend to fetch profile. Ensure backend server is running.")
-            print("Frontend Debug (MainApp - Profile Fetch): ConnectionError: Backend server unreachable.")
+            logger.warning("Profile fetch: backend server unreachable", extra={'fields': {'url': backend_url}})
         except requests.exceptions.Timeout:
             QtWidgets.QMessageBox.critical(self, "Connection Timeout", "Backend server took too long to respond.")
-            print("Frontend Debug (MainApp - Profile Fetch): Timeout: Backend server did not respond in time.")
+            logger.warning("Profile fetch: backend server did not respond in time", extra={'fields': {'url': backend_url}})
         except requests.exceptions.HTTPError as e:
             error_message = f"Backend returned an error: {e.response.status_code}"
             try:
@@ -118,27 +172,45 @@ class MainApplicationWindow(QtWidgets.QMainWindow):
                 else:
                     error_message += f" - No readable response received."
             QtWidgets.QMessageBox.critical(self, "Server Error", error_message)
-            print(f"Frontend Debug (MainApp - Profile Fetch): HTTP error: {error_message}")
+            logger.warning("Profile fetch: HTTP error", extra={'fields': {'error': error_message}})
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, "Unexpected Error", f"An unexpected error occurred fetching profile: {e}")
-            print(f"Frontend Debug (MainApp - Profile Fetch): Unexpected error: {e}")
+            logger.exception("Profile fetch: unexpected error")
         return None
 
-    def perform_google_search(self):
-        """Performs a Google search based on the input in the search bar."""
-        # Ensure 'search_input' is a valid QLineEdit or similar widget in your Ui_MainWindow
-        if hasattr(self.dashboard_ui, 'search_input') and isinstance(self.dashboard_ui.search_input, QtWidgets.QLineEdit):
-            search_query = self.dashboard_ui.search_input.text().strip()
-            if search_query:
-                url = f"https://www.google.com/search?q={search_query}"
-                webbrowser.open(url)
-                print(f"Performed Google search for: {search_query}")
+    def perform_search(self):
+        """Searches the user's flashcards and quiz questions on the backend and lists the best matches."""
+        search_query = self.dashboard_ui.search_input.text().strip()
+        if not search_query:
+            QtWidgets.QMessageBox.information(self, "Search", "Please enter a search query.")
+            return
+        # Page names ("flashcards", "settings", ...) still jump straight to that page
+        self.dashboard_ui.search_button_clicked()
+        if self.dashboard_ui.stackedWidget.currentIndex() != 6:
+            return
+
+        self.search_results_list.clear()
+        self.dashboard_ui.label_9.setText(f"Search Results for: \"{search_query}\"")
+        try:
+            response = api_client.session.get(f"{api_client.BACKEND_URL}/search",
+                                              params={"user_id": self.current_user_id, "q": search_query, "limit": 50},
+                                              timeout=5)
+            response.raise_for_status()
+            results = response.json().get("results", [])
+        except requests.exceptions.RequestException as e:
+            self.dashboard_ui.label_9.setText("Search is unavailable. Ensure backend server is running.")
+            logger.warning("Search: request failed", extra={'fields': {'error': str(e)}})
+            return
+
+        for result in results:
+            if result["type"] == "flashcard":
+                text = f"Flashcard: {result['question_snippet']}  \u2192  {result['answer_snippet']}"
             else:
-                QtWidgets.QMessageBox.information(self, "Search", "Please enter a search query.")
-            self.dashboard_ui.search_input.clear() # Clear input after search
-        else:
-            QtWidgets.QMessageBox.warning(self, "Search Error", "Search input widget not found or not a QLineEdit.")
-            print("Error: 'search_input' widget not found or not a QLineEdit in dashboard_ui.")
+                text = f"Quiz question: {result['question_snippet']}"
+            self.search_results_list.addItem(text)
+        if not results:
+            self.search_results_list.addItem("No matching flashcards or quiz questions.")
+        logger.debug("Search: showed results", extra={'fields': {'query': search_query, 'results': len(results)}})
 
     def show_settings_page(self):
         """
@@ -149,13 +221,13 @@ class MainApplicationWindow(QtWidgets.QMainWindow):
             # Ensure your SettingsWidget (page_5) has a method like set_current_user_email
             if hasattr(self.dashboard_ui.page_5, 'set_current_user_email') and isinstance(self.dashboard_ui.page_5, SettingsWidget):
                 self.dashboard_ui.page_5.set_current_user_email(self.current_username)
-                print(f"Debug MainApp: Passed email '{self.current_username}' to SettingsWidget.")
+                logger.debug("Settings: passed email to SettingsWidget", extra={'fields': {'username': self.current_username}})
                 self.dashboard_content_stacked_widget.setCurrentIndex(5) # Index 5 is the Settings Page (self.page_5)
                 self.setWindowTitle(f"MindZap - Settings ({self.current_username})")
-                print(f"Switched to Settings Page for user: {self.current_username}")
+                logger.debug("Switched to Settings page", extra={'fields': {'username': self.current_username}})
             else:
                 QtWidgets.QMessageBox.warning(self, "Settings Error", "Settings widget not found or not initialized correctly with 'set_current_user_email' method.")
-                print("Error: SettingsWidget (page_5) does not have 'set_current_user_email' method or is not a SettingsWidget instance.")
+                logger.error("Settings: page_5 is not a SettingsWidget with 'set_current_user_email'")
         else:
             QtWidgets.QMessageBox.warning(self, "Settings Error", "No user logged in to access settings.")
             self.coordinator.show_login_page() # Redirect to login if no user is logged in
@@ -173,10 +245,10 @@ class MainApplicationWindow(QtWidgets.QMainWindow):
                     self.dashboard_ui.page_7.load_profile_data(profile_data)
                     self.dashboard_content_stacked_widget.setCurrentIndex(1) # Index 1 is the Profile Page (self.page_7)
                     self.setWindowTitle(f"MindZap - Profile ({self.current_username})")
-                    print(f"Switched to Profile Page for user: {self.current_username}")
+                    logger.debug("Switched to Profile page", extra={'fields': {'username': self.current_username}})
                 else:
                     QtWidgets.QMessageBox.warning(self, "Profile Error", "Profile widget not found or not initialized correctly with 'load_profile_data' method.")
-                    print("Error: ProfileWidget (page_7) does not have 'load_profile_data' method or is not a ProfileWidget instance.")
+                    logger.error("Profile: page_7 is not a ProfileWidget with 'load_profile_data'")
             else:
                 QtWidgets.QMessageBox.warning(self, "Profile Error", "Could not load profile data.")
         else:
@@ -230,21 +302,22 @@ class ApplicationCoordinator(QtWidgets.QMainWindow): # Changed to QMainWindow to
             "password": password
         }
 
-        print(f"Frontend Debug (Coordinator - Login): Sending data to backend: {login_data}")
+        logger.debug("Login: sending data to backend", extra={'fields': {'data': login_data}})
 
         response = None
         try:
-            response = requests.post(backend_url, json=login_data, timeout=5) # Added timeout
+            response = api_client.session.post(backend_url, json=login_data, timeout=5) # Added timeout
             response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
 
             response_data = response.json()
-            print(f"Frontend Debug (Coordinator - Login): Received response: {response_data}")
+            logger.debug("Login: received response", extra={'fields': {'response': response_data}})
 
             if response.status_code == 200:
                 QtWidgets.QMessageBox.information(self, "Login Success", response_data.get("message", "Login successful!"))
                 self.login_page.clear_fields()
                 self.current_username = response_data.get("username", username)
                 self.current_user_id = response_data.get("user_id") # Get user_id from backend response
+                api_client.set_session_token(response_data.get("token")) # Authenticates profile/settings calls
                 self.show_dashboard_page(self.current_username, self.current_user_id)
             else:
                 QtWidgets.QMessageBox.warning(self, "Login Failed", response_data.get("message", "Invalid credentials."))
@@ -252,10 +325,10 @@ class ApplicationCoordinator(QtWidgets.QMainWindow): # Changed to QMainWindow to
         except requests.exceptions.ConnectionError:
             QtWidgets.QMessageBox.critical(self, "Connection Error",
                                            "Could not connect to the backend server. Please ensure Flask app is running.")
-            print("Frontend Debug (Coordinator - Login): ConnectionError: Backend server unreachable.")
+            logger.warning("Login: backend server unreachable", extra={'fields': {'url': backend_url}})
         except requests.exceptions.Timeout:
             QtWidgets.QMessageBox.critical(self, "Connection Timeout", "Backend server took too long to respond.")
-            print("Frontend Debug (Coordinator - Login): Timeout: Backend server did not respond in time.")
+            logger.warning("Login: backend server did not respond in time", extra={'fields': {'url': backend_url}})
         except requests.exceptions.HTTPError as e:
             error_message = f"Backend returned an error: {e.response.status_code}"
             try:
@@ -270,10 +343,10 @@ class ApplicationCoordinator(QtWidgets.QMainWindow): # Changed to QMainWindow to
                 else:
                     error_message += f" - No readable response received."
             QtWidgets.QMessageBox.critical(self, "Server Error", error_message)
-            print(f"Frontend Debug (Coordinator - Login): HTTP error: {error_message}")
+            logger.warning("Login: HTTP error", extra={'fields': {'error': error_message}})
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, "Unexpected Error", f"An unexpected error occurred during login: {e}")
-            print(f"Frontend Debug (Coordinator - Login): Unexpected error: {e}")
+            logger.exception("Login: unexpected error")
 
     def _handle_registration_attempt(self, registration_data):
         """
@@ -281,15 +354,15 @@ class ApplicationCoordinator(QtWidgets.QMainWindow): # Changed to QMainWindow to
         """
         backend_url = "http://127.0.0.1:5000/register"
 
-        print(f"Frontend Debug (Coordinator - Register): Sending data to backend: {registration_data}")
+        logger.debug("Register: sending data to backend", extra={'fields': {'data': registration_data}})
 
         response = None
         try:
-            response = requests.post(backend_url, json=registration_data, timeout=5)
+            response = api_client.session.post(backend_url, json=registration_data, timeout=5)
             response.raise_for_status()
 
             response_data = response.json()
-            print(f"Frontend Debug (Coordinator - Register): Received response: {response_data}")
+            logger.debug("Register: received response", extra={'fields': {'response': response_data}})
 
             if response.status_code == 201:
                 QtWidgets.QMessageBox.information(self, "Registration Success", response_data.get("message", "Registration successful!"))
@@ -301,10 +374,10 @@ class ApplicationCoordinator(QtWidgets.QMainWindow): # Changed to QMainWindow to
         except requests.exceptions.ConnectionError:
             QtWidgets.QMessageBox.critical(self, "Connection Error",
                                            "Could not connect to the backend server. Please ensure Flask app is running.")
-            print("Frontend Debug (Coordinator - Register): ConnectionError: Backend server unreachable.")
+            logger.warning("Register: backend server unreachable", extra={'fields': {'url': backend_url}})
         except requests.exceptions.Timeout:
             QtWidgets.QMessageBox.critical(self, "Connection Timeout", "Backend server took too long to respond.")
-            print("Frontend Debug (Coordinator - Register): Timeout: Backend server did not respond in time.")
+            logger.warning("Register: backend server did not respond in time", extra={'fields': {'url': backend_url}})
         except requests.exceptions.HTTPError as e:
             error_message = f"Backend returned an error: {e.response.status_code}"
             try:
@@ -319,10 +392,10 @@ class ApplicationCoordinator(QtWidgets.QMainWindow): # Changed to QMainWindow to
                 else:
                     error_message += f" - No readable response received."
             QtWidgets.QMessageBox.critical(self, "Server Error", error_message)
-            print(f"Frontend Debug (Coordinator - Register): HTTP error: {error_message}")
+            logger.warning("Register: HTTP error", extra={'fields': {'error': error_message}})
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, "Unexpected Error", f"An unexpected error occurred during registration: {e}")
-            print(f"Frontend Debug (Coordinator - Register): Unexpected error: {e}")
+            logger.exception("Register: unexpected error")
 
 
     def show_login_page(self):
@@ -330,16 +403,27 @@ class ApplicationCoordinator(QtWidgets.QMainWindow): # Changed to QMainWindow to
         self.setWindowTitle("MindZap - Login")
         self.current_username = None
         self.current_user_id = None
+        self._end_session()
         # Close/reset dashboard if it exists and we're returning to login
         if self.dashboard_window:
             self.dashboard_window.close() # Close the dashboard QMainWindow
             self.dashboard_window = None # Clear the reference
-        print("Switched to Login Page")
+        logger.debug("Switched to Login page")
+
+    def _end_session(self):
+        """Revokes the session token on the backend (best effort) and forgets it locally."""
+        if not api_client.has_session_token():
+            return
+        try:
+            api_client.session.post(f"{api_client.BACKEND_URL}/logout", timeout=5)
+        except requests.exceptions.RequestException:
+            logger.warning("Logout: could not revoke session token on the backend", exc_info=True)
+        api_client.set_session_token(None)
 
     def show_register_page(self):
         self.stacked_widget.setCurrentWidget(self.register_page) # Use self.stacked_widget
         self.setWindowTitle("MindZap - Register")
-        print("Switched to Register Page")
+        logger.debug("Switched to Register page")
 
     def show_dashboard_page(self, username: str, user_id: int):
         """
@@ -352,7 +436,7 @@ class ApplicationCoordinator(QtWidgets.QMainWindow): # Changed to QMainWindow to
             self.dashboard_window = MainApplicationWindow(username, user_id, self) # Pass self (Coordinator)
             # Add the new dashboard QMainWindow to the coordinator's stacked widget
             self.stacked_widget.addWidget(self.dashboard_window)
-            print(f"Dashboard window created and added for user: {username}, ID: {user_id}")
+            logger.debug("Dashboard window created", extra={'fields': {'username': username, 'user_id': user_id}})
         else:
             # If dashboard already exists (e.g., returning after logout), update its user info
             self.dashboard_window.current_username = username
@@ -366,13 +450,16 @@ class ApplicationCoordinator(QtWidgets.QMainWindow): # Changed to QMainWindow to
             if hasattr(self.dashboard_window.dashboard_ui.page_3, 'set_current_user_id') and isinstance(self.dashboard_window.dashboard_ui.page_3, QuizUiForm):
                 self.dashboard_window.dashboard_ui.page_3.set_current_user_id(user_id)
 
+        self.dashboard_window.load_initial_data()
+
         # Switch the coordinator's stacked widget to display the dashboard
         self.stacked_widget.setCurrentWidget(self.dashboard_window)
         self.setWindowTitle(f"MindZap - Dashboard ({username})")
-        print(f"Switched to Dashboard Page for user: {username}")
+        logger.debug("Switched to Dashboard page", extra={'fields': {'username': username}})
 
 
 if __name__ == '__main__':
+    configure_logging()
     # Initialize and run the PyQt5 application
     app = QtWidgets.QApplication(sys.argv)
     coordinator = ApplicationCoordinator()
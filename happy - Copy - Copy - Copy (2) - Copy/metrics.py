@@ -0,0 +1,198 @@
+"""
+Request instrumentation for the Flask backend, exposed in Prometheus text format at /metrics.
+
+Per route, method and status it records histograms of request latency, response size, and the number
+and total duration of SQL statements executed while handling the request, plus a per-route in-flight gauge.
+
+Every thread writes only to its own shard of counters, so recording a request takes no locks. A scrape
+sums the shards (folding those of finished threads into one retired shard) under a lock that only
+scrapes contend for. Counters live in process memory: with several pre-forked workers each worker
+reports its own numbers, so scrape the workers individually or run one worker with several threads.
+"""
+import bisect
+import threading
+import time
+
+from flask import request
+from sqlalchemy import event
+
+from batch import is_subrequest
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Seconds
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)  # Bytes
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100)
+QUERY_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)  # Seconds
+
+# Metric name -> (help text, bucket upper bounds)
+HISTOGRAMS = {
+    'mindzap_http_request_duration_seconds': (
+        "Time from routing the request to returning the response (excludes streaming the body).",
+        LATENCY_BUCKETS),
+    'mindzap_http_response_size_bytes': (
+        "Size of the response body as sent, after compression. Streamed responses are not counted.",
+        SIZE_BUCKETS),
+    'mindzap_db_queries_per_request': (
+        "Number of SQL statements executed while handling the request.",
+        QUERY_COUNT_BUCKETS),
+    'mindzap_db_query_duration_seconds_per_request': (
+        "Total time spent executing SQL statements while handling the request.",
+        QUERY_TIME_BUCKETS),
+}
+IN_FLIGHT = 'mindzap_http_requests_in_flight'
+LABEL_NAMES = ('route', 'method', 'status')
+UNMATCHED_ROUTE = '<unmatched>'  # 404s and 405s share one label value instead of one per URL
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _Shard:
+    """Counters recorded by one thread. Only the owning thread writes to it."""
+
+    def __init__(self, thread=None):
+        self.thread = thread
+        self.histograms = {}  # (metric name, label values) -> [count per bucket..., count above last bucket, sum]
+        self.in_flight = {}  # route -> requests being handled
+
+    def observe(self, name, labels, value):
+        buckets = HISTOGRAMS[name][1]
+        series = self.histograms.get((name, labels))
+        if series is None:
+            series = self.histograms[(name, labels)] = [0] * (len(buckets) + 2)
+        series[bisect.bisect_left(buckets, value)] += 1
+        series[-1] += value
+
+    def merge_into(self, histograms, in_flight):
+        # list() snapshots the dicts in one step, so the owning thread can keep adding series meanwhile
+        for key, series in list(self.histograms.items()):
+            total = histograms.get(key)
+            if total is None:
+                histograms[key] = list(series)
+            else:
+                for i, value in enumerate(series):
+                    total[i] += value
+        for route, count in list(self.in_flight.items()):
+            in_flight[route] = in_flight.get(route, 0) + count
+
+
+class Registry:
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._retired = _Shard()
+        self._scrape_lock = threading.Lock()  # Held by scrapes only, never while recording a request
+
+    def shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            self._shards.append(shard)  # A single list.append is atomic under the GIL
+        return shard
+
+    def render(self):
+        """Returns every metric in the Prometheus text exposition format."""
+        with self._scrape_lock:
+            histograms, in_flight = {}, {}
+            for shard in list(self._shards):
+                if not shard.thread.is_alive():
+                    # Its thread is gone, so nothing writes to it any more
+                    shard.merge_into(self._retired.histograms, self._retired.in_flight)
+                    self._shards.remove(shard)
+                else:
+                    shard.merge_into(histograms, in_flight)
+            self._retired.merge_into(histograms, in_flight)
+
+        lines = [f"# HELP {IN_FLIGHT} Requests currently being handled.", f"# TYPE {IN_FLIGHT} gauge"]
+        for route in sorted(in_flight):
+            lines.append(f"{IN_FLIGHT}{{route=\"{_escape(route)}\"}} {in_flight[route]}")
+
+        for name, (help_text, buckets) in HISTOGRAMS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (metric, labels), series in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                label_text = ','.join(f"{key}=\"{_escape(value)}\"" for key, value in zip(LABEL_NAMES, labels))
+                cumulative = 0
+                for bound, count in zip(buckets, series):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{{{label_text},le=\"{bound:g}\"}} {cumulative}")
+                cumulative += series[-2]
+                lines.append(f"{name}_bucket{{{label_text},le=\"+Inf\"}} {cumulative}")
+                lines.append(f"{name}_sum{{{label_text}}} {series[-1]:.6g}")
+                lines.append(f"{name}_count{{{label_text}}} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = Registry()
+
+
+def init_metrics(app, endpoint='/metrics'):
+    """
+    Registers the request hooks and the scrape endpoint.
+    Call it before init_compression: after_request hooks run in reverse order of registration,
+    so the size is then measured on the body as it is sent.
+    """
+    local = registry._local
+
+    @app.before_request
+    def start_request_metrics():
+        if is_subrequest():
+            return  # Counted as part of the /batch request, including its SQL
+        route = request.url_rule.rule if request.url_rule is not None else UNMATCHED_ROUTE
+        shard = registry.shard()
+        shard.in_flight[route] = shard.in_flight.get(route, 0) + 1
+        # [route, start time, SQL statements, SQL seconds]; the SQL counters are filled by instrument_engine
+        local.request = [route, time.perf_counter(), 0, 0.0]
+
+    @app.after_request
+    def record_request_metrics(response):
+        if is_subrequest():
+            return response
+        current = getattr(local, 'request', None)
+        if current is None:
+            return response
+        route, started, queries, query_seconds = current
+        labels = (route, request.method, str(response.status_code))
+        shard = registry.shard()
+        shard.observe('mindzap_http_request_duration_seconds', labels, time.perf_counter() - started)
+        if not response.is_streamed:
+            shard.observe('mindzap_http_response_size_bytes', labels, response.content_length or 0)
+        shard.observe('mindzap_db_queries_per_request', labels, queries)
+        shard.observe('mindzap_db_query_duration_seconds_per_request', labels, query_seconds)
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        if is_subrequest():
+            return
+        current = getattr(local, 'request', None)
+        if current is None:
+            return
+        local.request = None
+        shard = registry.shard()
+        shard.in_flight[current[0]] -= 1
+
+    def metrics():
+        return app.response_class(registry.render(), content_type=CONTENT_TYPE)
+
+    app.add_url_rule(endpoint, 'metrics', metrics)
+
+
+def instrument_engine(engine):
+    """Counts and times every SQL statement the engine runs on behalf of the current request."""
+    local = registry._local
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['metrics_query_start'].pop()
+        current = getattr(local, 'request', None)
+        if current is not None:  # Statements outside a request (startup, migrations) are not attributed
+            current[2] += 1
+            current[3] += elapsed
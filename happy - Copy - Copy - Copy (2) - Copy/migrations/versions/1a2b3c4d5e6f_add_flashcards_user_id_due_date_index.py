@@ -0,0 +1,26 @@
+"""add composite (user_id, due_date) index on flashcards
+
+Revision ID: 1a2b3c4d5e6f
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1a2b3c4d5e6f'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases bootstrapped with db.create_all() may already have the index
+    op.create_index('ix_flashcards_user_id_due_date', 'flashcards', ['user_id', 'due_date'], unique=False,
+                    if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_flashcards_user_id_due_date', table_name='flashcards', if_exists=True)
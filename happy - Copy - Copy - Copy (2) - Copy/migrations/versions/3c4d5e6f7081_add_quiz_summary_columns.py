@@ -0,0 +1,37 @@
+"""add quiz summary columns (question_count, updated_at) and user_id index
+
+Revision ID: 3c4d5e6f7081
+Revises: 2b3c4d5e6f70
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c4d5e6f7081'
+down_revision = '2b3c4d5e6f70'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('quizzes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('question_count', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_quizzes_user_id', ['user_id'], unique=False)
+
+    # Backfill from the stored JSON in one statement
+    op.execute(
+        "UPDATE quizzes SET "
+        "question_count = CASE WHEN json_valid(questions_data) THEN json_array_length(questions_data) ELSE 0 END, "
+        "updated_at = CURRENT_TIMESTAMP"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('quizzes', schema=None) as batch_op:
+        batch_op.drop_index('ix_quizzes_user_id')
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('question_count')
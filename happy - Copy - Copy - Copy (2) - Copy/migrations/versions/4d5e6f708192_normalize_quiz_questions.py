@@ -0,0 +1,134 @@
+"""move quiz questions_data blobs into quiz_questions / quiz_answers tables
+
+Revision ID: 4d5e6f708192
+Revises: 3c4d5e6f7081
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d5e6f708192'
+down_revision = '3c4d5e6f7081'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000  # Quizzes converted per executemany round
+
+
+def _normalize_question(item):
+    """Same shape as app._build_quiz_questions, but lenient: legacy blobs are never rejected."""
+    if not isinstance(item, dict):
+        return json.dumps(item) if isinstance(item, list) else str(item), None, []
+    extra = {key: value for key, value in item.items()
+             if key not in ('question_id', 'question_text', 'answers')}
+    answers = item.get('answers')
+    answers = [answer for answer in answers if isinstance(answer, dict)] if isinstance(answers, list) else []
+    return str(item.get('question_text', '')), json.dumps(extra) if extra else None, answers
+
+
+def upgrade():
+    op.create_table('quiz_questions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('quiz_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('question_text', sa.Text(), nullable=False),
+    sa.Column('extra_data', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_quiz_questions_quiz_id_position', 'quiz_questions', ['quiz_id', 'position'], unique=True)
+    op.create_table('quiz_answers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('answer_text', sa.Text(), nullable=False),
+    sa.Column('is_correct', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['question_id'], ['quiz_questions.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_quiz_answers_question_id_position', 'quiz_answers', ['question_id', 'position'], unique=False)
+
+    # Move the blobs over in bulk. Question ids are assigned here so answers can reference them
+    # without a round trip per question.
+    connection = op.get_bind()
+    quizzes = sa.table('quizzes', sa.column('id', sa.Integer), sa.column('questions_data', sa.Text),
+                       sa.column('question_count', sa.Integer))
+    questions_table = sa.table('quiz_questions', sa.column('id'), sa.column('quiz_id'), sa.column('position'),
+                               sa.column('question_text'), sa.column('extra_data'))
+    answers_table = sa.table('quiz_answers', sa.column('question_id'), sa.column('position'),
+                             sa.column('answer_text'), sa.column('is_correct'))
+
+    next_question_id = 1
+    last_quiz_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(quizzes.c.id, quizzes.c.questions_data)
+            .where(quizzes.c.id > last_quiz_id).order_by(quizzes.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        question_rows, answer_rows, counts = [], [], []
+        for quiz_id, questions_data in rows:
+            try:
+                items = json.loads(questions_data)
+            except (TypeError, ValueError):
+                items = []
+            if not isinstance(items, list):
+                items = [items]
+            for position, item in enumerate(items):
+                question_text, extra_data, answers = _normalize_question(item)
+                question_rows.append({'id': next_question_id, 'quiz_id': quiz_id, 'position': position,
+                                      'question_text': question_text, 'extra_data': extra_data})
+                answer_rows.extend({'question_id': next_question_id, 'position': answer_position,
+                                    'answer_text': str(answer.get('answer_text', '')),
+                                    'is_correct': bool(answer.get('is_correct', False))}
+                                   for answer_position, answer in enumerate(answers))
+                next_question_id += 1
+            counts.append({'quiz_id': quiz_id, 'question_count': len(items)})
+        if question_rows:
+            connection.execute(questions_table.insert(), question_rows)
+        if answer_rows:
+            connection.execute(answers_table.insert(), answer_rows)
+        connection.execute(
+            quizzes.update().where(quizzes.c.id == sa.bindparam('quiz_id'))
+            .values(question_count=sa.bindparam('question_count')),
+            counts
+        )
+        last_quiz_id = rows[-1][0]
+
+    with op.batch_alter_table('quizzes', schema=None) as batch_op:
+        batch_op.drop_column('questions_data')
+
+
+def downgrade():
+    with op.batch_alter_table('quizzes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('questions_data', sa.Text(), nullable=False, server_default='[]'))
+
+    # Rebuild each blob with the same JOIN + GROUP BY the application reads with
+    op.execute("""
+        UPDATE quizzes SET questions_data = coalesce((
+            SELECT json_group_array(json(question_json)) FROM (
+                SELECT json_patch(coalesce(q.extra_data, '{}'), json_object(
+                    'question_text', q.question_text,
+                    'answers', json(CASE WHEN count(a.id) = 0 THEN '[]' ELSE json_group_array(json_object(
+                        'answer_text', a.answer_text,
+                        'is_correct', json(CASE WHEN a.is_correct THEN 'true' ELSE 'false' END))) END)
+                )) AS question_json
+                FROM quiz_questions AS q
+                LEFT JOIN (SELECT * FROM quiz_answers ORDER BY question_id, position) AS a ON a.question_id = q.id
+                WHERE q.quiz_id = quizzes.id
+                GROUP BY q.id
+                ORDER BY q.position
+            )
+        ), '[]')
+    """)
+
+    op.drop_index('ix_quiz_answers_question_id_position', table_name='quiz_answers')
+    op.drop_table('quiz_answers')
+    op.drop_index('ix_quiz_questions_quiz_id_position', table_name='quiz_questions')
+    op.drop_table('quiz_questions')
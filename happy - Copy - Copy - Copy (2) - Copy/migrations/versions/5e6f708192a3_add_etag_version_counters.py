@@ -0,0 +1,34 @@
+"""add version counters backing ETags
+
+Revision ID: 5e6f708192a3
+Revises: 4d5e6f708192
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e6f708192a3'
+down_revision = '4d5e6f708192'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+        batch_op.add_column(sa.Column('flashcards_version', sa.Integer(), nullable=False, server_default='0'))
+
+    with op.batch_alter_table('quizzes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    with op.batch_alter_table('quizzes', schema=None) as batch_op:
+        batch_op.drop_column('version')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('flashcards_version')
+        batch_op.drop_column('version')
@@ -0,0 +1,65 @@
+"""add quiz question tag / tag_position and per-quiz tag counts for sampling
+
+Revision ID: 6f708192a3b4
+Revises: 5e6f708192a3
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f708192a3b4'
+down_revision = '5e6f708192a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('quiz_questions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('tag', sa.String(length=100), nullable=False, server_default=''))
+        batch_op.add_column(sa.Column('tag_position', sa.Integer(), nullable=False, server_default='0'))
+
+    with op.batch_alter_table('quizzes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('tag_counts', sa.Text(), nullable=True))
+
+    # Tags come from the question's extra keys, 'tag' first, then 'category'
+    op.execute(
+        "UPDATE quiz_questions SET tag = coalesce("
+        "CAST(json_extract(extra_data, '$.tag') AS TEXT), "
+        "CAST(json_extract(extra_data, '$.category') AS TEXT), '') "
+        "WHERE json_valid(extra_data)"
+    )
+
+    # Number the questions of each (quiz, tag) in position order; done in Python to stay on older SQLite builds
+    connection = op.get_bind()
+    rows = connection.execute(sa.text(
+        "SELECT id, quiz_id, tag FROM quiz_questions ORDER BY quiz_id, tag, position")).all()
+    next_position = {}
+    updates = []
+    for row in rows:
+        key = (row.quiz_id, row.tag)
+        updates.append({'id': row.id, 'tag_position': next_position.get(key, 0)})
+        next_position[key] = next_position.get(key, 0) + 1
+    if updates:
+        connection.execute(sa.text("UPDATE quiz_questions SET tag_position = :tag_position WHERE id = :id"), updates)
+
+    op.execute(
+        "UPDATE quizzes SET tag_counts = coalesce((SELECT json_group_object(tag, size) FROM "
+        "(SELECT tag, count(*) AS size FROM quiz_questions WHERE quiz_id = quizzes.id GROUP BY tag)), '{}')"
+    )
+
+    with op.batch_alter_table('quiz_questions', schema=None) as batch_op:
+        batch_op.create_index('ix_quiz_questions_quiz_id_tag_tag_position', ['quiz_id', 'tag', 'tag_position'],
+                              unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('quiz_questions', schema=None) as batch_op:
+        batch_op.drop_index('ix_quiz_questions_quiz_id_tag_tag_position')
+        batch_op.drop_column('tag_position')
+        batch_op.drop_column('tag')
+
+    with op.batch_alter_table('quizzes', schema=None) as batch_op:
+        batch_op.drop_column('tag_counts')
@@ -0,0 +1,72 @@
+"""add quiz_attempts and quiz_attempt_answers for per-user score history
+
+Revision ID: 708192a3b4c5
+Revises: 6f708192a3b4
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '708192a3b4c5'
+down_revision = '6f708192a3b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'quiz_attempts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('client_attempt_id', sa.String(length=64), nullable=False),
+        sa.Column('quiz_id', sa.Integer(), nullable=True),
+        sa.Column('category', sa.String(length=100), nullable=True),
+        sa.Column('question_count', sa.Integer(), nullable=False),
+        sa.Column('correct_count', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['quiz_id'], ['quizzes.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'client_attempt_id', name='uq_quiz_attempts_user_id_client_attempt_id')
+    )
+    with op.batch_alter_table('quiz_attempts', schema=None) as batch_op:
+        batch_op.create_index('ix_quiz_attempts_user_id', ['user_id'], unique=False)
+        batch_op.create_index('ix_quiz_attempts_user_id_quiz_id', ['user_id', 'quiz_id'], unique=False)
+        batch_op.create_index('ix_quiz_attempts_user_id_category', ['user_id', 'category'], unique=False)
+        batch_op.create_index('ix_quiz_attempts_quiz_id', ['quiz_id'], unique=False)
+        batch_op.create_index('ix_quiz_attempts_category', ['category'], unique=False)
+
+    op.create_table(
+        'quiz_attempt_answers',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('attempt_id', sa.Integer(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('question_id', sa.Integer(), nullable=True),
+        sa.Column('question_text', sa.Text(), nullable=False),
+        sa.Column('answer_text', sa.Text(), nullable=False),
+        sa.Column('is_correct', sa.Boolean(), nullable=False),
+        sa.Column('answered_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['attempt_id'], ['quiz_attempts.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('quiz_attempt_answers', schema=None) as batch_op:
+        batch_op.create_index('ix_quiz_attempt_answers_attempt_id_position', ['attempt_id', 'position'],
+                              unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('quiz_attempt_answers', schema=None) as batch_op:
+        batch_op.drop_index('ix_quiz_attempt_answers_attempt_id_position')
+    op.drop_table('quiz_attempt_answers')
+
+    with op.batch_alter_table('quiz_attempts', schema=None) as batch_op:
+        batch_op.drop_index('ix_quiz_attempts_category')
+        batch_op.drop_index('ix_quiz_attempts_quiz_id')
+        batch_op.drop_index('ix_quiz_attempts_user_id_category')
+        batch_op.drop_index('ix_quiz_attempts_user_id_quiz_id')
+        batch_op.drop_index('ix_quiz_attempts_user_id')
+    op.drop_table('quiz_attempts')
@@ -0,0 +1,31 @@
+"""allow flashcard_reviews rows without client_seq and index the log by user, card and time for /stats
+
+Revision ID: 8192a3b4c5d6
+Revises: 708192a3b4c5
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8192a3b4c5d6'
+down_revision = '708192a3b4c5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('flashcard_reviews', schema=None) as batch_op:
+        batch_op.alter_column('client_seq', existing_type=sa.Integer(), nullable=True)
+        batch_op.create_index('ix_flashcard_reviews_user_id_flashcard_id_reviewed_at',
+                              ['user_id', 'flashcard_id', 'reviewed_at'], unique=False)
+
+
+def downgrade():
+    # Single reviews have no client_seq; they are only kept while the column allows it
+    op.execute("DELETE FROM flashcard_reviews WHERE client_seq IS NULL")
+    with op.batch_alter_table('flashcard_reviews', schema=None) as batch_op:
+        batch_op.drop_index('ix_flashcard_reviews_user_id_flashcard_id_reviewed_at')
+        batch_op.alter_column('client_seq', existing_type=sa.Integer(), nullable=False)
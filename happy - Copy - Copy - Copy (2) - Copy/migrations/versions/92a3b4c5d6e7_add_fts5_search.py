@@ -0,0 +1,63 @@
+"""add FTS5 search tables over flashcards and quiz questions, kept in sync by triggers
+
+Revision ID: 92a3b4c5d6e7
+Revises: 8192a3b4c5d6
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '92a3b4c5d6e7'
+down_revision = '8192a3b4c5d6'
+branch_labels = None
+depends_on = None
+
+SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS flashcards_fts USING fts5("
+    "owner, question, answer, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')",
+    "CREATE TRIGGER IF NOT EXISTS flashcards_fts_ai AFTER INSERT ON flashcards BEGIN "
+    "INSERT INTO flashcards_fts(rowid, owner, question, answer) "
+    "VALUES (new.id, 'u' || new.user_id, new.question, new.answer); END",
+    "CREATE TRIGGER IF NOT EXISTS flashcards_fts_ad AFTER DELETE ON flashcards BEGIN "
+    "DELETE FROM flashcards_fts WHERE rowid = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS flashcards_fts_au AFTER UPDATE OF user_id, question, answer ON flashcards BEGIN "
+    "UPDATE flashcards_fts SET owner = 'u' || new.user_id, question = new.question, answer = new.answer "
+    "WHERE rowid = old.id; END",
+
+    "CREATE VIRTUAL TABLE IF NOT EXISTS quiz_questions_fts USING fts5("
+    "owner, question_text, quiz_id UNINDEXED, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')",
+    "CREATE TRIGGER IF NOT EXISTS quiz_questions_fts_ai AFTER INSERT ON quiz_questions BEGIN "
+    "INSERT INTO quiz_questions_fts(rowid, owner, question_text, quiz_id) "
+    "VALUES (new.id, 'u' || (SELECT user_id FROM quizzes WHERE id = new.quiz_id), new.question_text, new.quiz_id); END",
+    "CREATE TRIGGER IF NOT EXISTS quiz_questions_fts_ad AFTER DELETE ON quiz_questions BEGIN "
+    "DELETE FROM quiz_questions_fts WHERE rowid = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS quiz_questions_fts_au AFTER UPDATE OF quiz_id, question_text ON quiz_questions BEGIN "
+    "UPDATE quiz_questions_fts SET owner = 'u' || (SELECT user_id FROM quizzes WHERE id = new.quiz_id), "
+    "question_text = new.question_text, quiz_id = new.quiz_id WHERE rowid = old.id; END",
+]
+
+TRIGGERS = ['flashcards_fts_ai', 'flashcards_fts_ad', 'flashcards_fts_au',
+            'quiz_questions_fts_ai', 'quiz_questions_fts_ad', 'quiz_questions_fts_au']
+
+
+def upgrade():
+    for statement in SCHEMA:
+        op.execute(statement)
+
+    # Index the existing rows; the triggers cover every write from here on
+    op.execute("INSERT INTO flashcards_fts(rowid, owner, question, answer) "
+               "SELECT id, 'u' || user_id, question, answer FROM flashcards")
+    op.execute("INSERT INTO quiz_questions_fts(rowid, owner, question_text, quiz_id) "
+               "SELECT q.id, 'u' || z.user_id, q.question_text, q.quiz_id "
+               "FROM quiz_questions q JOIN quizzes z ON z.id = q.quiz_id")
+    op.execute("INSERT INTO flashcards_fts(flashcards_fts) VALUES ('optimize')")
+    op.execute("INSERT INTO quiz_questions_fts(quiz_questions_fts) VALUES ('optimize')")
+
+
+def downgrade():
+    for trigger in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS quiz_questions_fts")
+    op.execute("DROP TABLE IF EXISTS flashcards_fts")
@@ -0,0 +1,65 @@
+"""add per-user change sequence on flashcards / quizzes and sync_tombstones for /sync
+
+Revision ID: a3b4c5d6e7f8
+Revises: 92a3b4c5d6e7
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3b4c5d6e7f8'
+down_revision = '92a3b4c5d6e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Plain ADD COLUMN rather than batch mode: rebuilding flashcards / quiz_questions would drop the FTS triggers
+    op.add_column('users', sa.Column('change_seq', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('flashcards', sa.Column('change_seq', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('quizzes', sa.Column('change_seq', sa.Integer(), nullable=False, server_default='0'))
+
+    # Number each user's existing rows 1..n (flashcards, then quizzes); done in Python to stay on older SQLite builds
+    connection = op.get_bind()
+    next_seq = {}
+    for table in ('flashcards', 'quizzes'):
+        updates = []
+        for row in connection.execute(sa.text(f"SELECT id, user_id FROM {table} ORDER BY user_id, id")):
+            next_seq[row.user_id] = next_seq.get(row.user_id, 0) + 1
+            updates.append({'id': row.id, 'change_seq': next_seq[row.user_id]})
+        if updates:
+            connection.execute(sa.text(f"UPDATE {table} SET change_seq = :change_seq WHERE id = :id"), updates)
+    if next_seq:
+        connection.execute(sa.text("UPDATE users SET change_seq = :change_seq WHERE id = :user_id"),
+                           [{'user_id': user_id, 'change_seq': seq} for user_id, seq in next_seq.items()])
+
+    op.create_index('ix_flashcards_user_id_change_seq', 'flashcards', ['user_id', 'change_seq'], unique=False)
+    op.create_index('ix_quizzes_user_id_change_seq', 'quizzes', ['user_id', 'change_seq'], unique=False)
+
+    op.create_table(
+        'sync_tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('record_id', sa.Integer(), nullable=False),
+        sa.Column('change_seq', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_sync_tombstones_user_id_change_seq', 'sync_tombstones', ['user_id', 'change_seq'],
+                    unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_sync_tombstones_user_id_change_seq', table_name='sync_tombstones')
+    op.drop_table('sync_tombstones')
+    op.drop_index('ix_quizzes_user_id_change_seq', table_name='quizzes')
+    op.drop_index('ix_flashcards_user_id_change_seq', table_name='flashcards')
+    # SQLite 3.35+ drops columns in place, without the table rebuild that would lose the FTS triggers
+    op.drop_column('quizzes', 'change_seq')
+    op.drop_column('flashcards', 'change_seq')
+    op.drop_column('users', 'change_seq')
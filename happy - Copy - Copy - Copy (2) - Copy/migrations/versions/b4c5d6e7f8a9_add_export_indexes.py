@@ -0,0 +1,26 @@
+"""add (user_id) indexes on flashcards and flashcard_reviews for id-ordered /export reads
+
+Revision ID: b4c5d6e7f8a9
+Revises: a3b4c5d6e7f8
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4c5d6e7f8a9'
+down_revision = 'a3b4c5d6e7f8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_flashcards_user_id', 'flashcards', ['user_id'], unique=False)
+    op.create_index('ix_flashcard_reviews_user_id', 'flashcard_reviews', ['user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_flashcard_reviews_user_id', table_name='flashcard_reviews')
+    op.drop_index('ix_flashcards_user_id', table_name='flashcards')
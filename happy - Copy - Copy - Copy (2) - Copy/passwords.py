@@ -0,0 +1,164 @@
+"""
+Password hashing for the Flask backend: scrypt (from hashlib, no extra dependency) run in a bounded
+process pool, so a 50-250 ms hash never holds the GIL of the worker that serves requests.
+
+Hashes are stored as "scrypt$<n>$<r>$<p>$<salt>$<key>" with base64 salt and key, so every row
+carries the cost it was hashed with. The cost for new hashes is calibrated once at startup to
+PASSWORD_HASH_TARGET_MS on this machine (or pinned with PASSWORD_SCRYPT_N). Rows still holding a
+plaintext password, or hashed with an older cost, are re-hashed on the user's next successful login.
+
+At most PASSWORD_HASH_WORKERS hashes run at once and at most PASSWORD_HASH_MAX_PENDING wait for a
+worker; beyond that callers wait up to PASSWORD_HASH_QUEUE_TIMEOUT seconds and then get HashingBusy.
+Pool processes are started with 'spawn', which works the same on Windows and under forking servers.
+"""
+import base64
+import hashlib
+import hmac
+import logging
+import math
+import multiprocessing
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app
+
+SCHEME = 'scrypt'
+MIN_N = 2 ** 14  # Floor regardless of how fast the machine is
+MAX_N = 2 ** 20  # 1 GiB of memory per hash at r=8; calibration never goes past this
+DEFAULT_R = 8
+DEFAULT_P = 1
+DEFAULT_TARGET_MS = 100
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+logger = logging.getLogger('mindzap.backend.passwords')
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool stays saturated for longer than the queue timeout."""
+
+
+def _scrypt(password, salt, n, r, p):
+    # Runs in a pool process. scrypt needs 128 * r * n bytes, plus headroom for OpenSSL's bookkeeping
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                          maxmem=128 * r * (n + p + 2) + 2 ** 20, dklen=KEY_BYTES)
+
+
+def _b64encode(data):
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _b64decode(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+def _parse(stored):
+    """Returns (n, r, p, salt, key) for a scrypt hash, or None for a legacy plaintext value."""
+    parts = stored.split('$')
+    if len(parts) != 6 or parts[0] != SCHEME:
+        return None
+    return int(parts[1]), int(parts[2]), int(parts[3]), _b64decode(parts[4]), _b64decode(parts[5])
+
+
+def calibrate(target_ms, r=DEFAULT_R, p=DEFAULT_P):
+    """Returns the largest power-of-two n (MIN_N..MAX_N) whose hash takes at most target_ms here."""
+    salt = secrets.token_bytes(SALT_BYTES)
+    elapsed = min(_timed(_scrypt, 'calibration', salt, MIN_N, r, p) for _ in range(3))
+    # scrypt's cost is linear in n
+    doublings = int(math.log2(target_ms / 1000 / elapsed)) if elapsed * 1000 < target_ms else 0
+    return min(MIN_N << max(doublings, 0), MAX_N)
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+class PasswordHasher:
+    def __init__(self, n, r=DEFAULT_R, p=DEFAULT_P, workers=None, max_pending=None, queue_timeout=5.0):
+        self.n, self.r, self.p = n, r, p
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_timeout = queue_timeout
+        # Bounds running + waiting hashes, so a login burst queues here instead of piling up in the pool
+        self._slots = threading.BoundedSemaphore(self.workers + (max_pending if max_pending is not None
+                                                                 else 4 * self.workers))
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+        # Verified against when the user does not exist, so unknown usernames cost the same time
+        self._dummy = f"{SCHEME}${n}${r}${p}${_b64encode(secrets.token_bytes(SALT_BYTES))}${_b64encode(bytes(KEY_BYTES))}"
+
+    def _executor(self):
+        # Created on first use in each process: a pool inherited across fork would have no live workers
+        if self._pool is None or self._pool_pid != os.getpid():
+            with self._pool_lock:
+                if self._pool is None or self._pool_pid != os.getpid():
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+                    self._pool_pid = os.getpid()
+        return self._pool
+
+    def _run(self, salt, n, r, p, password):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise HashingBusy("Password hashing is saturated.")
+        try:
+            executor = self._executor()
+            return executor.submit(_scrypt, password, salt, n, r, p).result()
+        except BrokenProcessPool:
+            # A pool process died (e.g. killed for memory); start a fresh pool for the next caller
+            with self._pool_lock:
+                if self._pool is executor:
+                    self._pool = None
+            raise
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        salt = secrets.token_bytes(SALT_BYTES)
+        key = self._run(salt, self.n, self.r, self.p, password)
+        return f"{SCHEME}${self.n}${self.r}${self.p}${_b64encode(salt)}${_b64encode(key)}"
+
+    def verify(self, password, stored):
+        """Checks password against a stored hash or legacy plaintext value; stored=None burns equal time."""
+        parsed = _parse(stored if stored is not None else self._dummy)
+        if parsed is None:
+            return hmac.compare_digest(password.encode('utf-8'), stored.encode('utf-8'))
+        n, r, p, salt, key = parsed
+        matches = hmac.compare_digest(self._run(salt, n, r, p, password), key)
+        return matches and stored is not None
+
+    def needs_rehash(self, stored):
+        parsed = _parse(stored)
+        return parsed is None or parsed[:3] != (self.n, self.r, self.p)
+
+
+def init_passwords(app):
+    """
+    Creates the app's PasswordHasher. Config: PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING,
+    PASSWORD_HASH_QUEUE_TIMEOUT (seconds), PASSWORD_HASH_TARGET_MS, PASSWORD_SCRYPT_N (skips calibration).
+    """
+    app.config.setdefault('PASSWORD_HASH_WORKERS', None)
+    app.config.setdefault('PASSWORD_HASH_MAX_PENDING', None)
+    app.config.setdefault('PASSWORD_HASH_QUEUE_TIMEOUT', 5.0)
+    app.config.setdefault('PASSWORD_HASH_TARGET_MS', DEFAULT_TARGET_MS)
+    app.config.setdefault('PASSWORD_SCRYPT_N', None)
+
+    n = app.config['PASSWORD_SCRYPT_N']
+    if n is None:
+        if multiprocessing.parent_process() is not None:
+            return  # A spawned pool process re-importing the app; it only ever runs _scrypt
+        n = calibrate(app.config['PASSWORD_HASH_TARGET_MS'])
+        logger.info("Calibrated scrypt cost", extra={'fields': {
+            'n': n, 'target_ms': app.config['PASSWORD_HASH_TARGET_MS']}})
+    app.extensions['passwords'] = PasswordHasher(
+        n, workers=app.config['PASSWORD_HASH_WORKERS'], max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+        queue_timeout=app.config['PASSWORD_HASH_QUEUE_TIMEOUT'])
+
+
+def hasher():
+    return current_app.extensions['passwords']
@@ -1,6 +1,10 @@
 import sys
+import logging
 from PyQt5 import QtCore, QtGui, QtWidgets
 import requests
+import api_client  # Shared keep-alive session with compression negotiation
+
+logger = logging.getLogger('mindzap.frontend.profile')
 
 class ProfileWidget(QtWidgets.QWidget):
     # Signals for communication with the main application
@@ -125,12 +129,12 @@ class ProfileWidget(QtWidgets.QWidget):
         Loads profile data received from the backend into the UI fields.
         :param data: A dictionary containing user profile information.
         """
-        print(f"Debug ProfileWidget: Loading data: {data}")
+        logger.debug("Loading profile data", extra={'fields': {'data': data}})
         self.full_name_input.setText(data.get('full_name', ''))
         self.phone_number_input.setText(data.get('phone_number', ''))
         self.email_input.setText(data.get('username', '')) # Use 'username' from backend as email
         self.country_input.setText(data.get('country', ''))
-        print("Debug ProfileWidget: Fields populated.")
+        logger.debug("Profile fields populated")
 
     def toggle_edit_mode(self):
         """Toggles between read-only and editable mode."""
@@ -143,7 +147,7 @@ class ProfileWidget(QtWidgets.QWidget):
         else:
             self.edit_button.setText("Edit")
             self.save_profile_changes() # Save changes when exiting edit mode
-        print(f"Debug: Edit mode toggled to: {self.edit_mode}")
+        logger.debug("Edit mode toggled", extra={'fields': {'edit_mode': self.edit_mode}})
 
     def save_profile_changes(self):
         """
@@ -155,13 +159,13 @@ class ProfileWidget(QtWidgets.QWidget):
             'username': self.email_input.text().strip(), # Send email as 'username' to backend
             'country': self.country_input.text().strip()
         }
-        print(f"Debug: Attempting to save profile changes: {updated_data}")
+        logger.debug("Saving profile changes", extra={'fields': {'data': updated_data}})
 
         # --- Send updated data to Flask Backend ---
         backend_url = "http://127.0.0.1:5000/profile/update"
         response = None
         try:
-            response = requests.post(backend_url, json=updated_data)
+            response = api_client.session.post(backend_url, json=updated_data)
             response.raise_for_status()
             response_data = response.json()
             if response_data.get("status") == "success":
@@ -0,0 +1,210 @@
+"""
+Opt-in sampling profiler for the Flask backend.
+
+With PROFILE_ENABLED set, one request in PROFILE_SAMPLE_EVERY (and every request whose PROFILE_HEADER
+header carries PROFILE_ADMIN_TOKEN) is profiled: a single background thread samples the Python stack of
+each profiled request's thread every PROFILE_INTERVAL seconds. Requests that are not profiled only pay
+for a header lookup and a counter increment.
+
+Each profile is written to PROFILE_DIR in collapsed-stack format ("outer;inner;leaf <samples>" per line),
+which flamegraph.pl and speedscope open directly, and is recorded in PROFILE_DIR/index.jsonl.
+GET /admin/profiles lists the slowest captured profiles, GET /admin/profiles/<name> downloads one. Both
+require the admin token in PROFILE_HEADER; without a configured PROFILE_ADMIN_TOKEN they always answer 403
+and only sampled profiling runs.
+"""
+import hmac
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import g, jsonify, request, send_from_directory
+
+from batch import is_subrequest
+
+DEFAULT_SAMPLE_EVERY = 100  # 0 profiles only requests that carry the header
+DEFAULT_INTERVAL = 0.005  # Seconds between samples; Python's GIL switch interval makes finer sampling moot
+DEFAULT_HEADER = 'X-MindZap-Profile'
+DEFAULT_MAX_PROFILES = 200  # Oldest profiles are deleted beyond this
+INDEX_FILE = 'index.jsonl'
+PROFILE_SUFFIX = '.collapsed'
+
+
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        names.append(f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """Samples the Python stacks of the registered threads from one background thread."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._active = {}  # Thread ident -> {collapsed stack: samples}
+        self._wakeup = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread = None
+
+    def start(self, ident):
+        self._ensure_running()
+        self._active[ident] = {}
+        self._wakeup.set()
+
+    def stop(self, ident):
+        return self._active.pop(ident, {})
+
+    def _ensure_running(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            # Also covers forked workers, where the parent's sampler thread no longer exists
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='mindzap-profiler', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            if not self._active:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            frames = sys._current_frames()
+            for ident, stacks in list(self._active.items()):
+                frame = frames.get(ident)
+                if frame is not None:
+                    stack = _collapse(frame)
+                    stacks[stack] = stacks.get(stack, 0) + 1
+            frames = frame = None  # Do not keep the sampled threads' frames alive while sleeping
+            time.sleep(self.interval)
+
+
+def _read_index(directory):
+    try:
+        with open(os.path.join(directory, INDEX_FILE), encoding='utf-8') as index:
+            return [json.loads(line) for line in index if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def _save_profile(directory, max_profiles, stacks, entry):
+    captured = datetime.now(timezone.utc)
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', entry['route']).strip('_') or 'root'
+    name = f"{captured:%Y%m%dT%H%M%S%f}-{os.getpid()}-{entry['method']}-{slug}{PROFILE_SUFFIX}"
+    with open(os.path.join(directory, name), 'w', encoding='utf-8') as profile:
+        for stack, samples in sorted(stacks.items()):
+            profile.write(f"{stack} {samples}\n")
+
+    entry = dict(entry, file=name, samples=sum(stacks.values()),
+                 captured_at=captured.isoformat(timespec='milliseconds'))
+    with open(os.path.join(directory, INDEX_FILE), 'a', encoding='utf-8') as index:
+        index.write(json.dumps(entry) + '\n')
+
+    # Names start with the capture time, so sorting them puts the oldest first
+    profiles = sorted(f for f in os.listdir(directory) if f.endswith(PROFILE_SUFFIX))
+    if len(profiles) > max_profiles:
+        for old in profiles[:len(profiles) - max_profiles]:
+            os.remove(os.path.join(directory, old))
+        kept = set(profiles[len(profiles) - max_profiles:])
+        entries = [e for e in _read_index(directory) if e['file'] in kept]
+        with open(os.path.join(directory, INDEX_FILE), 'w', encoding='utf-8') as index:
+            index.writelines(json.dumps(e) + '\n' for e in entries)
+
+
+def _is_admin(app):
+    """True if the request's PROFILE_HEADER header carries the configured PROFILE_ADMIN_TOKEN."""
+    token = app.config['PROFILE_ADMIN_TOKEN']
+    supplied = request.headers.get(app.config['PROFILE_HEADER'])
+    return bool(token and supplied) and hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8'))
+
+
+def init_profiling(app):
+    """
+    Registers the profiling hooks and the admin endpoints when PROFILE_ENABLED is set.
+    Config: PROFILE_ENABLED, PROFILE_DIR, PROFILE_SAMPLE_EVERY, PROFILE_INTERVAL (seconds),
+    PROFILE_HEADER, PROFILE_ADMIN_TOKEN, PROFILE_MAX_PROFILES.
+    """
+    app.config.setdefault('PROFILE_ENABLED', False)
+    app.config.setdefault('PROFILE_ADMIN_TOKEN', None)
+    app.config.setdefault('PROFILE_DIR', os.path.join(app.root_path, 'profiles'))
+    app.config.setdefault('PROFILE_SAMPLE_EVERY', DEFAULT_SAMPLE_EVERY)
+    app.config.setdefault('PROFILE_INTERVAL', DEFAULT_INTERVAL)
+    app.config.setdefault('PROFILE_HEADER', DEFAULT_HEADER)
+    app.config.setdefault('PROFILE_MAX_PROFILES', DEFAULT_MAX_PROFILES)
+    if not app.config['PROFILE_ENABLED']:
+        return
+
+    directory = app.config['PROFILE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    sampler = StackSampler(app.config['PROFILE_INTERVAL'])
+    request_counter = itertools.count(1)
+    save_lock = threading.Lock()  # Serializes index appends and pruning within this process
+
+    @app.before_request
+    def start_profile():
+        # g belongs to the app context, which /batch sub-requests share with the batch being profiled
+        if request.endpoint in ('list_profiles', 'download_profile') or is_subrequest():
+            return
+        every = app.config['PROFILE_SAMPLE_EVERY']
+        if _is_admin(app):
+            g.profile_trigger = 'header'
+        elif every and next(request_counter) % every == 0:
+            g.profile_trigger = 'sampled'
+        else:
+            return
+        g.profile_started = time.perf_counter()
+        sampler.start(threading.get_ident())
+
+    @app.after_request
+    def note_profile_status(response):
+        if 'profile_started' in g and not is_subrequest():
+            g.profile_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_profile(exc):
+        if is_subrequest():
+            return
+        started = g.pop('profile_started', None)
+        if started is None:
+            return
+        duration = time.perf_counter() - started
+        stacks = sampler.stop(threading.get_ident())
+        if not stacks:
+            return  # Finished before the first sample
+        entry = {
+            'method': request.method,
+            'path': request.path,
+            'route': request.url_rule.rule if request.url_rule is not None else request.path,
+            'status': g.pop('profile_status', 500),
+            'duration_ms': round(duration * 1000, 3),
+            'trigger': g.pop('profile_trigger'),
+            'pid': os.getpid(),
+        }
+        with save_lock:
+            _save_profile(directory, app.config['PROFILE_MAX_PROFILES'], stacks, entry)
+
+    def list_profiles():
+        """Lists the slowest captured profiles: ?limit=N (default 20), optionally ?route=/flashcards."""
+        if not _is_admin(app):
+            return jsonify(message="Admin token required."), 403
+        limit = request.args.get('limit', 20, type=int)
+        route = request.args.get('route')
+        entries = [e for e in _read_index(directory)
+                   if (route is None or e['route'] == route) and os.path.exists(os.path.join(directory, e['file']))]
+        entries.sort(key=lambda e: e['duration_ms'], reverse=True)
+        return jsonify(profiles=entries[:max(limit, 0)]), 200
+
+    def download_profile(name):
+        if not _is_admin(app):
+            return jsonify(message="Admin token required."), 403
+        return send_from_directory(directory, name, mimetype='text/plain')
+
+    app.add_url_rule('/admin/profiles', 'list_profiles', list_profiles)
+    app.add_url_rule('/admin/profiles/<path:name>', 'download_profile', download_profile)
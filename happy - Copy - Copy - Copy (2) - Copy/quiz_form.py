@@ -5,7 +5,12 @@ from PyQt5 import QtWidgets, QtCore, QtGui
 from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QComboBox, QLabel, QRadioButton, QPlainTextEdit, QGroupBox, QSpinBox, QMessageBox
 from PyQt5.QtCore import Qt
 import random
+import uuid
+from datetime import datetime, timezone
 
+import requests
+
+import api_client  # Shared keep-alive session with compression negotiation
 from quiz_ui import Ui_MainWindow as QuizUi_MainWindow_Generated
 
 # --- QuizDatabase Class (Handles DB connection and queries) ---
@@ -129,6 +134,10 @@ class QuizUiForm(QtWidgets.QWidget):
         self.current_question_index = -1
         self.correct_answers_count = 0
         self.total_questions_to_ask = 0
+        self.current_user_id = None
+        self.attempt_answers = []  # One entry per checked answer, sent to the backend when the quiz ends
+        self.attempt_category = None
+        self.attempt_started_at = None
 
         # --- Get References to UI Elements ---
         self.categoryComboBox = self.ui.comboBox_6
@@ -166,6 +175,9 @@ class QuizUiForm(QtWidgets.QWidget):
             print("QuizUiForm: Warning: QToolBox not found in quiz_ui.py. Internal page navigation may not work.")
         print("QuizUiForm: Initialized and UI setup completed.")
 
+    def set_current_user_id(self, user_id):
+        self.current_user_id = user_id
+
     def load_categories_into_dropdown(self):
         """Loads categories from DB into the QComboBox."""
         categories = self.db.fetch_categories() # <--- Uses DB
@@ -200,6 +212,9 @@ class QuizUiForm(QtWidgets.QWidget):
         if self.current_questions:
             self.current_question_index = 0
             self.correct_answers_count = 0
+            self.attempt_answers = []
+            self.attempt_category = self.categoryComboBox.currentText()
+            self.attempt_started_at = datetime.now(timezone.utc).isoformat()
             self.display_question()
             self.nextButton.setEnabled(False)
             self.checkButton.setEnabled(True)
@@ -266,6 +281,16 @@ class QuizUiForm(QtWidgets.QWidget):
         for radio_btn in self.answer_radio_buttons:
             radio_btn.setEnabled(False)
         is_correct = selected_button.property("is_correct")
+        question_data = self.current_questions[self.current_question_index]
+        # Kept in memory only; the whole attempt is written in one request in next_question()
+        self.attempt_answers.append({
+            'position': self.current_question_index,
+            'question_id': question_data['question_id'],
+            'question_text': question_data['question_text'],
+            'answer_text': selected_button.text(),
+            'is_correct': bool(is_correct),
+            'answered_at': datetime.now(timezone.utc).isoformat()
+        })
         if is_correct:
             selected_button.setStyleSheet("QRadioButton { color: green; font-weight: bold; }")
             self.correct_answers_count += 1
@@ -303,6 +328,7 @@ class QuizUiForm(QtWidgets.QWidget):
             self.tryAgainButton.setEnabled(False)
 
             QMessageBox.information(self, "Quiz Complete", final_score_message)
+            self.submit_attempt()
 
             self.current_questions = []
             self.current_question_index = -1
@@ -312,6 +338,28 @@ class QuizUiForm(QtWidgets.QWidget):
                 self.ui.toolBox.setCurrentIndex(0)
             self.quiz_finished_signal.emit()
 
+    def submit_attempt(self):
+        """Records the finished attempt (every checked answer, retries included) in one backend call."""
+        if self.current_user_id is None or not self.attempt_answers:
+            self.attempt_answers = []
+            return
+        attempt_data = {
+            'user_id': self.current_user_id,
+            'client_attempt_id': uuid.uuid4().hex,
+            'category': self.attempt_category,
+            'started_at': self.attempt_started_at,
+            'finished_at': datetime.now(timezone.utc).isoformat(),
+            'answers': self.attempt_answers
+        }
+        self.attempt_answers = []
+        try:
+            response = api_client.session.post(f"{api_client.BACKEND_URL}/attempts", json=attempt_data, timeout=10)
+            response.raise_for_status()
+            print(f"QuizUiForm: Attempt recorded: {response.json().get('attempt', {}).get('id')}")
+        except requests.exceptions.RequestException as e:
+            # The score was already shown; a lost history entry should not interrupt the quiz
+            print(f"QuizUiForm: Failed to record quiz attempt: {e}")
+
     def closeEvent(self, event):
         """Ensures the database connection is closed when the app exits."""
         if self.db:
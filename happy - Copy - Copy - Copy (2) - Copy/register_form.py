@@ -1,8 +1,12 @@
 import sys
+import logging
 from PyQt5 import QtCore, QtGui, QtWidgets
 import requests  # CRITICAL: Import requests for backend communication
+import api_client  # Shared keep-alive session with compression negotiation
 import res_rc  # This imports your compiled resources
 
+logger = logging.getLogger('mindzap.frontend.register')
+
 class RegisterUi_Form(QtWidgets.QWidget):  # Class for the registration form
     # Define signals for communication with the main application
     registration_successful_signal = QtCore.pyqtSignal()
@@ -266,13 +270,13 @@ class RegisterUi_Form(QtWidgets.QWidget):  # Class for the registration form
             "country": country
         }
 
-        print(f"Frontend Debug: Sending data to backend: {registration_data}") # Debug: See what's being sent
+        logger.debug("Register: sending data", extra={'fields': {'data': registration_data}})  # Password is redacted
 
         try:
-            response = requests.post(backend_url, json=registration_data)
+            response = api_client.session.post(backend_url, json=registration_data)
             response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
 
-            print(f"Frontend Debug: Raw response text from backend: {response.text}") # Debug: See raw response
+            logger.debug("Register: raw response", extra={'fields': {'response': response.text}})
 
             # This is the line that likely causes the "Expecting value" error if response.text is not valid JSON
             response_data = response.json()
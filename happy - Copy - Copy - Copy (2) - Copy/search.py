@@ -0,0 +1,111 @@
+"""
+Full-text search over flashcards and quiz questions with SQLite FTS5.
+
+flashcards_fts and quiz_questions_fts hold a copy of the searchable text keyed by the source row id,
+and triggers on the source tables keep them in sync. The triggers fire only for changes to the
+indexed columns, so SM-2 schedule updates never touch the index. Each row also carries an 'owner'
+token ("u<user id>"). A search is the intersection of the owner's posting list with the query terms,
+so it never scans other users' matches. Prefix indexes answer prefixes of up to 4 characters
+directly; longer prefixes are range scans over the term index, which cover few terms by then.
+A migration that rebuilds flashcards or quiz_questions (batch_alter_table copies the table) drops
+the triggers with it, so it must run SCHEMA again afterwards.
+"""
+import re
+
+from sqlalchemy import text
+
+FLASHCARDS = 'flashcard'
+QUIZ_QUESTIONS = 'quiz_question'
+TYPES = (FLASHCARDS, QUIZ_QUESTIONS)
+MAX_TERMS = 16
+MAX_OFFSET = 1000  # Relevance pages past this are not worth ranking; refine the query instead
+SNIPPET_TOKENS = 12
+SNIPPET_OPEN, SNIPPET_CLOSE, SNIPPET_ELLIPSIS = '[', ']', '...'
+
+SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS flashcards_fts USING fts5("
+    "owner, question, answer, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')",
+    "CREATE TRIGGER IF NOT EXISTS flashcards_fts_ai AFTER INSERT ON flashcards BEGIN "
+    "INSERT INTO flashcards_fts(rowid, owner, question, answer) "
+    "VALUES (new.id, 'u' || new.user_id, new.question, new.answer); END",
+    "CREATE TRIGGER IF NOT EXISTS flashcards_fts_ad AFTER DELETE ON flashcards BEGIN "
+    "DELETE FROM flashcards_fts WHERE rowid = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS flashcards_fts_au AFTER UPDATE OF user_id, question, answer ON flashcards BEGIN "
+    "UPDATE flashcards_fts SET owner = 'u' || new.user_id, question = new.question, answer = new.answer "
+    "WHERE rowid = old.id; END",
+
+    "CREATE VIRTUAL TABLE IF NOT EXISTS quiz_questions_fts USING fts5("
+    "owner, question_text, quiz_id UNINDEXED, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')",
+    "CREATE TRIGGER IF NOT EXISTS quiz_questions_fts_ai AFTER INSERT ON quiz_questions BEGIN "
+    "INSERT INTO quiz_questions_fts(rowid, owner, question_text, quiz_id) "
+    "VALUES (new.id, 'u' || (SELECT user_id FROM quizzes WHERE id = new.quiz_id), new.question_text, new.quiz_id); END",
+    "CREATE TRIGGER IF NOT EXISTS quiz_questions_fts_ad AFTER DELETE ON quiz_questions BEGIN "
+    "DELETE FROM quiz_questions_fts WHERE rowid = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS quiz_questions_fts_au AFTER UPDATE OF quiz_id, question_text ON quiz_questions BEGIN "
+    "UPDATE quiz_questions_fts SET owner = 'u' || (SELECT user_id FROM quizzes WHERE id = new.quiz_id), "
+    "question_text = new.question_text, quiz_id = new.quiz_id WHERE rowid = old.id; END",
+]
+
+# Column weights for bm25(): the owner column never contributes, questions count double
+SEARCH_SQL = {
+    FLASHCARDS: text(
+        "SELECT rowid AS id, "
+        "snippet(flashcards_fts, 1, :open, :close, :ellipsis, :tokens) AS question_snippet, "
+        "snippet(flashcards_fts, 2, :open, :close, :ellipsis, :tokens) AS answer_snippet, "
+        "bm25(flashcards_fts, 0.0, 2.0, 1.0) AS score "
+        "FROM flashcards_fts WHERE flashcards_fts MATCH :query ORDER BY score LIMIT :limit"
+    ),
+    QUIZ_QUESTIONS: text(
+        "SELECT rowid AS id, quiz_id, "
+        "snippet(quiz_questions_fts, 1, :open, :close, :ellipsis, :tokens) AS question_snippet, "
+        "bm25(quiz_questions_fts, 0.0, 1.0) AS score "
+        "FROM quiz_questions_fts WHERE quiz_questions_fts MATCH :query ORDER BY score LIMIT :limit"
+    ),
+}
+SEARCHED_COLUMNS = {FLASHCARDS: '{question answer}', QUIZ_QUESTIONS: 'question_text'}
+
+
+FTS_TABLES = ('flashcards_fts', 'quiz_questions_fts')
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Alembic filter: keeps autogenerate from dropping the FTS tables and their shadow tables."""
+    return not (type_ == 'table' and reflected and name.startswith(FTS_TABLES))
+
+
+def create_schema(connection):
+    """Creates the FTS tables and sync triggers; used for brand-new databases built with create_all()."""
+    for statement in SCHEMA:
+        connection.execute(text(statement))
+
+
+def match_expression(user_id, query_text, kind):
+    """
+    Builds an FTS5 MATCH expression from free text, or returns None if it has no searchable words.
+    Every word must appear; the last one is matched as a prefix, since it may still be being typed.
+    Completed words stay exact matches, because expanding a short prefix into every term it covers is what
+    makes FTS5 queries slow. User input is only ever used inside quoted strings, so FTS5 operators in it
+    are matched as plain text.
+    """
+    terms = re.findall(r'\w+', query_text)[:MAX_TERMS]
+    if not terms:
+        return None
+    words = ' AND '.join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*'])
+    return f'owner : "u{int(user_id)}" AND {SEARCHED_COLUMNS[kind]} : ({words})'
+
+
+def search(session, user_id, query_text, kinds, limit, offset):
+    """
+    Returns (results, has_more) for one page of matches across the requested kinds, best match first.
+    Each kind is ranked in SQLite; the pages are merged on the bm25 score (lower is better).
+    """
+    results = []
+    for kind in kinds:
+        rows = session.execute(SEARCH_SQL[kind], {
+            'query': match_expression(user_id, query_text, kind), 'limit': offset + limit + 1,
+            'open': SNIPPET_OPEN, 'close': SNIPPET_CLOSE, 'ellipsis': SNIPPET_ELLIPSIS, 'tokens': SNIPPET_TOKENS
+        }).mappings().all()
+        results.extend(dict(row, type=kind) for row in rows)
+    results.sort(key=lambda result: result['score'])
+    page = results[offset:offset + limit]
+    return page, len(results) > offset + limit
@@ -0,0 +1,148 @@
+"""
+HMAC-signed, expiring session tokens for the Flask backend.
+
+A token is "<key id>.<payload>.<signature>". The payload is base64url-encoded compact JSON holding the
+user id (uid), username (sub), issue and expiry times (iat / exp, Unix seconds) and a random token id (jti).
+The signature is HMAC-SHA256 over "<key id>.<payload>". Verifying a token needs no database access:
+the signature is checked with the named key before anything is decoded, then the expiry and the
+in-memory denylist of revoked token ids.
+
+SESSION_SECRETS maps key id -> secret, signing key first. The other keys are still accepted, so a secret
+is rotated by putting a new key first and dropping the old one once its tokens have expired.
+The denylist lives in process memory: with several pre-forked workers a revoked token is refused by
+the worker that revoked it, and by the others only once it expires.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, jsonify, request
+
+DEFAULT_TTL = 12 * 60 * 60  # Seconds
+
+logger = logging.getLogger('mindzap.backend.session')
+
+
+class TokenError(Exception):
+    """Raised for a malformed, badly signed, expired or revoked token. The message is safe to return."""
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def parse_secrets(text):
+    """Parses "key_id:secret,key_id:secret" (signing key first) into an ordered dict."""
+    keys = {}
+    for item in filter(None, (part.strip() for part in (text or '').split(','))):
+        kid, _, secret = item.partition(':')
+        if not kid or not secret or '.' in kid:
+            raise ValueError(f"Invalid session secret entry for key id '{kid}'.")
+        keys[kid] = secret
+    return keys
+
+
+class Denylist:
+    """Ids of revoked tokens, each kept only until the token would have expired anyway."""
+
+    def __init__(self):
+        self._expiry_by_id = {}
+        self._lock = threading.Lock()  # Writers only; lookups are a single dict read
+
+    def add(self, token_id, expires_at):
+        now = time.time()
+        with self._lock:
+            # Revocations are rare, so pruning on every add keeps the set small at negligible cost
+            self._expiry_by_id = {jti: exp for jti, exp in self._expiry_by_id.items() if exp > now}
+            self._expiry_by_id[token_id] = expires_at
+
+    def __contains__(self, token_id):
+        return token_id in self._expiry_by_id
+
+
+class TokenSigner:
+    def __init__(self, keys, ttl=DEFAULT_TTL):
+        if not keys:
+            raise ValueError("At least one session secret is required.")
+        self._keys = {kid: secret.encode('utf-8') for kid, secret in keys.items()}
+        self._signing_kid = next(iter(keys))
+        self.ttl = ttl
+        self.denylist = Denylist()
+
+    def _sign(self, kid, body):
+        return _b64encode(hmac.new(self._keys[kid], f"{kid}.{body}".encode('ascii'), hashlib.sha256).digest())
+
+    def issue(self, user_id, username):
+        now = int(time.time())
+        payload = {'uid': user_id, 'sub': username, 'iat': now, 'exp': now + self.ttl,
+                   'jti': secrets.token_urlsafe(12)}
+        body = _b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+        return f"{self._signing_kid}.{body}.{self._sign(self._signing_kid, body)}"
+
+    def verify(self, token):
+        """Returns the token's payload dict, or raises TokenError."""
+        try:
+            kid, body, signature = token.split('.')
+        except ValueError:
+            raise TokenError("Malformed session token.") from None
+        if not token.isascii():
+            raise TokenError("Malformed session token.")
+        if kid not in self._keys:
+            raise TokenError("Session token signed with an unknown key.")
+        if not hmac.compare_digest(signature, self._sign(kid, body)):
+            raise TokenError("Invalid session token signature.")
+        payload = json.loads(_b64decode(body))  # Signed by us, so well-formed
+        if payload['exp'] <= time.time():
+            raise TokenError("Session token expired.")
+        if payload['jti'] in self.denylist:
+            raise TokenError("Session token revoked.")
+        return payload
+
+    def revoke(self, payload):
+        self.denylist.add(payload['jti'], payload['exp'])
+
+
+def init_session_tokens(app):
+    """
+    Creates the app's TokenSigner. Config: SESSION_SECRETS (key id -> secret, signing key first),
+    SESSION_TOKEN_TTL (seconds). Without secrets a random per-process key is used, which logs
+    everyone out on restart.
+    """
+    app.config.setdefault('SESSION_TOKEN_TTL', DEFAULT_TTL)
+    keys = app.config.get('SESSION_SECRETS')
+    if not keys:
+        logger.warning("SESSION_SECRETS not set; using a random key, tokens will not survive a restart")
+        keys = {'ephemeral': secrets.token_urlsafe(32)}
+    app.extensions['session_tokens'] = TokenSigner(keys, app.config['SESSION_TOKEN_TTL'])
+
+
+def signer():
+    return current_app.extensions['session_tokens']
+
+
+def require_session(view):
+    """
+    Answers 401 unless the request carries a valid "Authorization: Bearer <token>" header.
+    Otherwise the token's payload is available to the view as g.auth ('uid', 'sub', 'exp', ...).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not token.strip():
+            return jsonify(message="Authentication required."), 401
+        try:
+            g.auth = signer().verify(token.strip())
+        except TokenError as e:
+            return jsonify(message=str(e)), 401
+        return view(*args, **kwargs)
+    return wrapper
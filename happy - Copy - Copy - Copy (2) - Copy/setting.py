@@ -1,8 +1,12 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QLineEdit, QCheckBox, QMessageBox
 from PyQt5.QtCore import Qt, pyqtSignal # Import pyqtSignal
 import json
+import logging
 import os
 import requests # Import requests for API calls
+import api_client  # Shared keep-alive session with compression negotiation
+
+logger = logging.getLogger('mindzap.frontend.settings')
 
 SETTINGS_FILE = "settings.json" # Define the file name for saving settings
 
@@ -106,16 +110,18 @@ class SettingsWidget(QWidget):
         }
 
         backend_url = "http://127.0.0.1:5000/update_credentials"
-        print(f"Frontend Debug (Settings): Sending update data: {update_data}")
+        logger.debug("Sending credentials update", extra={'fields': {'data': update_data}})
 
         response = None # Initialize response to None to prevent "might be referenced before assignment" error
         try:
-            response = requests.post(backend_url, json=update_data)
+            response = api_client.session.post(backend_url, json=update_data)
             response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
             response_data = response.json()
 
             if response.status_code == 200:
                 QMessageBox.information(self, "Settings Saved", response_data.get("message", "Settings updated successfully!"))
+                # The backend revokes the old session token and issues one for the updated credentials
+                api_client.set_session_token(response_data.get("token"))
                 # If email was changed, update the current_user_email and emit signal
                 if new_email and new_email != self.current_user_email:
                     self.current_user_email = new_email
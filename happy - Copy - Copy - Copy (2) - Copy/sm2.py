@@ -0,0 +1,47 @@
+"""
+SM-2 spaced-repetition scheduling (SuperMemo 2 algorithm).
+Pure functions only, so the backend can apply them to single cards or whole review batches.
+"""
+from datetime import timedelta
+
+MIN_GRADE = 0
+MAX_GRADE = 5
+PASSING_GRADE = 3  # Grades below this reset the card's repetition streak
+MIN_EASE_FACTOR = 1.3
+DEFAULT_EASE_FACTOR = 2.5
+
+
+def is_valid_grade(grade):
+    """Grades are integers from 0 (complete blackout) to 5 (perfect recall)."""
+    return isinstance(grade, int) and not isinstance(grade, bool) and MIN_GRADE <= grade <= MAX_GRADE
+
+
+def review(interval, repetitions, ease_factor, grade):
+    """
+    Applies one SM-2 review to a card's scheduling state.
+    :return: (interval_days, repetitions, ease_factor) after the review.
+    """
+    interval = interval or 1
+    repetitions = repetitions or 0
+    ease_factor = ease_factor or DEFAULT_EASE_FACTOR
+
+    if grade >= PASSING_GRADE:
+        if repetitions == 0:
+            interval = 1
+        elif repetitions == 1:
+            interval = 6
+        else:
+            interval = int(round(interval * ease_factor))
+        repetitions += 1
+    else:
+        repetitions = 0
+        interval = 1
+
+    ease_factor += 0.1 - (MAX_GRADE - grade) * (0.08 + (MAX_GRADE - grade) * 0.02)
+    ease_factor = max(MIN_EASE_FACTOR, ease_factor)
+    return interval, repetitions, ease_factor
+
+
+def next_due_date(reviewed_at, interval):
+    """The card becomes due again 'interval' days after it was reviewed."""
+    return reviewed_at + timedelta(days=interval)
@@ -0,0 +1,149 @@
+"""
+Non-blocking structured logging shared by the Flask backend and the PyQt frontend.
+
+Callers log through the standard 'logging' module and attach key/value data with
+extra={'fields': {...}}. The calling thread only drops sampled-out records and enqueues the
+rest; redaction, JSON formatting and the write to stderr happen on a background QueueListener thread.
+
+Environment configuration:
+    MINDZAP_LOG_LEVEL     root level, e.g. INFO (default)
+    MINDZAP_LOG_LEVELS    per-logger levels, e.g. "mindzap.backend=DEBUG,sqlalchemy.engine=WARNING"
+    MINDZAP_LOG_SAMPLING  fraction of sub-WARNING records kept per logger, e.g. "mindzap.backend=0.1"
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+# Field names whose values are never written out (matched case-insensitively, at any nesting depth)
+SENSITIVE_KEYS = frozenset({
+    'password', 'new_password', 'current_password', 'password_hash',
+    'token', 'session_token', 'authorization', 'secret', 'api_key',
+})
+REDACTED = '***'
+
+_listener = None
+
+
+def redact(value):
+    """Returns a copy of value with every SENSITIVE_KEYS entry replaced by REDACTED."""
+    if isinstance(value, dict):
+        return {key: REDACTED if str(key).lower() in SENSITIVE_KEYS else redact(item)
+                for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, plus the record's redacted fields."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        fields = getattr(record, 'fields', None)
+        if fields:
+            entry.update(redact(fields))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that keeps a record's exception for JsonFormatter's 'exception' field.
+    The stock prepare() folds the formatted traceback into msg and clears exc_info / exc_text.
+    """
+
+    def prepare(self, record):
+        # Runs on the thread that logs. Only the message arguments are merged here, since they may change
+        # once the call returns; the traceback is formatted by the listener, which receives the record
+        # in-process (the queue never pickles it).
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a fraction of the records below WARNING for the configured loggers (and their children)."""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        name = record.name
+        while name:
+            if name in self.rates:
+                return random.random() < self.rates[name]
+            name = name.rpartition('.')[0]
+        return True
+
+
+def _parse_mapping(text, convert):
+    mapping = {}
+    for item in filter(None, (part.strip() for part in (text or '').split(','))):
+        name, _, value = item.partition('=')
+        mapping[name.strip()] = convert(value.strip())
+    return mapping
+
+
+def _start_listener(log_queue, handler):
+    global _listener
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()  # Drains the queue before returning
+
+
+def configure_logging(level=None, levels=None, sampling=None, stream=None):
+    """
+    Installs the queue-based handler on the root logger. Safe to call more than once; later calls are ignored.
+    Arguments override the MINDZAP_LOG_* environment variables.
+    """
+    if _listener is not None:
+        return
+
+    level = level or os.environ.get('MINDZAP_LOG_LEVEL', 'INFO')
+    if levels is None:
+        levels = _parse_mapping(os.environ.get('MINDZAP_LOG_LEVELS'), str.upper)
+    if sampling is None:
+        sampling = _parse_mapping(os.environ.get('MINDZAP_LOG_SAMPLING'), float)
+
+    output_handler = logging.StreamHandler(stream or sys.stderr)
+    output_handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = StructuredQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sampling))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+    for name, logger_level in levels.items():
+        logging.getLogger(name).setLevel(logger_level)
+
+    _start_listener(log_queue, output_handler)
+    atexit.register(_stop_listener)
+    # The listener thread does not survive fork (e.g. pre-forked server workers); start a fresh one in the child
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=lambda: _start_listener(log_queue, output_handler))
@@ -0,0 +1,28 @@
+import io
+
+import pytest
+
+from flashcard_import import ImportFormatError, iter_json_array
+
+
+def _parse(text):
+    return list(iter_json_array(io.BytesIO(text.encode('utf-8'))))
+
+
+def test_json_array_yields_each_row():
+    rows = _parse('[{"question": "Q1", "answer": "A1"}, {"question": "Q2"}]')
+
+    assert rows[0] == (1, {'question': 'Q1', 'answer': 'A1'}, None)
+    assert rows[1][0] == 2 and rows[1][1] is None and rows[1][2]
+
+
+def test_empty_json_array_is_accepted():
+    assert _parse(' [ ] ') == []
+
+
+def test_trailing_comma_is_a_parse_error():
+    rows = iter_json_array(io.BytesIO(b'[{"question": "Q1", "answer": "A1"},]'))
+
+    assert next(rows) == (1, {'question': 'Q1', 'answer': 'A1'}, None)
+    with pytest.raises(ImportFormatError, match="Trailing ','"):
+        next(rows)
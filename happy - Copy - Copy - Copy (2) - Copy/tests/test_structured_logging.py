@@ -0,0 +1,40 @@
+import json
+import logging
+import queue
+
+from structured_logging import JsonFormatter, StructuredQueueHandler
+
+
+def _log_through_queue(log):
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger('mindzap.tests.structured_logging')
+    logger.propagate = False
+    handler = StructuredQueueHandler(log_queue)
+    logger.addHandler(handler)
+    try:
+        log(logger)
+    finally:
+        logger.removeHandler(handler)
+    return json.loads(JsonFormatter().format(log_queue.get_nowait()))
+
+
+def test_exception_is_kept_as_its_own_field():
+    def log(logger):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Import failed for %s", 'deck.csv', extra={'fields': {'user_id': 7}})
+
+    entry = _log_through_queue(log)
+
+    assert entry['message'] == "Import failed for deck.csv"
+    assert entry['exception'].startswith("Traceback (most recent call last):")
+    assert "ValueError: boom" in entry['exception']
+    assert entry['user_id'] == 7
+
+
+def test_record_without_exception_has_no_exception_field():
+    entry = _log_through_queue(lambda logger: logger.warning("Login: user not found"))
+
+    assert entry['message'] == "Login: user not found"
+    assert 'exception' not in entry
@@ -0,0 +1,9 @@
+"""
+Production WSGI entry point for the MindZap backend.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Importing this module only builds the Flask app; it does not create or probe tables.
+Apply schema changes once per deploy with 'flask --app app db upgrade'.
+"""
+from app import app  # noqa: F401